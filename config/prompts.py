@@ -142,30 +142,23 @@ You are a helpful AI research assistant executing a research plan step-by-step.
     - "how to sleep better" (unless searching for that exact phrase)
 """
 
-# Prompt for requesting next step in the action loop
-NEXT_ACTION_TEMPLATE = """
-You are a research assistant performing iterative research.
-Current Topic: {topic}
-Current Date: {current_date}
-
-<Context>
-    <summary_so_far>
-        {summary_so_far}
-    </summary_so_far>
-    <sources_visited>
-        {sources_visited}
-    </sources_visited>
-    <last_action>
-        {last_action}
-    </last_action>
-</Context>
+# Prompt for requesting next step in the action loop, in two parts: the instructions, which stay
+# the same for a whole run, and the per-iteration context. The cache-aware layout (PROMPT_LAYOUT:
+# "cache_aware") sends the instructions with the system prompt, then the append-only history, and
+# only the context at the end, so providers with prompt caching can reuse the prefix instead of
+# reprocessing it on every iteration. The classic layout sends both parts as NEXT_ACTION_TEMPLATE.
+NEXT_ACTION_INSTRUCTIONS = """
+<next_action_instructions>
+You are a research assistant performing iterative research. The current context (summary_so_far,
+sources_visited, last_action, invalid_extraction_urls and the Tool Usage Tracker) is given at the
+end of the prompt and is updated after every action.
 
 # IMPORTANT CONSTRAINT:
-# Do not attempt to extract content from URLs in {invalid_extraction_urls} unless they appear in a new search result. If you need to extract content, first re-run the search and select a URL from the new results.
+# Do not attempt to extract content from URLs listed in invalid_extraction_urls unless they appear in a new search result. If you need to extract content, first re-run the search and select a URL from the new results.
 # If you see recent_errors indicating a URL failed for this reason, do not retry it unless it is present in the latest search results.
 
 Task:
-Based only on the context above, determine the single best next action to continue the research on '{topic}'.
+Based only on the context given at the end of the prompt, determine the single best next action to continue the research on '{topic}'.
 Your goal is to gather enough high-quality, balanced information to write a comprehensive final report, respecting any tool usage (including minimum/maximum) requirements. Avoid repeating sources unless necessary.
 
 You will always have new content (success or error) after each tool call. Never wait for system processing—always analyze the latest result and proceed, unless explicitly told to pause or a blocking error requires it.
@@ -213,7 +206,7 @@ A) **If proceeding with a tool:** After your reasoning, state which tool is need
    | Plan Fit     | [how this fits the initial plan/tool use] |
    
    ### Tool Usage Tracker
-   {tool_usage_tracker_md}
+   [the current Tool Usage Tracker table from the context]
    
    - Update the 'Used' column based on the current state/history for each tool.
    - Always include this table in every next action output.
@@ -238,8 +231,37 @@ A) **If proceeding with a tool:** After your reasoning, state which tool is need
 B) **If stopping research:** State **exactly** `FINAL_SUMMARY` on a new line after your reasoning if you believe enough information has been gathered, minimum tool usage is met, or you are stuck/hitting limits. Do not include any other text on this line.
 
 **CRITICAL:** Choose *either* action A (signal tool use with both the ACTION CONFIRMATION block AND tool-calling capabilities) or action B (state `FINAL_SUMMARY`).
+</next_action_instructions>
 """
 
+NEXT_ACTION_CONTEXT = """
+Current Topic: {topic}
+Current Date: {current_date}
+
+<Context>
+    <summary_so_far>
+        {summary_so_far}
+    </summary_so_far>
+    <sources_visited>
+        {sources_visited}
+    </sources_visited>
+    <last_action>
+        {last_action}
+    </last_action>
+    <invalid_extraction_urls>
+        {invalid_extraction_urls}
+    </invalid_extraction_urls>
+    <tool_usage_tracker>
+{tool_usage_tracker_md}
+    </tool_usage_tracker>
+</Context>
+
+Determine the single best next action now, following the next action instructions.
+"""
+
+NEXT_ACTION_TEMPLATE = NEXT_ACTION_INSTRUCTIONS + NEXT_ACTION_CONTEXT
+
+
 # Prompt for condensing entire research history into a single summary
 CONDENSE_PROMPT = PromptTemplate.from_template("""
 Your task is to condense the provided text content for an AI research agent, prioritizing clarity and accuracy for the agent's next decision. You are not explaining what the content is, but rather condensing it.
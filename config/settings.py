@@ -22,9 +22,11 @@ DEFAULT_CONFIG = {
     "SUMMARIZER_MODEL": "gemini-2.0-flash",  # Default summarization model setting
     "SUMMARY_MAX_TOKENS": 1200,
     "FINAL_SUMMARY_MAX_TOKENS": 16000, # Max tokens for the final report
+    "FINAL_SUMMARY_CONTENT_BUDGET": 150000,  # Max tokens of research content in the final report prompt; most relevant sections kept (0 = model window)
     # --- Next Step Model Configuration --- #
     "NEXT_STEP_MODEL": "gemini-2.5-flash-preview-04-17",  # Default next step model
     "NEXT_STEP_THINKING_DEFAULT": False,      # Default: do not use thinking mode unless planner requests
+    "MODEL_CAPABILITIES": {},  # Context window/output limit overrides or additions per model name pattern (see src/model_registry.py)
     
     # --- Local Model Configuration --- #
     "LOCAL_MODELS_DIR": "models",  # Directory for storing local models
@@ -35,11 +37,58 @@ DEFAULT_CONFIG = {
     "MAX_CONTENT_PREVIEW_TOKENS": 1000,
     "CHUNK_SIZE": 0,  # Default to 0 (no chunking) for gemini-2.0-flash
     "CHUNK_OVERLAP": 400,  # Default chunk overlap
+    "SUMMARIZER_MAP_CONCURRENCY": 8,  # Concurrent chunk summaries per cloud summarizer model in map_reduce summarization
+    "LOCAL_SUMMARIZER_MAP_CONCURRENCY": 1,  # Same for a local summarizer model (one request at a time avoids contention)
+    "CONDENSED_CONTENT_MAX_TOKENS": 8000,  # Token budget for the rolling condensed research state before segments are merged
+    "PROMPT_LAYOUT": "cache_aware",  # Action prompt order: "cache_aware" (stable instructions, history, then volatile context) or "classic"
 
     # --- Cache Configuration --- #
     "ENABLE_ADVANCED_CACHE": True,  # Enable the normalizing cache for better hit rates
     "CACHE_DB_PATH": ".langchain.db",  # Path to SQLite database for caching
     "CACHE_SCHEMA": "cache",  # Schema name for cache tables
+    "CACHE_COMPRESSION": "zstd",  # Codec for cached generations: "zstd" (falls back to zlib if unavailable), "zlib" or "none"
+    "CACHE_STORE_PROMPTS": False,  # Also store the compressed prompt text of each cache entry (debugging only)
+    "CACHE_MAX_MB": 512,  # Size cap for cached generations; least recently hit entries are evicted beyond it (0 = no cap)
+    "CACHE_MAX_ENTRIES": 50000,  # Entry cap, evicted the same way (0 = no cap)
+    "CACHE_TTL_HOURS": {  # Freshness per model (substring of the model name) in hours (0 = never expires)
+        "default": 0,
+    },
+    "CACHE_MAINTENANCE_INTERVAL": 600,  # Seconds between background eviction/vacuum runs (0 = only on demand)
+    "CACHE_WRITE_BATCH_SIZE": 32,  # New cache entries are written in one transaction once this many are pending
+    "CACHE_FLUSH_INTERVAL": 2.0,  # Seconds after which pending cache entries are written anyway (0 = write immediately)
+    "CACHE_MEMORY_MAX_MB": 64,  # In-process LRU tier in front of the SQLite cache, by serialized size (0 = disabled)
+    "CACHE_WARMUP_ENTRIES": 0,  # Preload this many of the most hit cache entries into memory at startup (0 = disabled)
+    "CACHE_TAG": None,  # Label stored with new cache entries (e.g. a topic family) for filtered bundle exports
+
+    # --- Persistent Content Store --- #
+    "ENABLE_CONTENT_STORE": True,  # Reuse extracted pages and summaries across sessions
+    "CONTENT_STORE_DB_PATH": ".content_store.db",  # SQLite database for the content store
+    "CONTENT_STORE_MAX_MB": 500,  # Size cap; least recently used entries are evicted beyond it
+    "CONTENT_STORE_TTL_HOURS": {  # Freshness per source type (0 = never expires)
+        "web": 168,
+        "reddit": 24,
+        "pubmed": 720,
+        "default": 72,
+    },
+
+    # --- Near-Duplicate Summary Cache --- #
+    "ENABLE_NEAR_DUPLICATE_CACHE": True,  # Reuse summaries of near-identical documents (syndicated/AMP copies)
+    "NEAR_DUPLICATE_DB_PATH": ".near_duplicate_cache.db",  # SQLite database for MinHash sketches and summaries
+    "NEAR_DUPLICATE_THRESHOLD": 0.85,  # Minimum estimated Jaccard similarity of word shingles to reuse a summary
+    "NEAR_DUPLICATE_SKETCH_SIZE": 128,  # MinHash values kept per document
+    "NEAR_DUPLICATE_SHINGLE_WORDS": 5,  # Words per shingle
+    "NEAR_DUPLICATE_TTL_HOURS": 168,  # How long summaries are reused (0 = never expire)
+    "NEAR_DUPLICATE_MAX_ENTRIES": 5000,  # Least recently used summaries are evicted beyond this
+
+    # --- Follow-up Retrieval --- #
+    "FOLLOW_UP_RETRIEVAL_TOP_K": 8,  # Chunks retrieved from the run's content per follow-up question ("Use Relevant Excerpts")
+    "RETRIEVAL_EMBEDDING_MODEL": None,  # Optional local sentence-transformers model blended with BM25 (None = BM25 only)
+
+    # --- Search Result Cache --- #
+    "ENABLE_SEARCH_CACHE": True,  # Reuse search results across tool instances and sessions
+    "SEARCH_CACHE_DB_PATH": ".search_cache.db",  # SQLite database for cached search results
+    "SEARCH_CACHE_TTL_HOURS": 24,  # How long cached results stay fresh (0 = never expire)
+    "SEARCH_CACHE_MAX_ENTRIES": 2000,  # Least recently used queries are evicted beyond this
 
     # --- CAPTCHA Settings --- #
     "USE_CAPTCHA_SOLVER": True,
@@ -50,10 +99,47 @@ DEFAULT_CONFIG = {
     "THINKING_BUDGET": 4000,   # Default budget if thinking enabled
     "MIN_REGULAR_WEB_PAGES": 1,
     "MAX_REGULAR_WEB_PAGES": 2,
+    "MAX_CONCURRENT_TOOL_CALLS": 4, # Max tool calls from one agent step executed in parallel (1 = serial)
 
     # --- Playwright/Browser Settings --- #
     "BROWSER_NAVIGATION_TIMEOUT": 15000,
     "STORAGE_STATE_PATH": "browser_state.json",
+    "BROWSER_PAGE_POOL_SIZE": 4,  # Max browser pages kept by the page pool (leased + idle)
+    "HTTP_CLIENT_TIMEOUT": 30,  # Default timeout (s) of the shared pooled HTTP clients
+    "HTTP_CLIENT_MAX_CONNECTIONS": 50,  # Total pooled connections across hosts
+    "HTTP_CLIENT_MAX_PER_HOST": 6,  # Concurrent requests per host
+    "HTTP_CLIENT_DNS_CACHE_TTL": 300,  # Seconds DNS lookups are cached (aiohttp)
+    "ENABLE_HTTP_FAST_PATH": True,  # Try a plain HTTP GET + readability before opening a browser tab
+    "HTTP_FAST_PATH_TIMEOUT": 10,  # Seconds for the fast path request
+    "HTTP_FAST_PATH_MIN_CHARS": 500,  # Less extracted text than this falls back to the browser
+    "HTTP_FAST_PATH_FAILURES_BEFORE_BROWSER": 2,  # Consecutive fast path failures before a host goes straight to the browser
+    "HTTP_FAST_PATH_BROWSER_TTL": 3600,  # Seconds a learned host skips the fast path before it is tried again
+    "HTTP_FAST_PATH_BROWSER_DOMAINS": [  # Domains that always need the browser
+        "google.com",
+        "reddit.com",
+        "linkedin.com",
+        "x.com",
+        "twitter.com",
+        "facebook.com",
+        "instagram.com",
+        "youtube.com",
+    ],
+    "EXTRACTION_WORKERS": 2,  # Worker processes for readability/markdownify/lxml cleanup (0 = run in a thread)
+    "EXTRACTION_QUEUE_SIZE": 16,  # Jobs allowed to wait for a worker before callers are held back
+    "EXTRACTION_TIMEOUT": 20,  # Seconds before an HTML cleanup job is abandoned
+    "PDF_EXTRACTION_WORKERS": 2,  # Worker processes parsing PDF pages in parallel (0 = run in a thread)
+    "PDF_PAGES_PER_TASK": 16,  # Minimum pages per worker task
+    "PDF_MAX_PAGES": 300,  # Stop extracting after this many pages (0 = no limit)
+    "PDF_MAX_TOKENS": 150000,  # Stop extracting once the text reaches this many tokens (0 = no limit)
+    "PAGE_READINESS_TIMEOUT": 8,  # Max seconds the adaptive readiness probe waits for the DOM to settle
+    "PAGE_READINESS_POLICIES": {  # Per-domain readiness mode: "static", "adaptive" or "human" (bot-sensitive)
+        "google.com": "human",
+        "linkedin.com": "human",
+        "wikipedia.org": "static",
+        "arxiv.org": "static",
+        "ncbi.nlm.nih.gov": "static",
+        "default": "adaptive",
+    },
 
     # --- Logging --- #
     "LOG_LEVEL": "INFO",
@@ -70,6 +156,8 @@ DEFAULT_CONFIG = {
     "GEMINI_25_FLASH_PREVIEW_COST_PER_1K_OUTPUT": 0.00060,
     "GEMINI_SUMMARY_COST_PER_1K_INPUT": 0.000075,
     "GEMINI_SUMMARY_COST_PER_1K_OUTPUT": 0.00030,
+    "PROMPT_CACHE_READ_COST_FACTOR": {"claude": 0.1, "gemini": 0.25},  # Price of provider-cached input tokens relative to regular input
+    "PROMPT_CACHE_WRITE_COST_FACTOR": {"claude": 1.25},  # Price of input tokens written to the provider cache relative to regular input (Gemini's implicit caching has no write charge)
     "LOG_COST_SUMMARY": True,
     
     # --- Defaults for potentially missing keys --- #
@@ -5,73 +5,205 @@ This module provides a custom cache implementation that normalizes volatile part
 (like timestamps, UUIDs, agent scratchpads) to improve cache hit rates.
 """
 
+import asyncio
+import bisect
 import hashlib
 import json
 import logging
+import os
 import re
 import sqlite3
-from dataclasses import asdict, dataclass
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from langchain.schema import Generation
-from langchain_community.cache import SQLiteCache
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from config.settings import (
+    CACHE_COMPRESSION,
+    CACHE_STORE_PROMPTS,
+    CACHE_MAX_MB,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_HOURS,
+    CACHE_MAINTENANCE_INTERVAL,
+    CACHE_WRITE_BATCH_SIZE,
+    CACHE_FLUSH_INTERVAL,
+    CACHE_MEMORY_MAX_MB,
+    CACHE_TAG,
+    CACHE_WARMUP_ENTRIES,
+    PRIMARY_MODEL_NAME,
+    SUMMARIZER_MODEL,
+    NEXT_STEP_MODEL,
+)
 
 logger = logging.getLogger(__name__)
 
+# zstd is optional ('zstandard' package); zlib is used without it
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# tiktoken is only needed when a response carries no usage metadata; loaded on first use
+_token_encoding = None
+
 
 @dataclass
 class CacheStats:
     """Statistics for the cache."""
     hits: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
     misses: int = 0
     normalizations: int = 0
     skipped: int = 0
+    expired: int = 0
+    evicted: int = 0
+    flushes: int = 0
+    flushed_entries: int = 0
+    maintenance_runs: int = 0
+    maintenance_seconds: float = 0.0
+    vacuumed_pages: int = 0
+
+
+@dataclass
+class NormalizerStats:
+    """Timing counters for prompt normalization."""
+    calls: int = 0
+    memo_hits: int = 0
+    chars: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+# Upper bounds (ms) of the lookup latency histogram buckets; slower lookups land in "+inf"
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500)
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + ["+inf"]
+        return {
+            "count": count,
+            "mean_ms": self.total_ms / count if count else 0.0,
+            "max_ms": self.max_ms,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+@dataclass
+class ModelCacheMetrics:
+    """Cache counters for one (model, role) pair."""
+    hits: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    saved_input_tokens: int = 0
+    saved_output_tokens: int = 0
+    lookup_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+@dataclass
+class CacheEvent:
+    """A lookup or write, as passed to listeners registered with NormalizingCache.add_listener.
+
+    kind is "hit", "miss" or "write"; tier is "memory", "pending" or "disk" for hits. Token
+    counts are those stored with the entry (for hits: the tokens the hit saved).
+    """
+    kind: str
+    model: str
+    role: str
+    tier: Optional[str] = None
+    latency_ms: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+# Guard for date-only patterns: a date that starts a full timestamp is left to the timestamp pattern
+_NOT_TIMESTAMP = r"(?! \d{2}:\d{2}:\d{2}\b|T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z\b)"
 
 
 class ContentNormalizer:
-    """Normalizes content for caching purposes by removing volatile parts."""
-
-    def __init__(self):
-        # Patterns to identify and normalize volatile parts
-        self.patterns = [
-            # Dates and times in various formats
-            (r"\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z\b", "[TIMESTAMP]"),
-            (r"\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z\b", "[TIMESTAMP]"),
-            (r"\b\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\b", "[TIMESTAMP]"),
-            (r"current date: \d{4}-\d{2}-\d{2}\b", "current date: [DATE]"),
-            (r"current_date\s*[:=]\s*[\'\"]?\d{4}-\d{2}-\d{2}[\'\"]?", "current_date: [DATE]"),
-            
-            # UUIDs
-            (r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", "[UUID]"),
-            
-            # Conversation history markers (more specific first)
-            (r"AI: .*?(?=\nHuman:|$)", "AI: [AI_RESPONSE]"),
-            (r"Human: .*?(?=\nAI:|$)", "Human: [HUMAN_MESSAGE]"),
-            
-            # Tool executions and scratchpad
-            (r"Action: .*?(?=\nObservation:|$)", "Action: [ACTION]"),
-            (r"Observation: .*?(?=\nAction:|Thought:|$)", "Observation: [OBSERVATION]"),
-            
-            # Agent scratchpad: Refactored pattern to avoid variable-width look-behind
-            (r'(agent_scratchpad\s*[:=]\s*[\"\']{0,1})[^\"\'\n]+?', r'\1[SCRATCHPAD]'),
-            
-            # Research specific patterns
-            (r"Research History \(Newest first\):.*?(?=Condensed Research Content|$)", "Research History: [HISTORY]"),
-            (r"Condensed Research Content.*?(?=Task:|$)", "Condensed Research Content: [CONTENT]"),
-        ]
-        
-        # Compile patterns for efficiency
-        self.compiled_patterns = [(re.compile(pattern, re.DOTALL | re.MULTILINE), replacement) 
-                                 for pattern, replacement in self.patterns]
-        
+    """Normalizes content for caching purposes by removing volatile parts.
+
+    All volatile parts are matched by one alternation regex in a single left-to-right scan, so
+    large prompts (which embed condensed research content) are read once instead of once per
+    pattern. Where two markers overlap, the one that starts first wins. Results are memoized by
+    prompt hash, since every prompt is normalized on lookup and again on update.
+    """
+
+    # (group name, pattern, replacement). Sections come first so they win over line patterns
+    # starting at the same position. Replacements may reference named groups via \g<name>.
+    RULES = [
         # Sections to completely remove (identify by markers)
-        self.sections_to_remove = [
-            (r"--- BEGIN CONDENSED CONTENT ---.*?--- END CONDENSED CONTENT ---", "[CONDENSED_CONTENT]"),
-            (r"Condensed Research Content \(Summaries & Key Info\):.*?Task:", "Condensed Research Content: [CONTENT]\n\nTask:"),
-        ]
-        self.compiled_sections = [(re.compile(pattern, re.DOTALL), replacement) 
-                                 for pattern, replacement in self.sections_to_remove]
+        ("condensed_block", r"--- BEGIN CONDENSED CONTENT ---.*?--- END CONDENSED CONTENT ---", "[CONDENSED_CONTENT]"),
+        ("condensed_section", r"Condensed Research Content \(Summaries & Key Info\):.*?Task:", "Condensed Research Content: [CONTENT]\n\nTask:"),
+
+        # Research specific patterns
+        ("research_history", r"Research History \(Newest first\):.*?(?=Condensed Research Content|$)", "Research History: [HISTORY]"),
+        ("condensed_content", r"Condensed Research Content.*?(?=Task:|$)", "Condensed Research Content: [CONTENT]"),
+
+        # Dates and times in various formats
+        ("timestamp", r"\b\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z| \d{2}:\d{2}:\d{2})\b", "[TIMESTAMP]"),
+        ("current_date", r"current date: \d{4}-\d{2}-\d{2}\b" + _NOT_TIMESTAMP, "current date: [DATE]"),
+        ("current_date_var", r"current_date\s*[:=]\s*[\'\"]?\d{4}-\d{2}-\d{2}" + _NOT_TIMESTAMP + r"[\'\"]?", "current_date: [DATE]"),
+
+        # UUIDs
+        ("uuid", r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", "[UUID]"),
+
+        # Conversation history markers
+        ("ai", r"AI: .*?(?=\nHuman:|$)", "AI: [AI_RESPONSE]"),
+        ("human", r"Human: .*?(?=\nAI:|$)", "Human: [HUMAN_MESSAGE]"),
+
+        # Tool executions and scratchpad
+        ("action", r"Action: .*?(?=\nObservation:|$)", "Action: [ACTION]"),
+        ("observation", r"Observation: .*?(?=\nAction:|Thought:|$)", "Observation: [OBSERVATION]"),
+        ("scratchpad", r"(?P<scratchpad_prefix>agent_scratchpad\s*[:=]\s*[\"\']{0,1})[^\"\'\n]+?", "\\g<scratchpad_prefix>[SCRATCHPAD]"),
+    ]
+
+    # Cheap lookahead on how any rule can start, so most positions are rejected without trying
+    # every alternative. Keep in sync with RULES.
+    RULE_START = r"(?=[-CRHAO\d]|agent_scratchpad|current[ _]date|\b[a-f][0-9a-f]{7}-)"
+
+    def __init__(self, memo_size: int = 128):
+        """
+        Args:
+            memo_size: Number of normalized prompts remembered (by hash) to skip repeated scans.
+        """
+        self.pattern = re.compile(
+            self.RULE_START + "(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in self.RULES) + ")",
+            re.DOTALL | re.MULTILINE,
+        )
+        self.replacements = {name: replacement for name, _, replacement in self.RULES}
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[bytes, str]" = OrderedDict()
+        self.stats = NormalizerStats()
+
+    def _replace(self, match: "re.Match") -> str:
+        return match.expand(self.replacements[match.lastgroup])
 
     def normalize_prompt(self, prompt: str) -> str:
         """
@@ -85,29 +217,467 @@ class ContentNormalizer:
         """
         if not prompt:
             return prompt
-            
-        # Apply section removals first (these are larger chunks)
-        result = prompt
-        for pattern, replacement in self.compiled_sections:
-            result = pattern.sub(replacement, result)
-            
-        # Then apply pattern replacements
-        for pattern, replacement in self.compiled_patterns:
-            result = pattern.sub(replacement, result)
-            
+
+        key = hashlib.sha256(prompt.encode("utf-8", errors="surrogatepass")).digest()
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            self.stats.memo_hits += 1
+            return cached
+
+        start = time.perf_counter()
+        result = self.pattern.sub(self._replace, prompt)
+        elapsed = time.perf_counter() - start
+
+        self.stats.calls += 1
+        self.stats.chars += len(prompt)
+        self.stats.seconds += elapsed
+        self.stats.max_seconds = max(self.stats.max_seconds, elapsed)
+
+        self._memo[key] = result
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
         return result
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Normalization counters: scans, memo hits, characters scanned and time spent."""
+        return asdict(self.stats)
+
 
-class NormalizingCache(SQLiteCache):
-    """Cache implementation that normalizes prompts for better cache hit rates."""
-    
-    def __init__(self, database_path: str = ".langchain.db"):
-        # Removed cache_schema from super init call due to TypeError
-        super().__init__(database_path=database_path) 
+def _compress(data: bytes) -> Tuple[bytes, str]:
+    """Compress a payload with the configured codec. Returns (blob, codec name)."""
+    if CACHE_COMPRESSION == "zstd" and ZSTD_AVAILABLE:
+        return _zstd_compressor.compress(data), "zstd"
+    if CACHE_COMPRESSION in ("zstd", "zlib"):
+        return zlib.compress(data, 6), "zlib"
+    return data, "none"
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _zstd_decompressor.decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    return blob
+
+
+def _count_tokens(text: str) -> int:
+    """Count tokens with tiktoken (cl100k_base), or estimate them from the length if it is unavailable."""
+    global _token_encoding
+    if not text:
+        return 0
+    if _token_encoding is None:
+        try:
+            import tiktoken
+            _token_encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"[CACHE] tiktoken unavailable, estimating token counts from length: {e}")
+            _token_encoding = False
+    if _token_encoding is False:
+        return len(text) // 4
+    return len(_token_encoding.encode(text, disallowed_special=()))
+
+
+def _usage_tokens(generations: List[Generation]) -> Tuple[int, int]:
+    """(input, output) tokens reported by the provider in the generations, (0, 0) if none are."""
+    input_tokens = output_tokens = 0
+    for gen in generations:
+        usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+        if not usage and gen.generation_info:
+            usage = gen.generation_info.get("usage_metadata") or gen.generation_info.get("token_usage")
+        if not usage:
+            continue
+        input_tokens += usage.get("input_tokens") or usage.get("prompt_tokens") or 0
+        output_tokens += usage.get("output_tokens") or usage.get("completion_tokens") or 0
+    return input_tokens, output_tokens
+
+
+class MemoryCacheTier:
+    """Bounded in-process LRU of cached generations, sized by their serialized length.
+
+    Sits in front of the SQLite tier: entries are added on every update (write-through) and
+    on every SQLite hit, and the least recently used ones are dropped once max_bytes is
+    exceeded. Each entry remembers the SQLite entry id it mirrors (None while the write is
+    still pending), so the cache can validate it and drop it when SQLite deletes the row.
+    Stored generations are private copies; callers copy them again before handing them out.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evicted = 0
+        # cache key -> [generations, size, entry_id, (input_tokens, output_tokens)]
+        self._entries: "OrderedDict[bytes, list]" = OrderedDict()
+        self._keys_by_entry: Dict[int, set] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[Tuple[List[Generation], Optional[int], Tuple[int, int]]]:
+        """Return (generations, entry_id, tokens) for a key without copying, or None."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[0], item[2], item[3]
+
+    def put(
+        self,
+        key: bytes,
+        generations: List[Generation],
+        size: int,
+        entry_id: Optional[int] = None,
+        tokens: Tuple[int, int] = (0, 0),
+    ) -> None:
+        if size > self.max_bytes:
+            return
+        copies = [gen.model_copy(deep=True) for gen in generations]
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = [copies, size, entry_id, tokens]
+            if entry_id is not None:
+                self._keys_by_entry.setdefault(entry_id, set()).add(key)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evicted += 1
+
+    def set_entry_id(self, keys: List[bytes], entry_id: int) -> None:
+        """Record the SQLite id of entries written after being added here."""
+        with self._lock:
+            for key in keys:
+                item = self._entries.get(key)
+                if item is not None and item[2] is None:
+                    item[2] = entry_id
+                    self._keys_by_entry.setdefault(entry_id, set()).add(key)
+
+    def discard(self, keys: List[bytes]) -> None:
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def discard_entries(self, entry_ids: List[int]) -> None:
+        """Drop everything mirroring the given SQLite entries."""
+        with self._lock:
+            for entry_id in entry_ids:
+                for key in list(self._keys_by_entry.get(entry_id, ())):
+                    self._remove(key)
+
+    def _remove(self, key: bytes) -> None:
+        """Drop a key. Caller holds the lock."""
+        _, size, entry_id, _ = self._entries.pop(key)
+        self.size_bytes -= size
+        if entry_id is not None:
+            keys = self._keys_by_entry.get(entry_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_entry[entry_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_entry.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class PendingWrite:
+    """A cache entry accepted by update() but not yet written to the database."""
+    keys: List[Tuple[bytes, str]]
+    llm_string: str
+    generations: List[Generation]
+    payload: bytes
+    codec: str
+    prompt_blob: Optional[bytes]
+    created_at: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tag: Optional[str] = None
+    hit_count: int = 0
+
+
+class NormalizingCache(BaseCache):
+    """Cache implementation that normalizes prompts for better cache hit rates.
+
+    Prompts are never used as keys: each key is a SHA-256 digest of (prompt, llm_string), once
+    for the raw prompt and once for its normalized form. Both keys point to a single entry whose
+    generations are stored compressed (zstd if available, else zlib), so lookups compare 32-byte
+    digests in one indexed query and the database no longer grows with prompt size. The prompt
+    text itself is only kept (compressed) when CACHE_STORE_PROMPTS is enabled, for debugging.
+
+    Recently used entries are also kept in a bounded in-process LRU (MemoryCacheTier), filled
+    on update (write-through) and on SQLite hits, so repeated lookups within a run skip the
+    database. Hits are counted per tier.
+
+    The SQLite connection is opened once, in WAL mode. alookup/aupdate run on a dedicated I/O
+    thread, so async LLM calls never block the event loop. New entries are buffered (and served
+    from the buffer) and written in one transaction per CACHE_WRITE_BATCH_SIZE entries or every
+    CACHE_FLUSH_INTERVAL seconds, so updates do not each wait for a disk sync. A crash loses at
+    most the entries of the last interval, which are simply recomputed.
+
+    Entries expire after a per-model TTL and the cache is capped in bytes and entries, evicting
+    the least recently hit entries first. Expired entries are never returned; deleting them,
+    enforcing the caps and reclaiming freed pages (incremental vacuum) is done by run_maintenance,
+    which a background thread calls every CACHE_MAINTENANCE_INTERVAL seconds so lookups and
+    updates never pay for it. Hit timestamps are buffered in memory and written by maintenance.
+
+    Instrumentation is built in: hits (per tier), misses, writes, saved tokens and a lookup
+    latency histogram are kept per (model, role), and every lookup and write is passed to the
+    listeners registered with add_listener (e.g. token cost tracking). Token counts are taken
+    from the provider's usage metadata when the entry is written (tiktoken only if it reports
+    none) and stored with the entry, so hits report the tokens they saved without re-counting.
+    """
+
+    # Normalization must change the prompt by at least this many characters to add a second key
+    MIN_NORMALIZATION_DELTA = 20
+    SCHEMA_VERSION = 5
+    BUNDLE_FORMAT = 1
+    # Rows deleted / pages vacuumed per transaction, so maintenance only holds the lock briefly
+    MAINTENANCE_BATCH = 500
+    VACUUM_PAGES_PER_STEP = 1000
+
+    def __init__(
+        self,
+        database_path: str = ".langchain.db",
+        store_prompts: bool = CACHE_STORE_PROMPTS,
+        max_mb: float = CACHE_MAX_MB,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl_hours: Optional[Dict[str, float]] = None,
+        maintenance_interval: float = CACHE_MAINTENANCE_INTERVAL,
+        write_batch_size: int = CACHE_WRITE_BATCH_SIZE,
+        flush_interval: float = CACHE_FLUSH_INTERVAL,
+        memory_max_mb: float = CACHE_MEMORY_MAX_MB,
+        roles: Optional[Dict[str, str]] = None,
+        tag: Optional[str] = CACHE_TAG,
+    ):
+        """
+        Args:
+            database_path: Path of the SQLite database file.
+            store_prompts: Keep the compressed prompt text next to each entry (debugging aid).
+            max_mb: Size cap for cached entries (0 = no cap).
+            max_entries: Entry cap (0 = no cap).
+            ttl_hours: Freshness per model in hours, keyed by a substring of the model name,
+                with a "default" entry for other models (0 = never expires).
+            maintenance_interval: Seconds between background maintenance runs (0 = only on demand).
+            write_batch_size: Write pending entries once this many have accumulated.
+            flush_interval: Seconds after which pending entries are written anyway (0 = write on update).
+            memory_max_mb: Size of the in-process LRU tier in front of SQLite (0 = disabled).
+            roles: Role reported in metrics per model name (defaults to the configured primary,
+                next-step and summarizer models).
+            tag: Label stored with new entries (e.g. a topic family), used to filter bundle exports.
+        """
+        self.database_path = database_path
+        self.store_prompts = store_prompts
+        self.tag = tag
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb and max_mb > 0 else None
+        self.max_entries = max_entries if max_entries and max_entries > 0 else None
+        self.ttl_hours = dict(ttl_hours if ttl_hours is not None else CACHE_TTL_HOURS)
         self.normalizer = ContentNormalizer()
+        self.memory = MemoryCacheTier(int(memory_max_mb * 1024 * 1024)) if memory_max_mb and memory_max_mb > 0 else None
         self.stats = CacheStats()
-        self._original_lookup = super().lookup
-        self._original_update = super().update
+        self._lock = threading.Lock()
+        self.flush_interval = flush_interval if flush_interval and flush_interval > 0 else 0
+        self.write_batch_size = max(1, write_batch_size) if self.flush_interval else 1
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._ttl_memo: Dict[str, Optional[float]] = {}
+        # entry id -> (last hit time, hits since the last flush)
+        self._pending_hits: Dict[int, Tuple[float, int]] = {}
+        self._pending_writes: List[PendingWrite] = []
+        self._pending_keys: Dict[bytes, PendingWrite] = {}
+        if roles is None:
+            roles = {SUMMARIZER_MODEL: "summarizer", NEXT_STEP_MODEL: "next_step", PRIMARY_MODEL_NAME: "primary"}
+        self.roles = {model: role for model, role in roles.items() if model}
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._metrics: Dict[Tuple[str, str], ModelCacheMetrics] = {}
+        self._metrics_lock = threading.Lock()
+        self._listeners: List[Callable[[CacheEvent], None]] = []
+        with self._lock:
+            self._migrate()
+            # WAL lets readers proceed during writes; NORMAL sync is safe with WAL (a crash only loses recent commits)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        # All async lookups/updates share one thread and the persistent connection
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache-io")
+        self._stop_background = threading.Event()
+        self._background_thread = None
+        if self.flush_interval or (maintenance_interval and maintenance_interval > 0):
+            self._background_thread = threading.Thread(
+                target=self._background_loop,
+                args=(maintenance_interval,),
+                name="llm-cache-background",
+                daemon=True,
+            )
+            self._background_thread.start()
+
+    def _migrate(self) -> None:
+        """Create the schema, dropping tables of older layouts (it is a cache, entries can be recomputed).
+
+        Version 2 to 4 databases keep their entries and only gain the newer columns (entries
+        written before version 4 report no saved tokens).
+        """
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            existing = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table in ("full_llm_cache", "llm_cache_index", "llm_cache_entries"):
+                if table in existing:
+                    logger.info(f"[CACHE] Dropping table '{table}' from an older cache layout in {self.database_path}")
+                    self._conn.execute(f"DROP TABLE {table}")
+        elif version == 2:
+            self._conn.executescript(
+                """
+                ALTER TABLE llm_cache_entries ADD COLUMN size_bytes INTEGER NOT NULL DEFAULT 0;
+                ALTER TABLE llm_cache_entries ADD COLUMN last_hit REAL NOT NULL DEFAULT 0;
+                ALTER TABLE llm_cache_entries ADD COLUMN expires_at REAL;
+                UPDATE llm_cache_entries
+                SET size_bytes = LENGTH(payload) + COALESCE(LENGTH(prompt), 0) + LENGTH(llm_string),
+                    last_hit = created_at;
+                """
+            )
+        if 2 <= version < 4:
+            self._conn.executescript(
+                """
+                ALTER TABLE llm_cache_entries ADD COLUMN input_tokens INTEGER NOT NULL DEFAULT 0;
+                ALTER TABLE llm_cache_entries ADD COLUMN output_tokens INTEGER NOT NULL DEFAULT 0;
+                """
+            )
+        if 2 <= version < 5:
+            self._conn.executescript(
+                """
+                ALTER TABLE llm_cache_entries ADD COLUMN tag TEXT;
+                ALTER TABLE llm_cache_entries ADD COLUMN hit_count INTEGER NOT NULL DEFAULT 0;
+                """
+            )
+        # Freed pages can only be reclaimed incrementally if the database was created (or vacuumed) in that mode
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                llm_string TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                codec TEXT NOT NULL,
+                prompt BLOB,
+                created_at REAL NOT NULL,
+                size_bytes INTEGER NOT NULL DEFAULT 0,
+                last_hit REAL NOT NULL DEFAULT 0,
+                expires_at REAL,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                tag TEXT,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS llm_cache_keys (
+                cache_key BLOB PRIMARY KEY,
+                kind TEXT NOT NULL,
+                entry_id INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_keys_entry ON llm_cache_keys (entry_id);
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_entries_last_hit ON llm_cache_entries (last_hit);
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_entries_expires ON llm_cache_entries (expires_at) WHERE expires_at IS NOT NULL;
+            """
+        )
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._conn.commit()
+        if version < self.SCHEMA_VERSION and self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # One-off full VACUUM at upgrade time switches an existing database to incremental mode
+            logger.info(f"[CACHE] Converting {self.database_path} to incremental vacuum")
+            self._conn.execute("VACUUM")
+
+    def _ttl_seconds(self, llm_string: str) -> Optional[float]:
+        """Resolve the TTL for a model. The longest key contained in llm_string wins, else "default"."""
+        if llm_string in self._ttl_memo:
+            return self._ttl_memo[llm_string]
+        lowered = llm_string.lower()
+        matches = [key for key in self.ttl_hours if key != "default" and key.lower() in lowered]
+        hours = self.ttl_hours[max(matches, key=len)] if matches else self.ttl_hours.get("default", 0)
+        # None or a non-positive value means "never expires"
+        ttl = hours * 3600 if hours and hours > 0 else None
+        if len(self._ttl_memo) < 1024:
+            self._ttl_memo[llm_string] = ttl
+        return ttl
+
+    _MODEL_RE = re.compile(r"[\"']model(?:_name|_path)?[\"']\s*[:,]\s*[\"']([^\"']+)[\"']")
+
+    def _describe(self, llm_string: str) -> Tuple[str, str]:
+        """Resolve (model, role) for an llm_string, memoized since llm_strings repeat on every call."""
+        description = self._descriptions.get(llm_string)
+        if description is not None:
+            return description
+        match = self._MODEL_RE.search(llm_string)
+        model = match.group(1).rsplit("/", 1)[-1] if match else "unknown"
+        role = self.roles.get(model)
+        if role is None:
+            # Configured names may omit a version suffix or "models/" prefix
+            matches = [name for name in self.roles if name in model or model in name]
+            role = self.roles[max(matches, key=len)] if matches else "unknown"
+        description = (model, role)
+        if len(self._descriptions) < 1024:
+            self._descriptions[llm_string] = description
+        return description
+
+    def add_listener(self, listener: Callable[[CacheEvent], None]) -> None:
+        """Call listener with a CacheEvent after every lookup and write.
+
+        Listeners run on the calling thread (the cache I/O thread for async calls), so they
+        should be quick; exceptions are logged and ignored.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[CacheEvent], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _record(self, event: CacheEvent) -> None:
+        """Update the per-model metrics and notify listeners."""
+        with self._metrics_lock:
+            metrics = self._metrics.get((event.model, event.role))
+            if metrics is None:
+                metrics = self._metrics[(event.model, event.role)] = ModelCacheMetrics()
+            if event.kind == "write":
+                metrics.writes += 1
+            else:
+                metrics.lookup_latency.observe(event.latency_ms)
+                if event.kind == "hit":
+                    metrics.hits += 1
+                    if event.tier == "memory":
+                        metrics.memory_hits += 1
+                    else:
+                        metrics.disk_hits += 1
+                    metrics.saved_input_tokens += event.input_tokens
+                    metrics.saved_output_tokens += event.output_tokens
+                else:
+                    metrics.misses += 1
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning(f"[CACHE] Listener {listener!r} failed: {e}")
+
+    def get_metrics(self) -> List[Dict[str, Any]]:
+        """Counters and lookup latency histogram per (model, role), for export."""
+        with self._metrics_lock:
+            return [
+                {
+                    "model": model,
+                    "role": role,
+                    **{name: value for name, value in asdict(metrics).items() if name != "lookup_latency"},
+                    "lookup_latency": metrics.lookup_latency.to_dict(),
+                }
+                for (model, role), metrics in self._metrics.items()
+            ]
+
+    @staticmethod
+    def _cache_key(prompt: str, llm_string: str) -> bytes:
+        """SHA-256 digest of (prompt, llm_string)."""
+        digest = hashlib.sha256(llm_string.encode("utf-8", errors="surrogatepass"))
+        digest.update(b"\x00")
+        digest.update(prompt.encode("utf-8", errors="surrogatepass"))
+        return digest.digest()
 
     def should_normalize(self, prompt: str) -> bool:
         """Determine if this prompt should be normalized."""
@@ -122,14 +692,57 @@ class NormalizingCache(SQLiteCache):
         ]
         return any(indicator in prompt.lower() for indicator in agent_indicators)
     
-    def _prompt_hash_and_preview(self, prompt: str) -> str:
-        h = hashlib.sha256(prompt.encode()).hexdigest()[:8]
-        preview = prompt[:80].replace('\n', ' ')
-        return f"hash={h}, preview=\"{preview}\""
+    @staticmethod
+    def _log_id(key: bytes, prompt: str) -> str:
+        """Short log identifier from the already computed cache key (the prompt preview only at DEBUG level)."""
+        if logger.isEnabledFor(logging.DEBUG):
+            preview = prompt[:80].replace('\n', ' ')
+            return f"key={key.hex()[:8]}, preview=\"{preview}\""
+        return f"key={key.hex()[:8]}"
+
+    def _normalized_key(self, prompt: str) -> Optional[str]:
+        """Return the normalized prompt if it differs enough from the raw one to be worth a second key."""
+        if not self.should_normalize(prompt):
+            return None
+        try:
+            normalized_prompt = self.normalizer.normalize_prompt(prompt)
+        except Exception as e:
+            logger.warning(f"[CACHE] Error during prompt normalization: {e}")
+            return None
+        self.stats.normalizations += 1
+        if abs(len(normalized_prompt) - len(prompt)) < self.MIN_NORMALIZATION_DELTA:
+            self.stats.skipped += 1
+            return None
+        return normalized_prompt
+
+    def _note_hit(self, entry_id: int, now: float) -> None:
+        """Buffer a hit for LRU eviction and warm-up ranking. Caller holds the lock."""
+        _, count = self._pending_hits.get(entry_id, (0.0, 0))
+        self._pending_hits[entry_id] = (now, count + 1)
+
+    def _memory_entry_is_live(self, key: bytes, entry_id: int) -> bool:
+        """Check a memory-tier entry against its SQLite row and record the hit for LRU eviction.
+
+        A primary-key probe is much cheaper than the key lookup, decompression and
+        deserialization it replaces, and keeps expiry and deletions authoritative in SQLite.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM llm_cache_entries WHERE id = ?", (entry_id,)).fetchone()
+            live = row is not None and (row[0] is None or row[0] > now)
+            if live:
+                self._note_hit(entry_id, now)
+        if not live:
+            self.memory.discard([key])
+        return live
 
     def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
         """
         Look up an LLM prompt in the cache with normalization.
+
+        The in-memory tier is checked first (raw key, then normalized key). Otherwise the raw and
+        the normalized prompt digest are checked in a single SQLite query; a raw match wins.
+        The outcome, its latency and the tokens a hit saved are recorded per model and role.
         
         Args:
             prompt: The prompt to look up
@@ -138,6 +751,22 @@ class NormalizingCache(SQLiteCache):
         Returns:
             A list of generations if found, None otherwise
         """
+        start = time.perf_counter()
+        generations, tier, tokens = self._lookup(prompt, llm_string)
+        model, role = self._describe(llm_string)
+        self._record(CacheEvent(
+            kind="hit" if generations is not None else "miss",
+            model=model,
+            role=role,
+            tier=tier,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            input_tokens=tokens[0],
+            output_tokens=tokens[1],
+        ))
+        return generations
+
+    def _lookup(self, prompt: str, llm_string: str) -> Tuple[Optional[List[Generation]], Optional[str], Tuple[int, int]]:
+        """Look up a prompt. Returns (generations or None, tier of the hit, stored (input, output) tokens)."""
         # Extract metadata from llm_string if it's JSON-encoded
         metadata = {}
         try:
@@ -152,59 +781,551 @@ class NormalizingCache(SQLiteCache):
         if metadata.get("no_cache") is True:
             logger.info(f"[CACHE] BYPASS requested via metadata.no_cache flag")
             self.stats.misses += 1
-            return None
+            return None, None, (0, 0)
             
-        log_id = self._prompt_hash_and_preview(prompt)
-        logger.info(f"[CACHE] Lookup: model={llm_string}, {log_id}")
-        original_result = self._original_lookup(prompt, llm_string)
-        if original_result is not None:
+        raw_key = self._cache_key(prompt, llm_string)
+        log_id = self._log_id(raw_key, prompt)
+        logger.debug(f"[CACHE] Lookup: model={llm_string}, {log_id}")
+        normalized_prompt = self._normalized_key(prompt)
+        normalized_key = self._cache_key(normalized_prompt, llm_string) if normalized_prompt is not None else raw_key
+        if self.memory is not None:
+            for key, source in ((raw_key, "original"), (normalized_key, "normalized")):
+                cached = self.memory.get(key)
+                if cached is None:
+                    continue
+                generations, entry_id, tokens = cached
+                if entry_id is not None and not self._memory_entry_is_live(key, entry_id):
+                    continue
+                self.stats.hits += 1
+                self.stats.memory_hits += 1
+                logger.info(f"[CACHE] HIT: model={llm_string}, {log_id} ({source}, memory)")
+                return [gen.model_copy(deep=True) for gen in generations], "memory", tokens
+        pending = None
+        try:
+            with self._lock:
+                now = time.time()
+                pending = self._pending_keys.get(raw_key)
+                row = None if pending is not None else self._conn.execute(
+                    """
+                    SELECT k.cache_key, e.payload, e.codec, e.id, e.input_tokens, e.output_tokens FROM llm_cache_keys k
+                    JOIN llm_cache_entries e ON e.id = k.entry_id
+                    WHERE k.cache_key IN (?, ?) AND (e.expires_at IS NULL OR e.expires_at > ?)
+                    ORDER BY k.cache_key = ? DESC
+                    LIMIT 1
+                    """,
+                    (raw_key, normalized_key, now, raw_key),
+                ).fetchone()
+                if row is not None:
+                    # Written by run_maintenance, so a hit costs no write transaction
+                    self._note_hit(row[3], now)
+                if pending is None and (row is None or row[0] != raw_key):
+                    pending = self._pending_keys.get(normalized_key)
+                    if pending is not None:
+                        row = None
+        except Exception as e:
+            logger.warning(f"[CACHE] Lookup failed: {e}")
+            row = None
+        if pending is not None:
             self.stats.hits += 1
-            logger.info(f"[CACHE] HIT: model={llm_string}, {log_id} (original)")
-            return original_result
-        if self.should_normalize(prompt):
+            self.stats.disk_hits += 1
+            source = "original" if any(key == raw_key for key, _ in pending.keys) else "normalized"
+            logger.info(f"[CACHE] HIT: model={llm_string}, {log_id} ({source}, pending write)")
+            tokens = (pending.input_tokens, pending.output_tokens)
+            return [gen.model_copy(deep=True) for gen in pending.generations], "pending", tokens
+        if row is not None:
             try:
-                normalized_prompt = self.normalizer.normalize_prompt(prompt)
-                self.stats.normalizations += 1
-                logger.info(f"[CACHE] NORMALIZATION attempted: {log_id}, original_len={len(prompt)}, normalized_len={len(normalized_prompt)}")
-                if abs(len(normalized_prompt) - len(prompt)) < 20:
-                    self.stats.skipped += 1
-                    self.stats.misses += 1
-                    logger.info(f"[CACHE] NORMALIZATION skipped: {log_id}, not enough change")
-                    return None
-                normalized_log_id = self._prompt_hash_and_preview(normalized_prompt)
-                normalized_result = self._original_lookup(normalized_prompt, llm_string)
-                if normalized_result is not None:
-                    self.stats.hits += 1
-                    logger.info(f"[CACHE] HIT: model={llm_string}, {normalized_log_id} (normalized)")
-                    return normalized_result
+                serialized = _decompress(row[1], row[2])
+                generations = [loads(item) for item in json.loads(serialized)]
             except Exception as e:
-                logger.warning(f"[CACHE] Error during prompt normalization: {e}")
+                logger.warning(f"[CACHE] Could not deserialize cached generations: {e}")
+                generations = None
+            if generations:
+                tokens = (row[4], row[5])
+                if self.memory is not None:
+                    self.memory.put(row[0], generations, len(serialized), entry_id=row[3], tokens=tokens)
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                source = "original" if row[0] == raw_key else "normalized"
+                logger.info(f"[CACHE] HIT: model={llm_string}, {log_id} ({source})")
+                return generations, "disk", tokens
         self.stats.misses += 1
         logger.info(f"[CACHE] MISS: model={llm_string}, {log_id}")
-        return None
+        return None, None, (0, 0)
         
     def update(self, prompt: str, llm_string: str, return_val: List[Generation]) -> None:
         """
         Update the cache with a new prompt and result.
-        Store both the original and normalized versions to maximize future hits.
+        The generations are stored once (compressed) and keyed by both the raw and the normalized prompt digest,
+        together with the tokens the call used (so later hits can report them as saved).
+        The entry is served from memory until the next batched write.
         
         Args:
             prompt: The prompt to store
             llm_string: The LLM identifier
             return_val: The generations to store
         """
-        log_id = self._prompt_hash_and_preview(prompt)
-        logger.info(f"[CACHE] UPDATE: model={llm_string}, {log_id}")
-        self._original_update(prompt, llm_string, return_val)
-        if self.should_normalize(prompt):
+        raw_key = self._cache_key(prompt, llm_string)
+        logger.info(f"[CACHE] UPDATE: model={llm_string}, {self._log_id(raw_key, prompt)}")
+        keys = [(raw_key, "raw")]
+        normalized_prompt = self._normalized_key(prompt)
+        if normalized_prompt is not None:
+            keys.append((self._cache_key(normalized_prompt, llm_string), "normalized"))
+        try:
+            serialized = json.dumps([dumps(gen) for gen in return_val]).encode("utf-8")
+            payload, codec = _compress(serialized)
+            input_tokens, output_tokens = _usage_tokens(return_val)
+            if not input_tokens:
+                input_tokens = _count_tokens(prompt)
+            if not output_tokens:
+                output_tokens = sum(_count_tokens(gen.text) for gen in return_val)
+            if self.memory is not None:
+                # The entry id is filled in once the batched write lands
+                for key, _ in keys:
+                    self.memory.put(key, return_val, len(serialized), tokens=(input_tokens, output_tokens))
+            prompt_blob = _compress(prompt.encode("utf-8", errors="surrogatepass"))[0] if self.store_prompts else None
+            record = PendingWrite(
+                keys, llm_string, list(return_val), payload, codec, prompt_blob, time.time(), input_tokens, output_tokens, self.tag
+            )
+            with self._lock:
+                self._pending_writes.append(record)
+                for key, _ in keys:
+                    self._pending_keys[key] = record
+                if len(self._pending_writes) >= self.write_batch_size:
+                    self._flush_writes()
+            if normalized_prompt is not None:
+                logger.debug(f"[CACHE] UPDATE: model={llm_string}, {self._log_id(keys[1][0], normalized_prompt)} (normalized key)")
+            model, role = self._describe(llm_string)
+            self._record(CacheEvent("write", model, role, input_tokens=input_tokens, output_tokens=output_tokens))
+        except Exception as e:
+            logger.warning(f"[CACHE] Error updating cache: {e}")
+
+    def _write_entry(self, record: PendingWrite) -> int:
+        """Insert one entry and point its keys at it. Caller holds the lock and commits.
+
+        Returns:
+            The id of the new entry.
+        """
+        keys = [key for key, _ in record.keys]
+        previous = [
+            r[0] for r in self._conn.execute(
+                f"SELECT entry_id FROM llm_cache_keys WHERE cache_key IN ({','.join('?' * len(keys))})",
+                keys,
+            ).fetchall()
+        ]
+        ttl = self._ttl_seconds(record.llm_string)
+        cursor = self._conn.execute(
+            """
+            INSERT INTO llm_cache_entries (
+                llm_string, payload, codec, prompt, created_at, size_bytes, last_hit, expires_at,
+                input_tokens, output_tokens, tag, hit_count
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                record.llm_string, record.payload, record.codec, record.prompt_blob, record.created_at,
+                len(record.payload) + len(record.prompt_blob or b"") + len(record.llm_string),
+                record.created_at, record.created_at + ttl if ttl is not None else None,
+                record.input_tokens, record.output_tokens, record.tag, record.hit_count,
+            ),
+        )
+        entry_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO llm_cache_keys (cache_key, kind, entry_id) VALUES (?, ?, ?)",
+            [(key, kind, entry_id) for key, kind in record.keys],
+        )
+        # Drop entries that no key points to any more
+        for old_id in set(previous):
+            self._conn.execute(
+                "DELETE FROM llm_cache_entries WHERE id = ? AND NOT EXISTS (SELECT 1 FROM llm_cache_keys WHERE entry_id = ?)",
+                (old_id, old_id),
+            )
+        return entry_id
+
+    def _flush_writes(self) -> None:
+        """Write all pending entries in a single transaction. Caller holds the lock."""
+        if not self._pending_writes:
+            return
+        records, self._pending_writes = self._pending_writes, []
+        try:
+            entry_ids = [self._write_entry(record) for record in records]
+            self._conn.commit()
+            self.stats.flushes += 1
+            self.stats.flushed_entries += len(records)
+            if self.memory is not None:
+                for record, entry_id in zip(records, entry_ids):
+                    self.memory.set_entry_id([key for key, _ in record.keys], entry_id)
+        except Exception as e:
+            self._conn.rollback()
+            logger.warning(f"[CACHE] Could not write {len(records)} pending entries: {e}")
+            if self.memory is not None:
+                # Do not keep serving entries that never reached the database
+                self.memory.discard([key for record in records for key, _ in record.keys])
+        finally:
+            self._pending_keys.clear()
+
+    def flush(self) -> None:
+        """Write pending entries now (also done every flush_interval seconds and on close)."""
+        with self._lock:
+            self._flush_writes()
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        """Async lookup, run on the cache's I/O thread so the event loop is never blocked."""
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, self.lookup, prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: List[Generation]) -> None:
+        """Async update, run on the cache's I/O thread."""
+        await asyncio.get_running_loop().run_in_executor(self._io_executor, self.update, prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        """Async clear, run on the cache's I/O thread."""
+        await asyncio.get_running_loop().run_in_executor(self._io_executor, lambda: self.clear(**kwargs))
+
+    def clear(self, **kwargs: Any) -> None:
+        """Clear cache."""
+        if self.memory is not None:
+            self.memory.clear()
+        with self._lock:
+            self._pending_writes = []
+            self._pending_keys.clear()
+            self._conn.execute("DELETE FROM llm_cache_keys")
+            self._conn.execute("DELETE FROM llm_cache_entries")
+            self._conn.commit()
+            self._pending_hits.clear()
+
+    def _delete_entries(self, entry_ids: List[int]) -> None:
+        """Delete entries and the keys pointing to them. Caller holds the lock."""
+        params = [(entry_id,) for entry_id in entry_ids]
+        self._conn.executemany("DELETE FROM llm_cache_keys WHERE entry_id = ?", params)
+        self._conn.executemany("DELETE FROM llm_cache_entries WHERE id = ?", params)
+        self._conn.commit()
+        for entry_id in entry_ids:
+            self._pending_hits.pop(entry_id, None)
+        if self.memory is not None:
+            self.memory.discard_entries(entry_ids)
+
+    def _flush_hits(self) -> None:
+        """Write buffered hit timestamps. Caller holds the lock."""
+        if not self._pending_hits:
+            return
+        self._conn.executemany(
+            "UPDATE llm_cache_entries SET last_hit = ?, hit_count = hit_count + ? WHERE id = ?",
+            [(hit, count, entry_id) for entry_id, (hit, count) in self._pending_hits.items()],
+        )
+        self._conn.commit()
+        self._pending_hits.clear()
+
+    def _evict_expired(self) -> int:
+        """Delete expired entries in batches."""
+        removed = 0
+        while True:
+            with self._lock:
+                ids = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM llm_cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ? LIMIT ?",
+                    (time.time(), self.MAINTENANCE_BATCH),
+                )]
+                if not ids:
+                    return removed
+                self._delete_entries(ids)
+            removed += len(ids)
+
+    def _evict_over_caps(self) -> int:
+        """Evict least recently hit entries until the cache is within 90% of its caps."""
+        if self.max_bytes is None and self.max_entries is None:
+            return 0
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache_entries"
+            ).fetchone()
+        over_entries = self.max_entries is not None and entries > self.max_entries
+        over_bytes = self.max_bytes is not None and total > self.max_bytes
+        if not (over_entries or over_bytes):
+            return 0
+        # Evict down to 90% of the caps so we do not evict on every run
+        target_entries = int(self.max_entries * 0.9) if self.max_entries is not None else entries
+        target_bytes = int(self.max_bytes * 0.9) if self.max_bytes is not None else total
+        removed = 0
+        while entries > target_entries or total > target_bytes:
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT id, size_bytes FROM llm_cache_entries ORDER BY last_hit ASC LIMIT ?",
+                    (self.MAINTENANCE_BATCH,),
+                ).fetchall()
+                ids = []
+                for entry_id, size_bytes in batch:
+                    if entries <= target_entries and total <= target_bytes:
+                        break
+                    ids.append(entry_id)
+                    entries -= 1
+                    total -= size_bytes or 0
+                if not ids:
+                    break
+                self._delete_entries(ids)
+            removed += len(ids)
+        logger.info(f"[CACHE] Over its caps (max {self.max_entries} entries, {self.max_bytes} bytes). Evicted {removed} least recently hit entries.")
+        return removed
+
+    def _incremental_vacuum(self) -> int:
+        """Return free pages to the file system a few at a time. Returns the number of pages freed."""
+        freed = 0
+        while True:
+            with self._lock:
+                if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    return freed
+                free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if free_pages == 0:
+                    return freed
+                step = min(free_pages, self.VACUUM_PAGES_PER_STEP)
+                self._conn.execute(f"PRAGMA incremental_vacuum({step})").fetchall()
+                self._conn.commit()
+            freed += step
+
+    def run_maintenance(self) -> Dict[str, int]:
+        """Persist hit timestamps, drop expired entries, enforce the caps and reclaim free pages.
+
+        Work is done in small batches, each holding the lock only briefly, so it can run next to
+        lookups. Called periodically by the background thread; safe to call directly.
+
+        Returns:
+            Dict with the number of expired and evicted entries and vacuumed pages.
+        """
+        start = time.perf_counter()
+        result = {"expired": 0, "evicted": 0, "vacuumed_pages": 0}
+        try:
+            with self._lock:
+                self._flush_writes()
+                self._flush_hits()
+            result["expired"] = self._evict_expired()
+            result["evicted"] = self._evict_over_caps()
+            result["vacuumed_pages"] = self._incremental_vacuum()
+        except Exception as e:
+            logger.warning(f"[CACHE] Maintenance failed: {e}")
+        self.stats.expired += result["expired"]
+        self.stats.evicted += result["evicted"]
+        self.stats.vacuumed_pages += result["vacuumed_pages"]
+        self.stats.maintenance_runs += 1
+        self.stats.maintenance_seconds += time.perf_counter() - start
+        if any(result.values()):
+            logger.info(f"[CACHE] Maintenance: {result} in {time.perf_counter() - start:.3f}s")
+        return result
+
+    def _background_loop(self, maintenance_interval: float) -> None:
+        """Flush pending writes every flush_interval seconds and run maintenance every maintenance_interval."""
+        maintenance_interval = maintenance_interval if maintenance_interval and maintenance_interval > 0 else None
+        tick = self.flush_interval or maintenance_interval
+        next_maintenance = time.monotonic() + maintenance_interval if maintenance_interval else None
+        while not self._stop_background.wait(tick):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"[CACHE] Background flush failed: {e}")
+            if next_maintenance is not None and time.monotonic() >= next_maintenance:
+                self.run_maintenance()
+                next_maintenance = time.monotonic() + maintenance_interval
+
+    def export_bundle(
+        self,
+        path: str,
+        model: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        tag: Optional[str] = None,
+    ) -> int:
+        """Copy unexpired entries (and their keys) into a bundle file for import on another node.
+
+        The bundle is a small SQLite database holding the compressed payloads as they are, so
+        exporting costs no decompression. Pending writes and hits are flushed first so the bundle
+        is complete and hit counts (used for warm-up on the importing node) are current.
+
+        Args:
+            path: Bundle file to create (an existing file is replaced).
+            model: Only entries whose llm_string contains this (e.g. "gemini-2.0-flash").
+            since: Only entries created at or after this Unix time.
+            until: Only entries created before this Unix time.
+            tag: Only entries written with this tag.
+
+        Returns:
+            Number of exported entries.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        conditions, params = ["(expires_at IS NULL OR expires_at > ?)"], [time.time()]
+        if model:
+            conditions.append("instr(llm_string, ?) > 0")
+            params.append(model)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until)
+        if tag is not None:
+            conditions.append("tag = ?")
+            params.append(tag)
+        with self._lock:
+            self._flush_writes()
+            self._flush_hits()
+            self._conn.execute("ATTACH DATABASE ? AS bundle", (path,))
+            try:
+                self._conn.executescript(
+                    """
+                    CREATE TABLE bundle.bundle_info (key TEXT PRIMARY KEY, value TEXT);
+                    CREATE TABLE bundle.entries (
+                        id INTEGER PRIMARY KEY, llm_string TEXT, payload BLOB, codec TEXT, prompt BLOB, created_at REAL,
+                        input_tokens INTEGER, output_tokens INTEGER, tag TEXT, hit_count INTEGER
+                    );
+                    CREATE TABLE bundle.keys (cache_key BLOB PRIMARY KEY, kind TEXT, entry_id INTEGER) WITHOUT ROWID;
+                    """
+                )
+                self._conn.execute(
+                    f"""
+                    INSERT INTO bundle.entries
+                    SELECT id, llm_string, payload, codec, prompt, created_at, input_tokens, output_tokens, tag, hit_count
+                    FROM llm_cache_entries WHERE {' AND '.join(conditions)}
+                    """,
+                    params,
+                )
+                self._conn.execute(
+                    "INSERT INTO bundle.keys SELECT k.cache_key, k.kind, k.entry_id FROM llm_cache_keys k JOIN bundle.entries e ON e.id = k.entry_id"
+                )
+                self._conn.executemany(
+                    "INSERT INTO bundle.bundle_info (key, value) VALUES (?, ?)",
+                    [("format", str(self.BUNDLE_FORMAT)), ("exported_at", str(time.time()))],
+                )
+                exported = self._conn.execute("SELECT COUNT(*) FROM bundle.entries").fetchone()[0]
+                self._conn.commit()
+            finally:
+                self._conn.execute("DETACH DATABASE bundle")
+        logger.info(f"[CACHE] Exported {exported} entries to {path}")
+        return exported
+
+    def import_bundle(self, path: str) -> Dict[str, int]:
+        """Merge a bundle written by export_bundle into this cache.
+
+        Entries whose raw prompt key is already cached here are skipped (local entries win), as
+        are entries that are expired under this node's TTLs (their original creation time is
+        kept) and entries compressed with a codec this node cannot read. Caps are enforced
+        afterwards.
+
+        Returns:
+            Dict with the number of imported entries and the skipped ones by reason.
+        """
+        result = {"imported": 0, "existing": 0, "expired": 0, "unsupported": 0}
+        bundle = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            bundle_format = bundle.execute("SELECT value FROM bundle_info WHERE key = 'format'").fetchone()
+            if bundle_format is None or int(bundle_format[0]) > self.BUNDLE_FORMAT:
+                raise ValueError(f"{path} is not a cache bundle this version can read")
+            keys_by_entry: Dict[int, List[Tuple[bytes, str]]] = {}
+            for cache_key, kind, entry_id in bundle.execute("SELECT cache_key, kind, entry_id FROM keys"):
+                keys_by_entry.setdefault(entry_id, []).append((cache_key, kind))
+            now = time.time()
+            records = []
+            for (entry_id, llm_string, payload, codec, prompt_blob, created_at,
+                 input_tokens, output_tokens, tag, hit_count) in bundle.execute("SELECT * FROM entries"):
+                keys = keys_by_entry.get(entry_id)
+                if not keys:
+                    continue
+                ttl = self._ttl_seconds(llm_string)
+                if ttl is not None and created_at + ttl <= now:
+                    result["expired"] += 1
+                    continue
+                if codec == "zstd" and not ZSTD_AVAILABLE:
+                    result["unsupported"] += 1
+                    continue
+                records.append(PendingWrite(
+                    keys, llm_string, [], payload, codec, prompt_blob, created_at, input_tokens, output_tokens, tag, hit_count
+                ))
+        finally:
+            bundle.close()
+
+        with self._lock:
+            self._flush_writes()
+            for start in range(0, len(records), self.MAINTENANCE_BATCH):
+                batch = records[start:start + self.MAINTENANCE_BATCH]
+                raw_keys = [next(key for key, kind in record.keys if kind == "raw") for record in batch]
+                existing = {
+                    row[0] for row in self._conn.execute(
+                        f"SELECT cache_key FROM llm_cache_keys WHERE cache_key IN ({','.join('?' * len(raw_keys))})",
+                        raw_keys,
+                    )
+                }
+                for record, raw_key in zip(batch, raw_keys):
+                    if raw_key in existing:
+                        result["existing"] += 1
+                        continue
+                    self._write_entry(record)
+                    result["imported"] += 1
+                    if self.memory is not None:
+                        # A normalized key may now point at the imported entry
+                        self.memory.discard([key for key, _ in record.keys])
+                self._conn.commit()
+        self.stats.evicted += self._evict_over_caps()
+        logger.info(f"[CACHE] Imported bundle {path}: {result}")
+        return result
+
+    def warm_up(self, max_entries: int = CACHE_WARMUP_ENTRIES) -> int:
+        """Preload the most frequently hit entries into the memory tier.
+
+        Entries are chosen by hit count (then recency) until max_entries or the tier's size is
+        reached, and inserted coldest first so the hottest entries are the last to be evicted.
+
+        Returns:
+            Number of entries loaded.
+        """
+        if self.memory is None or not max_entries or max_entries <= 0:
+            return 0
+        with self._lock:
+            self._flush_hits()
+            rows = self._conn.execute(
+                """
+                SELECT id, payload, codec, input_tokens, output_tokens FROM llm_cache_entries
+                WHERE expires_at IS NULL OR expires_at > ?
+                ORDER BY hit_count DESC, last_hit DESC
+                LIMIT ?
+                """,
+                (time.time(), max_entries),
+            ).fetchall()
+            keys_by_entry: Dict[int, List[bytes]] = {}
+            for start in range(0, len(rows), self.MAINTENANCE_BATCH):
+                ids = [row[0] for row in rows[start:start + self.MAINTENANCE_BATCH]]
+                for cache_key, entry_id in self._conn.execute(
+                    f"SELECT cache_key, entry_id FROM llm_cache_keys WHERE entry_id IN ({','.join('?' * len(ids))})",
+                    ids,
+                ):
+                    keys_by_entry.setdefault(entry_id, []).append(cache_key)
+        selected, budget = [], self.memory.max_bytes - self.memory.size_bytes
+        for entry_id, payload, codec, input_tokens, output_tokens in rows:
+            try:
+                serialized = _decompress(payload, codec)
+                generations = [loads(item) for item in json.loads(serialized)]
+            except Exception as e:
+                logger.warning(f"[CACHE] Skipping entry {entry_id} during warm-up: {e}")
+                continue
+            keys = keys_by_entry.get(entry_id, [])
+            cost = len(serialized) * len(keys)
+            if cost > budget:
+                break
+            budget -= cost
+            selected.append((entry_id, keys, generations, len(serialized), (input_tokens, output_tokens)))
+        for entry_id, keys, generations, size, tokens in reversed(selected):
+            for key in keys:
+                self.memory.put(key, generations, size, entry_id=entry_id, tokens=tokens)
+        logger.info(f"[CACHE] Warmed up the memory tier with {len(selected)} entries")
+        return len(selected)
+
+    def close(self) -> None:
+        """Stop the background and I/O threads, write pending entries and hits, and close the database."""
+        self._stop_background.set()
+        if self._background_thread is not None:
+            self._background_thread.join(timeout=5)
+        self._io_executor.shutdown(wait=True)
+        with self._lock:
             try:
-                normalized_prompt = self.normalizer.normalize_prompt(prompt)
-                if abs(len(normalized_prompt) - len(prompt)) >= 20:
-                    normalized_log_id = self._prompt_hash_and_preview(normalized_prompt)
-                    self._original_update(normalized_prompt, llm_string, return_val)
-                    logger.info(f"[CACHE] UPDATE: model={llm_string}, {normalized_log_id} (normalized)")
+                self._flush_writes()
+                self._flush_hits()
             except Exception as e:
-                logger.warning(f"[CACHE] Error updating cache with normalized prompt: {e}")
+                logger.warning(f"[CACHE] Could not persist pending writes: {e}")
+            self._conn.close()
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -212,21 +1333,56 @@ class NormalizingCache(SQLiteCache):
         if (self.stats.hits + self.stats.misses) > 0:
             hit_rate = self.stats.hits / (self.stats.hits + self.stats.misses)
             
+        normalizer_stats = self.normalizer.get_stats()
+        with self._metrics_lock:
+            saved_input = sum(metrics.saved_input_tokens for metrics in self._metrics.values())
+            saved_output = sum(metrics.saved_output_tokens for metrics in self._metrics.values())
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache_entries"
+            ).fetchone()
         return {
             "hits": self.stats.hits,
+            "memory_hits": self.stats.memory_hits,
+            "disk_hits": self.stats.disk_hits,
+            "memory_entries": len(self.memory) if self.memory is not None else 0,
+            "memory_bytes": self.memory.size_bytes if self.memory is not None else 0,
+            "memory_evicted": self.memory.evicted if self.memory is not None else 0,
             "misses": self.stats.misses,
             "normalizations": self.stats.normalizations,
             "skipped": self.stats.skipped,
-            "hit_rate": hit_rate
+            "hit_rate": hit_rate,
+            "saved_input_tokens": saved_input,
+            "saved_output_tokens": saved_output,
+            "expired": self.stats.expired,
+            "evicted": self.stats.evicted,
+            "entries": entries,
+            "size_bytes": total,
+            "pending_writes": len(self._pending_writes),
+            "flushes": self.stats.flushes,
+            "flushed_entries": self.stats.flushed_entries,
+            "maintenance_runs": self.stats.maintenance_runs,
+            "maintenance_seconds": self.stats.maintenance_seconds,
+            "vacuumed_pages": self.stats.vacuumed_pages,
+            "normalize_scans": normalizer_stats["calls"],
+            "normalize_memo_hits": normalizer_stats["memo_hits"],
+            "normalize_seconds": normalizer_stats["seconds"],
+            "normalize_max_seconds": normalizer_stats["max_seconds"],
         }
     
     def print_stats(self) -> str:
         """Get a formatted string with cache statistics."""
         stats = self.get_stats()
-        return (f"Cache Stats: {stats['hits']} hits, {stats['misses']} misses, "
+        return (f"Cache Stats: {stats['hits']} hits ({stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+                f"{stats['misses']} misses, "
                 f"Hit Rate: {stats['hit_rate']:.2%}, "
+                f"Saved tokens: {stats['saved_input_tokens']} input, {stats['saved_output_tokens']} output, "
                 f"Normalizations: {stats['normalizations']}, "
-                f"Skipped: {stats['skipped']}")
+                f"Skipped: {stats['skipped']}, "
+                f"Entries: {stats['entries']} ({stats['size_bytes'] / (1024 * 1024):.1f} MB, "
+                f"{stats['expired']} expired, {stats['evicted']} evicted), "
+                f"Normalize time: {stats['normalize_seconds']:.3f}s over {stats['normalize_scans']} scans "
+                f"({stats['normalize_memo_hits']} memo hits)")
 
 
 def initialize_normalizing_cache(db_path: str = ".langchain.db") -> NormalizingCache:
@@ -240,4 +1396,6 @@ def initialize_normalizing_cache(db_path: str = ".langchain.db") -> NormalizingC
         A NormalizingCache instance
     """
     cache = NormalizingCache(database_path=db_path)
+    if CACHE_WARMUP_ENTRIES:
+        cache.warm_up(CACHE_WARMUP_ENTRIES)
     return cache 
\ No newline at end of file
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from src.browser import get_token_count_for_text
+
+logger = logging.getLogger(__name__)
+
+# Header separating the condensed state from the not-yet-condensed tail in the agent prompt
+RECENT_CONTENT_HEADER = "# Most Recent Content:"
+
+
+class IncrementalCondenser:
+    """Rolling condensation state for the research loop.
+
+    Instead of re-condensing all previously accumulated content on every trigger, the
+    condenser remembers how far into ``accumulated_content`` it has already condensed
+    and only sends the newly added delta to the condensation chain. Condensed deltas are
+    kept as separate segments; once the segments together exceed ``max_tokens`` they are
+    merged pairwise (tree-merge) with the merge chain until the state fits the budget again.
+
+    The most recent section of accumulated content is always kept verbatim, matching the
+    "condensed previous content + most recent content" layout the agent prompt expects.
+    """
+
+    def __init__(
+        self,
+        condense_chain: Runnable,
+        merge_chain: Optional[Runnable] = None,
+        max_tokens: int = 8000,
+        min_delta_chars: int = 200,
+        summary_cache: Optional[Any] = None,
+        cache_tag: str = "condense",
+    ):
+        """
+        Args:
+            condense_chain: Chain taking {"text": ...} and returning the condensed text (message or str).
+            merge_chain: Chain taking {"text": ...} holding several condensed segments and returning one
+                synthesized segment. Defaults to ``condense_chain``.
+            max_tokens: Token budget for the condensed state before a tree-merge is triggered.
+            min_delta_chars: Deltas smaller than this stay verbatim until more content arrives.
+            summary_cache: Optional NearDuplicateSummaryCache; a delta nearly identical to one condensed
+                before (e.g. a syndicated copy of an earlier page) reuses that condensation.
+            cache_tag: Tag under which condensations are stored in summary_cache (include the model name).
+        """
+        self.condense_chain = condense_chain
+        self.merge_chain = merge_chain or condense_chain
+        self.max_tokens = max_tokens
+        self.min_delta_chars = min_delta_chars
+        self.summary_cache = summary_cache
+        self.cache_tag = cache_tag
+        self.segments: List[str] = []
+        # Offset into accumulated_content up to which content has been condensed
+        self.condensed_upto = 0
+
+    def reset(self, initial_state: str = "", condensed_upto: int = 0) -> None:
+        """Clear the condensed state, optionally seeding it (e.g. with the initial plan)."""
+        self.segments = [initial_state] if initial_state else []
+        self.condensed_upto = condensed_upto
+
+    @staticmethod
+    def _to_text(response: Any) -> str:
+        return response.content if hasattr(response, "content") else str(response)
+
+    def _state_tokens(self) -> int:
+        return sum(get_token_count_for_text(segment) for segment in self.segments)
+
+    def render(self, accumulated_content: str) -> str:
+        """Build the prompt text: condensed segments followed by the verbatim, not-yet-condensed tail."""
+        pending = accumulated_content[self.condensed_upto:].strip()
+        if not self.segments:
+            return accumulated_content
+        condensed = "\n\n".join(self.segments)
+        if not pending:
+            return condensed
+        return f"{condensed}\n\n{RECENT_CONTENT_HEADER}\n\n{pending}"
+
+    async def condense(self, accumulated_content: str, config: Optional[RunnableConfig] = None) -> str:
+        """Condense only the content added since the last call and return the prompt text.
+
+        Args:
+            accumulated_content: The full accumulated research content (append-only).
+            config: Runnable config (callbacks) forwarded to the chains.
+
+        Returns:
+            The condensed content for the agent prompt.
+        """
+        if len(accumulated_content) < self.condensed_upto:
+            # Content was rewritten rather than appended; start over
+            logger.warning("Accumulated content shrank since last condensation. Resetting condensed state.")
+            self.reset()
+
+        # Keep the last section verbatim, condense everything between the previous offset and it
+        split_at = accumulated_content.rfind("\n\n")
+        if split_at <= self.condensed_upto:
+            logger.info("No new content before the most recent section. Skipping condensation.")
+            return self.render(accumulated_content)
+
+        delta = accumulated_content[self.condensed_upto:split_at]
+        if len(delta.strip()) < self.min_delta_chars:
+            logger.info(f"New content too small to condense ({len(delta.strip())} chars). Keeping it verbatim for now.")
+            return self.render(accumulated_content)
+
+        logger.info(f"Condensing {len(delta)} new chars (already condensed up to offset {self.condensed_upto}).")
+        condensed_delta = await self._condense_delta(delta, config)
+        self.segments.append(condensed_delta)
+        self.condensed_upto = split_at
+        logger.info(f"Condensed delta from {len(delta)} to {len(condensed_delta)} chars. State now has {len(self.segments)} segments.")
+
+        if self._state_tokens() > self.max_tokens:
+            await self._tree_merge(config)
+
+        return self.render(accumulated_content)
+
+    async def _condense_delta(self, delta: str, config: Optional[RunnableConfig]) -> str:
+        """Condense a delta, reusing the condensation of a near-duplicate delta when one is cached."""
+        sketch = None
+        if self.summary_cache is not None:
+            sketch = await asyncio.to_thread(self.summary_cache.sketch, delta)
+            match = await asyncio.to_thread(self.summary_cache.find, delta, self.cache_tag, sketch)
+            if match:
+                logger.info(f"Reusing condensation of a near-duplicate delta (similarity {match[1]:.2f}).")
+                return match[0]
+        response = await self.condense_chain.ainvoke({"text": delta}, config=config)
+        condensed_delta = self._to_text(response).strip()
+        if self.summary_cache is not None and condensed_delta:
+            await asyncio.to_thread(self.summary_cache.put, delta, condensed_delta, self.cache_tag, sketch)
+        return condensed_delta
+
+    async def _tree_merge(self, config: Optional[RunnableConfig]) -> None:
+        """Merge adjacent segments pairwise, level by level, until the state fits the token budget."""
+        level = 0
+        while self._state_tokens() > self.max_tokens and len(self.segments) > 1:
+            level += 1
+            pairs = [self.segments[i:i + 2] for i in range(0, len(self.segments), 2)]
+            before_tokens = self._state_tokens()
+            logger.info(f"Condensed state ({before_tokens} tokens) exceeds budget ({self.max_tokens}). Tree-merge level {level}: {len(self.segments)} -> {len(pairs)} segments.")
+
+            async def _merge(pair: List[str]) -> str:
+                if len(pair) == 1:
+                    return pair[0]
+                response = await self.merge_chain.ainvoke({"text": "\n\n---\n\n".join(pair)}, config=config)
+                return self._to_text(response).strip()
+
+            self.segments = list(await asyncio.gather(*(_merge(pair) for pair in pairs)))
+
+        if self._state_tokens() > self.max_tokens and self.segments:
+            # A single segment over budget: condense it once more rather than looping
+            logger.info(f"Single condensed segment still over budget ({self._state_tokens()} tokens). Re-condensing it.")
+            response = await self.condense_chain.ainvoke({"text": self.segments[0]}, config=config)
+            self.segments = [self._to_text(response).strip()]
@@ -0,0 +1,91 @@
+"""
+Assembly of the action-loop prompt.
+
+The classic layout sends the per-iteration fields (summary_so_far, sources_visited, last_action,
+tool usage) inside the same human message as the long, unchanging instructions, after a growing
+history. The "cache_aware" layout orders the prompt for provider-side prompt caching instead:
+
+1. stable prefix: system prompt and next-action instructions (only topic and date, fixed per run)
+2. slowly changing: the conversation history, which is only ever appended to
+3. volatile suffix: one human message with this iteration's context
+
+For Anthropic models the stable prefix and the end of the history are marked with cache_control
+breakpoints, so each iteration only pays full price for what was appended since the last one.
+Gemini caches shared prompt prefixes implicitly, so the ordering alone is what it needs.
+"""
+
+import logging
+from typing import Any, List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, SystemMessagePromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from config.prompts import ACTION_SYSTEM_PROMPT, NEXT_ACTION_TEMPLATE, NEXT_ACTION_INSTRUCTIONS, NEXT_ACTION_CONTEXT
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def build_action_prompt(memory_key: str, layout: str = "cache_aware") -> ChatPromptTemplate:
+    """Build the next-action prompt template in the given layout ("cache_aware" or "classic")."""
+    if layout == "classic":
+        return ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(ACTION_SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name=memory_key),
+            ("human", NEXT_ACTION_TEMPLATE),
+        ])
+    if layout != "cache_aware":
+        logger.warning(f"Unknown PROMPT_LAYOUT '{layout}', using 'cache_aware'")
+    return ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(ACTION_SYSTEM_PROMPT + NEXT_ACTION_INSTRUCTIONS),
+        MessagesPlaceholder(variable_name=memory_key),
+        ("human", NEXT_ACTION_CONTEXT),
+    ])
+
+
+def supports_cache_breakpoints(llm: Any) -> bool:
+    """Whether an LLM client (possibly wrapped by the retry wrapper) is an Anthropic chat model."""
+    inner = getattr(llm, "llm", llm)
+    return any("anthropic" in type(obj).__name__.lower() for obj in (llm, inner))
+
+
+def _with_breakpoint(message: BaseMessage) -> BaseMessage:
+    """Copy of a message whose last content block carries a cache_control breakpoint."""
+    content = message.content
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    else:
+        blocks = [block if isinstance(block, dict) else {"type": "text", "text": block} for block in content]
+    blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+    return message.model_copy(update={"content": blocks})
+
+
+def mark_cache_breakpoints(prompt: PromptValue) -> List[BaseMessage]:
+    """Add cache_control breakpoints after the system prompt and after the history.
+
+    The final human message (this iteration's context) is left unmarked. Messages without text
+    content (e.g. an AI message holding only tool calls) cannot carry a breakpoint, so the
+    closest earlier message with content is marked instead.
+    """
+    messages = list(prompt.to_messages())
+    if messages and isinstance(messages[0], SystemMessage) and messages[0].content:
+        messages[0] = _with_breakpoint(messages[0])
+    end = len(messages) - 1 if messages and isinstance(messages[-1], HumanMessage) else len(messages)
+    for index in range(end - 1, 0, -1):
+        if messages[index].content:
+            messages[index] = _with_breakpoint(messages[index])
+            break
+    return messages
+
+
+def build_action_chain(llm: Any, memory_key: str, layout: str = "cache_aware") -> Runnable:
+    """Prompt | (breakpoints, for Anthropic in the cache-aware layout) | llm."""
+    prompt = build_action_prompt(memory_key, layout)
+    if layout != "classic" and supports_cache_breakpoints(llm):
+        logger.info("Action prompt: cache-aware layout with Anthropic cache_control breakpoints")
+        return prompt | RunnableLambda(mark_cache_breakpoints) | llm
+    logger.info(f"Action prompt: {'classic' if layout == 'classic' else 'cache-aware'} layout")
+    return prompt | llm
@@ -3,6 +3,7 @@ import logging
 from typing import Dict, Any, List, Tuple, Optional, Set, Union, Callable, Awaitable
 from datetime import datetime
 import json
+import hashlib
 import re
 import lxml.html
 import lxml.etree
@@ -29,7 +30,7 @@ from langchain_core.messages import (
     ChatMessage,
     FunctionMessage
 )
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, SystemMessagePromptTemplate, PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, PromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda, RunnableConfig, RunnableParallel
 from langchain_core.output_parsers.openai_tools import PydanticToolsParser # Or relevant tool parser
 from pydantic import BaseModel, Field # Import directly from pydantic
@@ -71,17 +72,20 @@ from config.settings import (
     THINKING_BUDGET,
     CONDENSE_FREQUENCY,
     FINAL_SUMMARY_MAX_TOKENS,
+    FINAL_SUMMARY_CONTENT_BUDGET,
     NEXT_STEP_MODEL,
+    MAX_CONCURRENT_TOOL_CALLS,
+    CONDENSED_CONTENT_MAX_TOKENS,
+    PROMPT_LAYOUT,
 )
 # Define MAX_ITERATIONS as a constant based on maximum expected pages
 MAX_ITERATIONS = 30  # Allow sufficient iterations for all planned tool calls
 
 from config.prompts import (
     INITIAL_RESEARCH_PROMPT,
-    NEXT_ACTION_TEMPLATE,
     SUMMARY_PROMPT,
-    ACTION_SYSTEM_PROMPT,
     CONDENSE_PROMPT,
+    COMBINE_PROMPT,
     TOOL_CORRECTION_PROMPT
 )
 # Tool loading
@@ -94,12 +98,22 @@ except ImportError:
         pass
 
 from src.content_manager import ContentManager, extract_mcp_content_universal
+from src.agent.condenser import IncrementalCondenser
+from src.agent.prompt_layout import build_action_chain, build_action_prompt
+from src.content_packing import pack_content
+from src.browser import get_token_count_for_text
+from src.model_registry import get_llm_capabilities, get_model_name
+from src.http_clients import http_clients
 from src.llm_clients.factory import get_llm_client # To get the summarization LLM
 from src.token_callback import TokenCallbackManager, TokenUsageCallbackHandler # Re-evaluate if needed directly or just via callbacks
 
 # Define internal vs MCP tools
 # Internal tools require special handling, all others are treated as generic MCP tools
 INTERNAL_TOOLS = {'web_browser', 'reddit_search', 'reddit_extract_post'}
+# ToolMessage prefixes of failed calls (plain errors and the summaries written by the exception handlers)
+TOOL_ERROR_PREFIXES = ("Error", "MCP Tool Error:", "Tool Execution Error:")
+# Least research content (tokens) the final report prompt gets when the model window leaves less room
+MIN_FINAL_SUMMARY_CONTENT_BUDGET = 2000
 
 logger = logging.getLogger(__name__)
 # Cache root logger level check for efficiency
@@ -320,6 +334,8 @@ class ResearcherAgent:
             chunk_overlap=CHUNK_OVERLAP
         )
         logger.info("ContentManager initialized")
+        # Build summarization chains and probe context windows now rather than on the first page summary
+        self.content_manager.warm_up()
         
         # Initialize browser tool
         try:
@@ -352,6 +368,7 @@ class ResearcherAgent:
         self.action_iteration_chain = None
         self.summarization_chain = None
         self.condensation_chain = None
+        self.condensation_merge_chain = None
         
         # Memory and other components
         self.memory = ConversationSummaryBufferMemory(
@@ -491,15 +508,12 @@ class ResearcherAgent:
             SystemMessagePromptTemplate.from_template(INITIAL_RESEARCH_PROMPT.template),
             ("human", "{topic} (current date: {current_date})")
         ])
-        self.next_action_template = ChatPromptTemplate.from_messages([
-            SystemMessagePromptTemplate.from_template(ACTION_SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name=MEMORY_KEY),
-            ("human", NEXT_ACTION_TEMPLATE)
-        ])
+        # Stable instructions first, then history, then this iteration's context (see PROMPT_LAYOUT)
+        self.next_action_template = build_action_prompt(MEMORY_KEY, PROMPT_LAYOUT)
         # Ensure action chains use the correct LLM instances
         self.initial_planner_chain = self.initial_planning_template | self.llm_with_tools # Planner uses primary LLM (with tools)
         # <<< USE self.next_step_llm for the action iteration chain >>>
-        self.action_iteration_chain = self.next_action_template | self.next_step_llm # Action iteration uses the dedicated next_step_llm (no tools needed here directly)
+        self.action_iteration_chain = build_action_chain(self.next_step_llm, MEMORY_KEY, PROMPT_LAYOUT) # Action iteration uses the dedicated next_step_llm (no tools needed here directly)
         
         # Build summarization chain (uses final_summary_llm)
         self.summarization_chain = self._build_summarization_chain()
@@ -509,6 +523,8 @@ class ResearcherAgent:
         if not self.summarization_llm:
             raise RuntimeError("Summarization LLM is not available for condensation chain")
         self.condensation_chain = condense_prompt_template | self.summarization_llm
+        # Merges condensed segments once the rolling condensed state exceeds its token budget
+        self.condensation_merge_chain = PromptTemplate.from_template(COMBINE_PROMPT.template) | self.summarization_llm
         logger.info(f"Building condensation chain using LLM: {getattr(self.summarization_llm, 'model', 'Unknown')}")
         logger.info("Condensation chain successfully built.")
         
@@ -595,6 +611,159 @@ class ResearcherAgent:
         logger.debug(f"Function usage breakdown: {functions_detail}")
         return total
 
+    @staticmethod
+    def _mcp_content_id(tool_name: str, tool_args: Any) -> str:
+        """Stable content id of an MCP tool call: tool, function and normalized arguments."""
+        function_name = None
+        if isinstance(tool_args, dict):
+            function_name = tool_args.get('action') or tool_args.get('function')
+        normalized_args = json.dumps(tool_args, sort_keys=True, default=str)
+        args_digest = hashlib.sha256(normalized_args.encode()).hexdigest()[:16]
+        return f"mcp_{tool_name}_{function_name or 'none'}_{args_digest}"
+
+    def _get_stored_tool_output(self, tool_name: str, tool_args: Any) -> Optional[str]:
+        """Return a stored output for a tool call whose content is already in the content store, else None."""
+        if not self.content_manager:
+            return None
+        if tool_name not in INTERNAL_TOOLS:
+            stored = self.content_manager.get_cached_content(self._mcp_content_id(tool_name, tool_args))
+            return stored.get("full_content") if stored else None
+        if tool_name == 'reddit_extract_post' and isinstance(tool_args, dict) and tool_args.get('post_url'):
+            stored = self.content_manager.get_cached_content(tool_args['post_url'])
+            if not stored or not stored.get("full_content"):
+                return None
+            # Rebuild the tool's JSON output from the stored "<h1>Post:</h1> ... <h1>Comments:</h1> ..." text
+            post_part, _, comments_part = stored["full_content"].partition("<h1>Comments:</h1>")
+            return json.dumps({
+                "url": tool_args['post_url'],
+                "post": post_part.replace("<h1>Post:</h1>", "", 1).strip(),
+                "post_comments": comments_part.strip(),
+            })
+        return None
+
+    async def _summarize_mcp_error(
+        self,
+        tool_name: str,
+        tool_args: Any,
+        mcp_exc: Exception,
+        run_config: RunnableConfig
+    ) -> Tuple[str, bool]:
+        """Build the ToolMessage text for a failed MCP call, with a correction suggestion for invalid arguments.
+
+        Args:
+            tool_name: Name of the MCP tool
+            tool_args: Arguments the call was made with
+            mcp_exc: The McpError raised by the call
+            run_config: The run config, used for the LLM-based correction
+
+        Returns:
+            (error_summary, is_failure). is_failure is False when a tool that was already corrected once
+            fails again without a new suggestion; that is reported as "no content" rather than an error.
+        """
+        error_summary = f"MCP Tool Error: {tool_name} failed. Reason: {str(mcp_exc)}"[:500]
+        # mcp's McpError carries ErrorData in .error; older clients passed a dict as the first argument
+        error_code = getattr(getattr(mcp_exc, 'error', None), 'code', None)
+        if error_code is None and mcp_exc.args and isinstance(mcp_exc.args[0], dict):
+            error_code = mcp_exc.args[0].get('code')
+        logger.info(f"Caught McpError for {tool_name}. Code: {error_code if error_code is not None else 'N/A'}. Checking if it's -32602...")
+
+        if error_code != -32602:
+            # Log non-argument MCP errors normally
+            logger.error(f"MCP Tool Error: {error_summary}", exc_info=False)
+            return error_summary, True
+
+        logger.warning(f"Detected invalid arguments error for {tool_name}. Attempting correction.")
+        try:
+            # First try direct correction without LLM for efficiency
+            corrected_args_json = self._try_direct_correction(
+                tool_name=tool_name,
+                failed_args=tool_args,
+                error_message=str(mcp_exc)
+            )
+            if corrected_args_json:
+                logger.info(f"Direct correction applied for {tool_name}: {corrected_args_json}")
+            else:
+                # If direct correction failed, try LLM-based correction
+                corrected_args_json = await self._get_tool_correction_suggestion(
+                    tool_name=tool_name,
+                    failed_args=tool_args,
+                    error_message=str(mcp_exc),
+                    run_config=run_config
+                )
+
+            if corrected_args_json:
+                error_summary += f"\n\n[Correction Suggestion]:\n```json\n{json.dumps(corrected_args_json, indent=2)}\n```"
+                logger.info(f"Successfully added correction suggestion for {tool_name} to error message.")
+                # Store the fact that this tool was corrected once
+                if not hasattr(self, '_corrected_tools'):
+                    self._corrected_tools = set()
+                self._corrected_tools.add(tool_name)
+            elif hasattr(self, '_corrected_tools') and tool_name in self._corrected_tools:
+                # No new correction but the tool has been corrected before: treat as "no content" instead of an error
+                logger.warning(f"Tool {tool_name} already had one correction attempt. Treating as no content.")
+                return f"No content available from {tool_name}. Moving on to the next research step.", False
+            else:
+                logger.warning(f"No valid correction suggestion generated for {tool_name}.")
+        except Exception as correction_err:
+            logger.error(f"Error during correction process for {tool_name}: {correction_err}", exc_info=True)
+            # error_summary remains the original error
+        return error_summary, True
+
+    @staticmethod
+    def _order_tool_messages(tool_messages: List[ToolMessage], tool_calls: List[Dict[str, Any]]) -> List[ToolMessage]:
+        """Sort ToolMessages into the order in which the LLM requested the calls (unknown ids last)."""
+        call_order = {tool_call.get("id"): idx for idx, tool_call in enumerate(tool_calls)}
+        return sorted(tool_messages, key=lambda msg: call_order.get(msg.tool_call_id, len(call_order)))
+
+    async def _execute_tool_calls(
+        self,
+        scheduled_calls: List[Dict[str, Any]],
+        run_config: RunnableConfig
+    ) -> List[Any]:
+        """Run the scheduled tool calls of one iteration concurrently.
+
+        Concurrency is bounded by MAX_CONCURRENT_TOOL_CALLS (1 restores serial execution).
+        Results are returned in the same order as scheduled_calls. A failing call yields its
+        exception object instead of raising, so one bad call never cancels its siblings; the
+        caller re-raises it to run the usual error handling for that call. Calls whose
+        content is already in the content store (MCP outputs, Reddit posts) are not executed.
+
+        Args:
+            scheduled_calls: Dicts with 'name', 'args', 'id' and 'tool' (the BaseTool to invoke)
+            run_config: The run config whose callbacks are passed to each tool
+
+        Returns:
+            List of raw tool outputs (or exceptions), one per scheduled call
+        """
+        if not scheduled_calls:
+            return []
+
+        semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENT_TOOL_CALLS))
+
+        async def _run_one(call: Dict[str, Any]) -> Any:
+            stored_output = self._get_stored_tool_output(call["name"], call["args"])
+            if stored_output is not None:
+                logger.info(f"Reusing stored output for tool call {call['name']} (ID: {call['id']}); skipped execution")
+                return stored_output
+            async with semaphore:
+                started = time.monotonic()
+                logger.info(f"Executing tool call: {call['name']} with args: {call['args']} (ID: {call['id']})")
+                try:
+                    return await call["tool"].arun(
+                        tool_input=call["args"],
+                        callbacks=run_config.get("callbacks")
+                    )
+                except Exception as e:
+                    # Returned, not raised, so one bad call never cancels its siblings
+                    logger.warning(f"Tool call {call['name']} (ID: {call['id']}) raised {type(e).__name__}: {e}")
+                    return e
+                finally:
+                    logger.info(f"Tool call {call['name']} (ID: {call['id']}) finished in {time.monotonic() - started:.1f}s")
+
+        if len(scheduled_calls) > 1:
+            logger.info(f"Executing {len(scheduled_calls)} tool calls concurrently (limit: {max(1, MAX_CONCURRENT_TOOL_CALLS)})")
+        return await asyncio.gather(*(_run_one(call) for call in scheduled_calls))
+
     async def _process_generic_mcp_tool_output(
         self, 
         tool_name: str, 
@@ -1128,6 +1297,15 @@ class ResearcherAgent:
             
         if start_time is None:
             start_time = datetime.now()
+
+        # Rolling condensation state: only content added since the last condensation is condensed
+        condenser = IncrementalCondenser(
+            condense_chain=self.condensation_chain,
+            merge_chain=self.condensation_merge_chain,
+            max_tokens=CONDENSED_CONTENT_MAX_TOKENS,
+            summary_cache=self.content_manager.near_duplicate_cache if self.content_manager else None,
+            cache_tag=f"condense:{SUMMARIZER_MODEL}",
+        )
         logger.info("Phase 1: Initial Planning...")
         self.current_stage = "initial_planning" # For potential thinking logic
         current_response = None # Initialize current_response
@@ -1270,6 +1448,8 @@ class ResearcherAgent:
             if planner_response.content:
                 accumulated_content += f"\n\n--- Initial Plan ---\n{planner_response.content}\n"
                 condensed_content_for_prompt = f"--- Initial Plan ---\n{planner_response.content}\n"
+                # Seed the condensed state with the plan so it is never re-condensed
+                condenser.reset(initial_state=condensed_content_for_prompt.strip(), condensed_upto=len(accumulated_content))
                 logger.info(f"Initial Planner Response Content (preview): {planner_response.content[:200]}...") # Log preview at INFO
                 logger.debug(f"Full Initial Planner Response Content: {planner_response.content}") # Log full content at DEBUG
             else:
@@ -1581,7 +1761,11 @@ class ResearcherAgent:
                                                 logger.info(f"Added missing URL to tool call from ACTION CONFIRMATION block: {url_from_confirmation}")
                 # --- END NEW SECTION ---
                 
-                # Execute the tools 
+                # Execute the tools in three passes so that independent calls can overlap:
+                # 1. Validate, enforce limits and update processed_counts sequentially (deterministic accounting).
+                # 2. Run the scheduled tool_to_call.arun() calls concurrently (bounded by MAX_CONCURRENT_TOOL_CALLS).
+                # 3. Process outputs sequentially in the original call order.
+                scheduled_calls = []
                 for tool_call in tool_calls_to_execute:
                     tool_name = tool_call.get("name")
                     tool_args = tool_call.get("args")
@@ -1654,7 +1838,7 @@ class ResearcherAgent:
                                 logger.info(f"Preprocessed arguments for {tool_name}: {preprocessed_args}")
                                 tool_args = preprocessed_args
                                 
-                            logger.info(f"Executing tool call: {tool_name} with args: {tool_args} (ID: {tool_call_id})")
+                            logger.info(f"Scheduling tool call: {tool_name} with args: {tool_args} (ID: {tool_call_id})")
                             
                             # --- Determine Function Identifier for Tracking/Limits --- #
                             function_identifier = None
@@ -1706,350 +1890,308 @@ class ResearcherAgent:
                             logger.info(f"Tracked call: Base='{base_tool_name}'{base_tool_increment_log}, Function='{function_identifier}' (Count: {processed_counts['tool_functions'][function_identifier]}) Max Limit: {max_limit}")
                             # <<< END INCREMENT COUNTERS >>>
 
-                            # Log the updated function counts for debugging
-                            if 'tool_functions' in processed_counts:
-                                logger.debug(f"Current function usage counts: {processed_counts['tool_functions']}")
-                            
-                            # Define base_tool_name as the first step inside the try block
-                            # to ensure it's locally scoped and defined before await.
-                            base_tool_name = tool_name
-                            # <<< Store the raw tool output first >>>
-                            try:
-                                tool_output = await tool_to_call.arun(
-                                    tool_input=tool_args,
-                                    callbacks=run_config.get("callbacks")
-                                )
-                            except Exception as e:
-                                logger.error(f"Error executing tool call {tool_name}: {e}", exc_info=True)
-                                tool_output = f"Error executing tool call: {e}"
-
-                            # --- Special handling for web_browser search results --- 
-                            raw_tool_output = None
-                            is_web_search_list_output = False
-                            if tool_name == 'web_browser' and isinstance(tool_args, dict) and tool_args.get('action') == 'search' and isinstance(tool_output, list):
-                                raw_tool_output = tool_output # Store the raw list
-                                is_web_search_list_output = True
-                                output_str = None # Don't use universal extractor for this case
-                                logger.info(f"Received list output for web_browser search. Storing raw list.")
-                            else:
-                                # --- Use universal extractor for all other cases --- 
-                                extracted_output = extract_mcp_content_universal(tool_output)
-                                output_str = extracted_output if extracted_output is not None else ""
-
-                            # Log and display the extracted output (truncated) or list type
-                            preview_len = 1000
-                            log_preview = ""
-                            if is_web_search_list_output:
-                                log_preview = f"List[{len(raw_tool_output)}] of search result dicts"
-                                tool_content_for_history = f"Web Browser Search: Received {len(raw_tool_output)} search results as a list."
-                            elif output_str:
-                                log_preview = str(output_str)[:preview_len] + ("..." if len(str(output_str)) > preview_len else "")
-                                # Don't use generic MCP Tool Output format for internal tools
-                                if tool_name in INTERNAL_TOOLS:
-                                    tool_content_for_history = f"{tool_name} Output:\n{log_preview}"
-                                else:
-                                    tool_content_for_history = f"MCP Tool Output ({tool_name}):\n{log_preview}"
-                            else:
-                                log_preview = "(Empty or None)"
-                                tool_content_for_history = f"Warning: Tool '{tool_name}' returned empty output after extraction. Check MCP client/tool logs."
-                                
-                            logger.info(f"[MCP Tool Output] {tool_name}: {log_preview}")
-                            # Don't log warning here if it was handled above
-                            # if not output_str or not str(output_str).strip():
-                            #     logger.warning(f"Tool '{tool_name}' returned empty output after extraction. Check MCP client/tool logs.")
-                            #     tool_content_for_history = f"Warning: Tool '{tool_name}' returned empty output after extraction."
-                            # else:
-                            #     tool_content_for_history = f"MCP Tool Output ({tool_name}):\n{truncated_output}"
-
-                            # --- Accumulate FULL content --- (Modify existing blocks)
-                            extracted_data = None
-                            if isinstance(output_str, str) and output_str.strip().startswith('{') and output_str.strip().endswith('}'):
-                                try:
-                                    extracted_data = json.loads(output_str)
-                                except json.JSONDecodeError:
-                                    extracted_data = None # Not valid JSON
-                            
-                            # Update flags (check tool_name and action again for clarity)
-                            is_web_extraction = (tool_name == 'web_browser' and isinstance(tool_args, dict) and 
-                               (tool_args.get('action') == 'navigate_and_extract' or tool_args.get('action') == 'extract'))
-                            is_reddit_extraction = (
-                                (tool_name == 'reddit_extract_post') or 
-                                (tool_name == 'reddit_search' and isinstance(tool_args, dict) and tool_args.get("extract_result_index") is not None)
+                            scheduled_calls.append({
+                                "name": tool_name,
+                                "args": tool_args,
+                                "id": tool_call_id,
+                                "tool": tool_to_call,
+                            })
+
+                        except Exception as tool_exc:
+                            # --- Summarize Error for Scratchpad --- 
+                            error_summary = f"Tool Execution Error: {tool_name} failed. Reason: {str(tool_exc)}"[:500]
+                            logger.error(error_summary, exc_info=_log_traceback)
+                            tool_messages.append(
+                                ToolMessage(content=error_summary, tool_call_id=tool_call_id)
                             )
-                            is_reddit_search_list = (tool_name == 'reddit_search' and not is_reddit_extraction) # Only if NOT extracting
-                            is_web_search_list_output = is_web_search_list_output # Keep flag as set earlier
+                            last_failed_tool_info = {"name": tool_name, "args": tool_args, "id": tool_call_id, "error": error_summary}
 
-                            processed_successfully = False
-                            content_added_this_call = False # Track if content relevant for condensation was added
+                    elif not is_immediate_retry:
+                        logger.warning(f"Tool '{tool_name}' requested but not found in available tools.")
+                        tool_messages.append(
+                            ToolMessage(content=f"Error: Tool '{tool_name}' not found.", tool_call_id=tool_call_id)
+                        )
+
+                tool_outputs = await self._execute_tool_calls(scheduled_calls, run_config)
 
-                            # --- Generic MCP Tool or Internal Tool Processing --- #
+                for scheduled_call, tool_output in zip(scheduled_calls, tool_outputs):
+                    tool_name = scheduled_call["name"]
+                    tool_args = scheduled_call["args"]
+                    tool_call_id = scheduled_call["id"]
+                    base_tool_name = tool_name
+                    try:
+                        if isinstance(tool_output, BaseException):
+                            # Re-raise the call's exception so the McpError/Exception handlers below run
+                            raise tool_output
+                        # --- Special handling for web_browser search results --- 
+                        raw_tool_output = None
+                        is_web_search_list_output = False
+                        if tool_name == 'web_browser' and isinstance(tool_args, dict) and tool_args.get('action') == 'search' and isinstance(tool_output, list):
+                            raw_tool_output = tool_output # Store the raw list
+                            is_web_search_list_output = True
+                            output_str = None # Don't use universal extractor for this case
+                            logger.info(f"Received list output for web_browser search. Storing raw list.")
+                        else:
+                            # --- Use universal extractor for all other cases --- 
+                            extracted_output = extract_mcp_content_universal(tool_output)
+                            output_str = extracted_output if extracted_output is not None else ""
+
+                        # Log and display the extracted output (truncated) or list type
+                        preview_len = 1000
+                        log_preview = ""
+                        if is_web_search_list_output:
+                            log_preview = f"List[{len(raw_tool_output)}] of search result dicts"
+                            tool_content_for_history = f"Web Browser Search: Received {len(raw_tool_output)} search results as a list."
+                        elif output_str:
+                            log_preview = str(output_str)[:preview_len] + ("..." if len(str(output_str)) > preview_len else "")
+                            # Don't use generic MCP Tool Output format for internal tools
                             if tool_name in INTERNAL_TOOLS:
-                                # --- Process Internal Tools (web_browser, reddit) --- #
-                                
-                                # --- Process Reddit Extraction --- #
-                                # Use output_str which contains the universally extracted content for reddit
-                                if is_reddit_extraction and extracted_data and isinstance(extracted_data, dict):
-                                    logger.info(f"Processing extracted Reddit content from tool: {tool_name}")
-                                    # Determine URL: Use tool_args if available (from reddit_extract_post)
-                                    # or extracted_data['url'] (from reddit_search with extract)
-                                    if tool_name == 'reddit_extract_post' and isinstance(tool_args, dict):
-                                        post_url = tool_args.get('post_url', 'Unknown URL')
-                                    else: # Assume reddit_search with extract
-                                        post_url = extracted_data.get('url', 'Unknown URL')
-                                        
-                                    post_content = extracted_data.get('post', '') or "" 
-                                    comments_content = extracted_data.get('post_comments', '') or ""
-                                    full_reddit_content = f"<h1>Post:</h1>\n{post_content}\n\n<h1>Comments:</h1>\n{comments_content}".strip()
-                                    source_desc = f"Reddit Post: {post_url}"
-
-                                    if not full_reddit_content or full_reddit_content == "<h1>Post:</h1>\n\n<h1>Comments:</h1>":
-                                        logger.warning(f"Skipping summarization for {source_desc} as extracted content is empty or errored.")
-                                        accumulated_content += f"\n\n--- Skipped Empty/Errored Reddit Post: {post_url} ---\n"
-                                    else:
-                                        try:
-                                            # Store content with proper source attribution
-                                            reddit_content_data = {
-                                                "full_content": full_reddit_content,
-                                                "title": f"Reddit content from {post_url}",
-                                                "tool_name": tool_name,
-                                                "tool_args": tool_args
-                                            }
-                                            # Store content with proper source type
-                                            if post_url and post_url != "Unknown URL":
-                                                self.content_manager.store_content(post_url, reddit_content_data, source_type="reddit")
-                                                
-                                            logger.info(f"Generating summary for {source_desc}")
-                                            summary = await self.content_manager.get_summary(post_url, content=full_reddit_content, callbacks=self.callbacks)
-                                            
-                                            # Mark this URL as used in the summary
-                                            if post_url and post_url != "Unknown URL":
-                                                self.content_manager.mark_content_used_in_summary(post_url)
-                                                
-                                            # --- MODIFIED CONTENT ACCUMULATION ---
-                                            # Store both summary and full content for the final report
-                                            full_content_to_add = full_reddit_content # Specific for Reddit
-                                            accumulated_content += (
-                                                f"\n\n--- BEGIN PROCESSED CONTENT from {source_desc} ---\n"
-                                                f"--- Full Content ---\n"
-                                                f"{full_content_to_add}\n"
-                                                f"--- END PROCESSED CONTENT from {source_desc} ---\n\n"
-                                            )
-                                            # --- END MODIFICATION ---
-                                            logger.info(f"Added summary and full content for {source_desc} to accumulated_content (Summary length: {len(summary)}, Full length: {len(full_content_to_add)})")
-                                            processed_successfully = True
-                                            content_added_this_call = True # Summary was added
-                                        except Exception as e:
-                                            logger.error(f"Failed to summarize content for {source_desc}: {e}", exc_info=True)
-                                            truncated_output = output_str[:10000] + "... [Content truncated due to summarization error]" if len(output_str) > 10000 else output_str
-                                            # --- MODIFIED ERROR ACCUMULATION ---
-                                            # Store truncated raw content when summarization fails
-                                            full_content_to_add = output_str # Specific for web extraction
-                                            # Use the already truncated version for the summary part in case of error
-                                            summary_fallback = truncated_output
-                                            accumulated_content += (
-                                                f"\n\n--- BEGIN FAILED-SUMMARY CONTENT from {source_desc} ---\n"
-                                                f"--- Full Content ---\n"
-                                                f"{full_content_to_add}\n"
-                                                f"--- END FAILED-SUMMARY CONTENT from {source_desc} ---\n\n"
-                                            )
-                                            # --- END MODIFICATION ---
-                                            logger.warning(f"Using truncated raw content as summary fallback, but stored full content for final report for {source_desc}")
-                                            processed_successfully = False # Summarization failed, treat as not fully processed
-                                
-                                # --- Process Reddit Search List --- #
-                                elif is_reddit_search_list and isinstance(output_str, str) and "Searched Reddit for" in output_str:
-                                    # Pass the #main-content HTML/text directly to the summarizer for table extraction.
-                                    try:
-                                        table_md = await self.content_manager.summarize_search_results_as_table(
-                                            output_str,  # This should be the HTML/text of #main-content
-                                            top_n=5,
-                                            callbacks=self.callbacks,
-                                            prompt_instructions="Extract a markdown table of Reddit search results with columns: Title, URL, Subreddit, Comment Count."
-                                        )
-                                        header = f"--- Reddit Search Results Table ---"
-                                        accumulated_content += f"\n\n{header}\n{table_md}\n--- End Reddit Search Results Table ---\n"
-                                        tool_content_for_history = table_md
-                                        logger.info("Added markdown table of Reddit search results to accumulated_content and scratchpad (via summarizer).")
-                                    except Exception as e:
-                                        accumulated_content += f"\n\n--- Reddit Search Results (raw) ---\n{output_str}\n--- End Reddit Search Results ---\n"
-                                        tool_content_for_history = output_str
-                                        logger.warning(f"Could not summarize Reddit search results, added raw output instead: {e}")
-
-                                # --- Process Web Search List --- #
-                                # Use the flag set earlier to identify this case
-                                elif is_web_search_list_output:
-                                    # We already stored the raw list in raw_tool_output 
+                                tool_content_for_history = f"{tool_name} Output:\n{log_preview}"
+                            else:
+                                tool_content_for_history = f"MCP Tool Output ({tool_name}):\n{log_preview}"
+                        else:
+                            log_preview = "(Empty or None)"
+                            tool_content_for_history = f"Warning: Tool '{tool_name}' returned empty output after extraction. Check MCP client/tool logs."
+                            
+                        logger.info(f"[MCP Tool Output] {tool_name}: {log_preview}")
+                        # Don't log warning here if it was handled above
+                        # if not output_str or not str(output_str).strip():
+                        #     logger.warning(f"Tool '{tool_name}' returned empty output after extraction. Check MCP client/tool logs.")
+                        #     tool_content_for_history = f"Warning: Tool '{tool_name}' returned empty output after extraction."
+                        # else:
+                        #     tool_content_for_history = f"MCP Tool Output ({tool_name}):\n{truncated_output}"
+
+                        # --- Accumulate FULL content --- (Modify existing blocks)
+                        extracted_data = None
+                        if isinstance(output_str, str) and output_str.strip().startswith('{') and output_str.strip().endswith('}'):
+                            try:
+                                extracted_data = json.loads(output_str)
+                            except json.JSONDecodeError:
+                                extracted_data = None # Not valid JSON
+                        
+                        # Update flags (check tool_name and action again for clarity)
+                        is_web_extraction = (tool_name == 'web_browser' and isinstance(tool_args, dict) and 
+                           (tool_args.get('action') == 'navigate_and_extract' or tool_args.get('action') == 'extract'))
+                        is_reddit_extraction = (
+                            (tool_name == 'reddit_extract_post') or 
+                            (tool_name == 'reddit_search' and isinstance(tool_args, dict) and tool_args.get("extract_result_index") is not None)
+                        )
+                        is_reddit_search_list = (tool_name == 'reddit_search' and not is_reddit_extraction) # Only if NOT extracting
+                        is_web_search_list_output = is_web_search_list_output # Keep flag as set earlier
+
+                        processed_successfully = False
+                        content_added_this_call = False # Track if content relevant for condensation was added
+
+                        # --- Generic MCP Tool or Internal Tool Processing --- #
+                        if tool_name in INTERNAL_TOOLS:
+                            # --- Process Internal Tools (web_browser, reddit) --- #
+                            
+                            # --- Process Reddit Extraction --- #
+                            # Use output_str which contains the universally extracted content for reddit
+                            if is_reddit_extraction and extracted_data and isinstance(extracted_data, dict):
+                                logger.info(f"Processing extracted Reddit content from tool: {tool_name}")
+                                # Determine URL: Use tool_args if available (from reddit_extract_post)
+                                # or extracted_data['url'] (from reddit_search with extract)
+                                if tool_name == 'reddit_extract_post' and isinstance(tool_args, dict):
+                                    post_url = tool_args.get('post_url', 'Unknown URL')
+                                else: # Assume reddit_search with extract
+                                    post_url = extracted_data.get('url', 'Unknown URL')
                                     
-                                    # --- Process the list directly --- 
-                                    table_rows = []
+                                post_content = extracted_data.get('post', '') or "" 
+                                comments_content = extracted_data.get('post_comments', '') or ""
+                                full_reddit_content = f"<h1>Post:</h1>\n{post_content}\n\n<h1>Comments:</h1>\n{comments_content}".strip()
+                                source_desc = f"Reddit Post: {post_url}"
+
+                                if not full_reddit_content or full_reddit_content == "<h1>Post:</h1>\n\n<h1>Comments:</h1>":
+                                    logger.warning(f"Skipping summarization for {source_desc} as extracted content is empty or errored.")
+                                    accumulated_content += f"\n\n--- Skipped Empty/Errored Reddit Post: {post_url} ---\n"
+                                else:
                                     try:
-                                        # Use raw_tool_output which is guaranteed to be a list here
-                                        logger.info(f"Processing web search results list with {len(raw_tool_output)} results.") 
-                                        results_list = raw_tool_output 
-                                        if not results_list:
-                                            logger.warning("Search results list is empty.")
-                                            tool_content_for_history = "Success: Retrieved search results, but the list was empty."
-                                        else:
-                                            # --- Generate Markdown Table --- 
-                                            table_header = "| # | Title (URL) | Snippet |\n|---|---|---|"
-                                            for i, result_data in enumerate(results_list):
-                                                title = result_data.get('title', '') or '' # Default to empty string if None
-                                                link = result_data.get('link', '') or ''   # Default to empty string if None
-                                                snippet = result_data.get('snippet', '') or '' # Default to empty string if None
-                                                # Escape pipes for Markdown
-                                                title_md = title.replace('|', '\\|')
-                                                link_md = link.replace('|', '\\|')
-                                                # Limit snippet length in table for readability
-                                                snippet_md = snippet.replace('|', '\\|')[:200] + ("..." if len(snippet) > 200 else "")
-                                                table_rows.append(f"| {i+1} | [{title_md}]({link_md}) | {snippet_md} |")
-                                            
-                                            # Create the markdown table with proper newlines
-                                            markdown_table = table_header + "\n" + "\n".join(table_rows)
+                                        # Store content with proper source attribution
+                                        reddit_content_data = {
+                                            "full_content": full_reddit_content,
+                                            "title": f"Reddit content from {post_url}",
+                                            "tool_name": tool_name,
+                                            "tool_args": tool_args
+                                        }
+                                        # Store content with proper source type
+                                        if post_url and post_url != "Unknown URL":
+                                            self.content_manager.store_content(post_url, reddit_content_data, source_type="reddit")
                                             
-                                            # Include the table directly in the history message content
-                                            tool_content_for_history = (
-                                                f"Success: Retrieved and processed {len(results_list)} search results for "
-                                                f"'{tool_args.get('query', 'N/A')}':\n\n"
-                                                f"{markdown_table}"
-                                            )
-                                            # <<< ADD DEBUG LOG 1 >>>
-                                            logger.debug(f"[DEBUG] tool_content_for_history AFTER table assignment (first 300 chars):\n{str(tool_content_for_history)[:300]}")
+                                        logger.info(f"Generating summary for {source_desc}")
+                                        summary = await self.content_manager.get_summary(post_url, content=full_reddit_content, callbacks=self.callbacks)
+                                        
+                                        # Mark this URL as used in the summary
+                                        if post_url and post_url != "Unknown URL":
+                                            self.content_manager.mark_content_used_in_summary(post_url)
                                             
-                                            # Add detailed results to accumulated content
-                                            # accumulated_content += f"..." # Removed line
-                                            logger.info(f"Processed markdown table with {len(results_list)} search results (content NOT added to accumulated_content).") # Modified log message
-                                            # content_added_this_call = True # Search results should not trigger condensation
-                                    
+                                        # --- MODIFIED CONTENT ACCUMULATION ---
+                                        # Store both summary and full content for the final report
+                                        full_content_to_add = full_reddit_content # Specific for Reddit
+                                        accumulated_content += (
+                                            f"\n\n--- BEGIN PROCESSED CONTENT from {source_desc} ---\n"
+                                            f"--- Full Content ---\n"
+                                            f"{full_content_to_add}\n"
+                                            f"--- END PROCESSED CONTENT from {source_desc} ---\n\n"
+                                        )
+                                        # --- END MODIFICATION ---
+                                        logger.info(f"Added summary and full content for {source_desc} to accumulated_content (Summary length: {len(summary)}, Full length: {len(full_content_to_add)})")
+                                        processed_successfully = True
+                                        content_added_this_call = True # Summary was added
                                     except Exception as e:
-                                         # Keep the generic error handling for parsing the list itself
-                                         logger.error(f"Unexpected error processing web search results list: {e}", exc_info=_log_traceback)
-                                         tool_content_for_history = f"Error: Failed to process web search results list: {e}"
-                                else:
-                                    # Default case for other internal tools we don't have special handling for
-                                    if output_str:
-                                        accumulated_content += f"\n\n--- Output from {tool_name} ---\n{output_str}\n--- End Output ---\n"
-                                        tool_content_for_history = f"Success: {tool_name} executed. [Output length: {len(str(output_str))}]"
-                                        content_added_this_call = True
-                                    else:
-                                        tool_content_for_history = f"Warning: {tool_name} returned empty output after extraction."
-                            else:
-                                # --- Process Generic MCP Tool Output --- #
-                                logger.info(f"Processing generic MCP tool output for {tool_name}")
-                                
-                                # Extract function name from tool if available
-                                function_name = None
-                                if isinstance(tool_args, dict) and 'action' in tool_args:
-                                    function_name = tool_args['action']
-                                elif isinstance(tool_args, dict) and 'function' in tool_args:
-                                    function_name = tool_args['function']
-                                
-                                # Store content with tool name, function name, and parameters
-                                mcp_content_data = {
-                                    "full_content": output_str,
-                                    "title": f"MCP Tool Output from {tool_name}",
-                                    "tool_name": tool_name,
-                                    "function_name": function_name,
-                                    "tool_args": tool_args
-                                }
-                                # Use a synthetic URL or identifier if no URL is present
-                                mcp_content_id = f"mcp_{tool_name}_{function_name or 'none'}_{tool_call_id}"
-                                self.content_manager.store_content(mcp_content_id, mcp_content_data, source_type=tool_name)
-
-                            # Append the final determined history message
-                            # <<< ADD DEBUG LOG 2 >>>
-                            logger.debug(f"[DEBUG] tool_content_for_history BEFORE ToolMessage creation (first 300 chars):\n{str(tool_content_for_history)[:300]}")
-                            tool_messages.append(
-                                ToolMessage(content=tool_content_for_history, tool_call_id=tool_call_id)
-                            )
-                            last_failed_tool_info = {k: v for k, v in last_failed_tool_info.items() if v.get('id') != tool_call_id} if last_failed_tool_info else None
-
-                            # Check if condensation is needed after this successful add
-                            if content_added_this_call:
-                                content_added_since_last_condense += 1
-                                if content_added_since_last_condense >= condense_frequency:
-                                    needs_condensation = True # Trigger after loop
-
-                        except McpError as mcp_exc:
-                            error_summary = f"MCP Tool Error: {tool_name} failed. Reason: {str(mcp_exc)}"[:500]
-                            # Check for specific invalid arguments error code
-                            # <<< ADD LOGGING TO CHECK CORRECTION TRIGGER >>>
-                            logger.info(f"Caught McpError for {tool_name}. Code: {mcp_exc.args[0].get('code') if mcp_exc.args and isinstance(mcp_exc.args[0], dict) else 'N/A'}. Checking if it's -32602...")
-                            # Check for specific invalid arguments error code
-                            is_invalid_args_error = False
-                            if mcp_exc.args and isinstance(mcp_exc.args[0], dict) and mcp_exc.args[0].get('code') == -32602:
-                                is_invalid_args_error = True
-                                logger.info(f"Detected search_abstracts validation error. Attempting specialized correction.")
+                                        logger.error(f"Failed to summarize content for {source_desc}: {e}", exc_info=True)
+                                        truncated_output = output_str[:10000] + "... [Content truncated due to summarization error]" if len(output_str) > 10000 else output_str
+                                        # --- MODIFIED ERROR ACCUMULATION ---
+                                        # Store truncated raw content when summarization fails
+                                        full_content_to_add = output_str # Specific for web extraction
+                                        # Use the already truncated version for the summary part in case of error
+                                        summary_fallback = truncated_output
+                                        accumulated_content += (
+                                            f"\n\n--- BEGIN FAILED-SUMMARY CONTENT from {source_desc} ---\n"
+                                            f"--- Full Content ---\n"
+                                            f"{full_content_to_add}\n"
+                                            f"--- END FAILED-SUMMARY CONTENT from {source_desc} ---\n\n"
+                                        )
+                                        # --- END MODIFICATION ---
+                                        logger.warning(f"Using truncated raw content as summary fallback, but stored full content for final report for {source_desc}")
+                                        processed_successfully = False # Summarization failed, treat as not fully processed
                             
-                            if is_invalid_args_error:
-                                logger.warning(f"Detected invalid arguments error for {tool_name}. Attempting correction.")
+                            # --- Process Reddit Search List --- #
+                            elif is_reddit_search_list and isinstance(output_str, str) and "Searched Reddit for" in output_str:
+                                # Pass the #main-content HTML/text directly to the summarizer for table extraction.
                                 try:
-                                    # First try direct correction without LLM for efficiency
-                                    direct_correction = self._try_direct_correction(
-                                        tool_name=tool_name, 
-                                        failed_args=tool_args,
-                                        error_message=str(mcp_exc)
+                                    table_md = await self.content_manager.summarize_search_results_as_table(
+                                        output_str,  # This should be the HTML/text of #main-content
+                                        top_n=5,
+                                        callbacks=self.callbacks,
+                                        prompt_instructions="Extract a markdown table of Reddit search results with columns: Title, URL, Subreddit, Comment Count."
                                     )
-                                    
-                                    if direct_correction:
-                                        logger.info(f"Direct correction applied for {tool_name}: {direct_correction}")
-                                        corrected_args_json = direct_correction
+                                    header = f"--- Reddit Search Results Table ---"
+                                    accumulated_content += f"\n\n{header}\n{table_md}\n--- End Reddit Search Results Table ---\n"
+                                    tool_content_for_history = table_md
+                                    logger.info("Added markdown table of Reddit search results to accumulated_content and scratchpad (via summarizer).")
+                                except Exception as e:
+                                    accumulated_content += f"\n\n--- Reddit Search Results (raw) ---\n{output_str}\n--- End Reddit Search Results ---\n"
+                                    tool_content_for_history = output_str
+                                    logger.warning(f"Could not summarize Reddit search results, added raw output instead: {e}")
+
+                            # --- Process Web Search List --- #
+                            # Use the flag set earlier to identify this case
+                            elif is_web_search_list_output:
+                                # We already stored the raw list in raw_tool_output 
+                                
+                                # --- Process the list directly --- 
+                                table_rows = []
+                                try:
+                                    # Use raw_tool_output which is guaranteed to be a list here
+                                    logger.info(f"Processing web search results list with {len(raw_tool_output)} results.") 
+                                    results_list = raw_tool_output 
+                                    if not results_list:
+                                        logger.warning("Search results list is empty.")
+                                        tool_content_for_history = "Success: Retrieved search results, but the list was empty."
                                     else:
-                                        # If direct correction failed, try LLM-based correction
-                                        corrected_args_json = await self._get_tool_correction_suggestion(
-                                            tool_name=tool_name, 
-                                            failed_args=tool_args,
-                                            error_message=str(mcp_exc),
-                                            run_config=run_config
+                                        # --- Generate Markdown Table --- 
+                                        table_header = "| # | Title (URL) | Snippet |\n|---|---|---|"
+                                        for i, result_data in enumerate(results_list):
+                                            title = result_data.get('title', '') or '' # Default to empty string if None
+                                            link = result_data.get('link', '') or ''   # Default to empty string if None
+                                            snippet = result_data.get('snippet', '') or '' # Default to empty string if None
+                                            # Escape pipes for Markdown
+                                            title_md = title.replace('|', '\\|')
+                                            link_md = link.replace('|', '\\|')
+                                            # Limit snippet length in table for readability
+                                            snippet_md = snippet.replace('|', '\\|')[:200] + ("..." if len(snippet) > 200 else "")
+                                            table_rows.append(f"| {i+1} | [{title_md}]({link_md}) | {snippet_md} |")
+                                        
+                                        # Create the markdown table with proper newlines
+                                        markdown_table = table_header + "\n" + "\n".join(table_rows)
+                                        
+                                        # Include the table directly in the history message content
+                                        tool_content_for_history = (
+                                            f"Success: Retrieved and processed {len(results_list)} search results for "
+                                            f"'{tool_args.get('query', 'N/A')}':\n\n"
+                                            f"{markdown_table}"
                                         )
-                                    
-                                    if corrected_args_json:
-                                        error_summary += f"\n\n[Correction Suggestion]:\n```json\n{json.dumps(corrected_args_json, indent=2)}\n```"
-                                        logger.info(f"Successfully added correction suggestion for {tool_name} to error message.")
+                                        # <<< ADD DEBUG LOG 1 >>>
+                                        logger.debug(f"[DEBUG] tool_content_for_history AFTER table assignment (first 300 chars):\n{str(tool_content_for_history)[:300]}")
                                         
-                                        # Store the fact that this tool was corrected once
-                                        if not hasattr(self, '_corrected_tools'):
-                                            self._corrected_tools = set()
-                                        self._corrected_tools.add(tool_name)
-                                    else:
-                                        # If no correction could be generated but tool has been corrected before,
-                                        # treat this as "no content" instead of an error
-                                        if hasattr(self, '_corrected_tools') and tool_name in self._corrected_tools:
-                                            logger.warning(f"Tool {tool_name} already had one correction attempt. Treating as no content.")
-                                            error_summary = f"No content available from {tool_name}. Moving on to the next research step."
-                                            # Don't increment consecutive errors for this case
-                                            tool_messages.append(
-                                                ToolMessage(content=error_summary, tool_call_id=tool_call_id)
-                                            )
-                                            continue
-                                        else:
-                                            logger.warning(f"No valid correction suggestion generated for {tool_name}.")
-                                except Exception as correction_err:
-                                    logger.error(f"Error during correction process for {tool_name}: {correction_err}", exc_info=True)
-                                    # error_summary remains the original error
-                            else:
-                                # Log non-argument MCP errors normally
-                                logger.error(f"MCP Tool Error: {error_summary}", exc_info=False)
+                                        # Add detailed results to accumulated content
+                                        # accumulated_content += f"..." # Removed line
+                                        logger.info(f"Processed markdown table with {len(results_list)} search results (content NOT added to accumulated_content).") # Modified log message
+                                        # content_added_this_call = True # Search results should not trigger condensation
                                 
-                            # Append the (potentially enhanced) error summary
-                            tool_messages.append(
-                                ToolMessage(content=error_summary, tool_call_id=tool_call_id)
-                            )
-                            last_failed_tool_info = {"name": tool_name, "args": tool_args, "id": tool_call_id, "error": error_summary}
+                                except Exception as e:
+                                     # Keep the generic error handling for parsing the list itself
+                                     logger.error(f"Unexpected error processing web search results list: {e}", exc_info=_log_traceback)
+                                     tool_content_for_history = f"Error: Failed to process web search results list: {e}"
+                            else:
+                                # Default case for other internal tools we don't have special handling for
+                                if output_str:
+                                    accumulated_content += f"\n\n--- Output from {tool_name} ---\n{output_str}\n--- End Output ---\n"
+                                    # Make the output retrievable for follow-up questions
+                                    output_source = tool_args.get('url') if isinstance(tool_args, dict) and tool_args.get('url') else tool_name
+                                    self.content_manager.index_text(output_source, output_str, title=f"Output from {tool_name}", source_type=tool_name)
+                                    tool_content_for_history = f"Success: {tool_name} executed. [Output length: {len(str(output_str))}]"
+                                    content_added_this_call = True
+                                else:
+                                    tool_content_for_history = f"Warning: {tool_name} returned empty output after extraction."
+                        else:
+                            # --- Process Generic MCP Tool Output --- #
+                            logger.info(f"Processing generic MCP tool output for {tool_name}")
                             
-                        except Exception as tool_exc:
-                            # --- Summarize Error for Scratchpad --- 
-                            error_summary = f"Tool Execution Error: {tool_name} failed. Reason: {str(tool_exc)}"[:500]
-                            logger.error(error_summary, exc_info=_log_traceback)
-                            tool_messages.append(
-                                ToolMessage(content=error_summary, tool_call_id=tool_call_id)
-                            )
+                            # Extract function name from tool if available
+                            function_name = None
+                            if isinstance(tool_args, dict) and 'action' in tool_args:
+                                function_name = tool_args['action']
+                            elif isinstance(tool_args, dict) and 'function' in tool_args:
+                                function_name = tool_args['function']
+                            
+                            # Store content with tool name, function name, and parameters
+                            mcp_content_data = {
+                                "full_content": output_str,
+                                "title": f"MCP Tool Output from {tool_name}",
+                                "tool_name": tool_name,
+                                "function_name": function_name,
+                                "tool_args": tool_args
+                            }
+                            # Keyed by the call itself (tool, function, arguments) so a repeated call is served from the store
+                            if output_str:
+                                mcp_content_id = self._mcp_content_id(tool_name, tool_args)
+                                self.content_manager.store_content(mcp_content_id, mcp_content_data, source_type=tool_name)
+
+                        # Append the final determined history message
+                        # <<< ADD DEBUG LOG 2 >>>
+                        logger.debug(f"[DEBUG] tool_content_for_history BEFORE ToolMessage creation (first 300 chars):\n{str(tool_content_for_history)[:300]}")
+                        tool_messages.append(
+                            ToolMessage(content=tool_content_for_history, tool_call_id=tool_call_id)
+                        )
+                        last_failed_tool_info = {k: v for k, v in last_failed_tool_info.items() if v.get('id') != tool_call_id} if last_failed_tool_info else None
+
+                        # Check if condensation is needed after this successful add
+                        if content_added_this_call:
+                            content_added_since_last_condense += 1
+                            if content_added_since_last_condense >= condense_frequency:
+                                needs_condensation = True # Trigger after loop
+
+                    except McpError as mcp_exc:
+                        error_summary, is_failure = await self._summarize_mcp_error(tool_name, tool_args, mcp_exc, run_config)
+                        tool_messages.append(
+                            ToolMessage(content=error_summary, tool_call_id=tool_call_id)
+                        )
+                        if is_failure:
                             last_failed_tool_info = {"name": tool_name, "args": tool_args, "id": tool_call_id, "error": error_summary}
 
-                    elif not is_immediate_retry:
-                        logger.warning(f"Tool '{tool_name}' requested but not found in available tools.")
+                    except Exception as tool_exc:
+                        # --- Summarize Error for Scratchpad --- 
+                        error_summary = f"Tool Execution Error: {tool_name} failed. Reason: {str(tool_exc)}"[:500]
+                        logger.error(error_summary, exc_info=_log_traceback)
                         tool_messages.append(
-                            ToolMessage(content=f"Error: Tool '{tool_name}' not found.", tool_call_id=tool_call_id)
+                            ToolMessage(content=error_summary, tool_call_id=tool_call_id)
                         )
+                        last_failed_tool_info = {"name": tool_name, "args": tool_args, "id": tool_call_id, "error": error_summary}
+
+                # Restore the order in which the LLM requested the calls
+                tool_messages = self._order_tool_messages(tool_messages, tool_calls_to_execute)
 
                 # Add all tool messages (results or errors) to history AFTER processing all calls
                 if tool_messages:
@@ -2057,7 +2199,7 @@ class ResearcherAgent:
                     logger.debug(f"History after adding tool messages (length {len(history)}): {[msg.pretty_repr() for msg in history[-len(tool_messages):]]}")
 
                 # Update consecutive errors based on the results of *this batch* of tool calls
-                if all(msg.content.startswith("Error") for msg in tool_messages if msg.content): # Check if all non-empty results were errors
+                if all(msg.content.startswith(TOOL_ERROR_PREFIXES) for msg in tool_messages if msg.content): # Check if all non-empty results were errors
                      consecutive_errors += 1
                 else:
                      consecutive_errors = 0 # Reset if at least one tool succeeded
@@ -2088,40 +2230,9 @@ class ResearcherAgent:
             if needs_condensation:
                 logger.info(f"Condensation triggered after {content_added_since_last_condense} content additions.")
                 try:
-                    # Split content into "previous content" and "most recent content"
-                    # This assumes content is being appended with newlines between sections
-                    content_parts = accumulated_content.split("\n\n")
-                    
-                    if len(content_parts) > 1:
-                        # Get the most recent content section (the last part)
-                        most_recent_content = content_parts[-1]
-                        # Get all previous content (everything except the last part)
-                        previous_content = "\n\n".join(content_parts[:-1])
-                        
-                        logger.info(f"Separating content: Previous content size: {len(previous_content)} chars, Most recent: {len(most_recent_content)} chars")
-                        
-                        # Only condense if there's enough previous content to work with
-                        if len(previous_content) > 200:
-                            # Condense only the previous content
-                            condense_input = {"text": previous_content}
-                            condensed_response = await self.condensation_chain.ainvoke(condense_input, config=run_config)
-                            condensed_previous_content = condensed_response.content
-                            
-                            # Combine condensed previous content with most recent content
-                            condensed_content_for_prompt = f"{condensed_previous_content}\n\n# Most Recent Content:\n\n{most_recent_content}"
-                            
-                            logger.info(f"Successfully condensed previous content. Previous content condensed from {len(previous_content)} to {len(condensed_previous_content)} chars. Combined length with recent content: {len(condensed_content_for_prompt)}")
-                        else:
-                            # If previous content is too small, just use the full accumulated content as is
-                            logger.info(f"Previous content too small ({len(previous_content)} chars). Using full content without condensation.")
-                            condensed_content_for_prompt = accumulated_content
-                    else:
-                        # If content can't be split (only one part), just condense it all
-                        logger.info(f"Content cannot be separated. Condensing entire content ({len(accumulated_content)} chars).")
-                        condense_input = {"text": accumulated_content}
-                        condensed_response = await self.condensation_chain.ainvoke(condense_input, config=run_config)
-                        condensed_content_for_prompt = condensed_response.content
-                        logger.info(f"Successfully condensed entire content. New condensed length: {len(condensed_content_for_prompt)}")
+                    # Condense only the content added since the last condensation and merge it into the rolling state
+                    condensed_content_for_prompt = await condenser.condense(accumulated_content, config=run_config)
+                    logger.info(f"Condensed content for prompt: {len(condensed_content_for_prompt)} chars (accumulated: {len(accumulated_content)} chars, {len(condenser.segments)} condensed segments).")
                     
                     # Reset counter as condensation was performed
                     content_added_since_last_condense = 0
@@ -2939,6 +3050,27 @@ class ResearcherAgent:
             
         return "\n".join(token_table)
 
+    def _final_summary_content_budget(self) -> int:
+        """Token budget for research content in the final report prompt.
+
+        FINAL_SUMMARY_CONTENT_BUDGET, capped at what fits the final summary model's context window
+        next to the prompt and the report itself (0 = the window alone). Never less than
+        MIN_FINAL_SUMMARY_CONTENT_BUDGET, since pack_content treats 0 as no limit.
+        """
+        budget = FINAL_SUMMARY_CONTENT_BUDGET
+        capabilities = get_llm_capabilities(self.final_summary_llm)
+        if capabilities.provider != "unknown":
+            window_budget = capabilities.context_window - FINAL_SUMMARY_MAX_TOKENS - get_token_count_for_text(SUMMARY_PROMPT)
+            if window_budget < MIN_FINAL_SUMMARY_CONTENT_BUDGET:
+                logger.warning(
+                    f"Context window of {get_model_name(self.final_summary_llm)} ({capabilities.context_window} tokens) leaves {window_budget} tokens "
+                    f"for research content next to FINAL_SUMMARY_MAX_TOKENS={FINAL_SUMMARY_MAX_TOKENS}; "
+                    f"packing {MIN_FINAL_SUMMARY_CONTENT_BUDGET} tokens instead"
+                )
+                window_budget = MIN_FINAL_SUMMARY_CONTENT_BUDGET
+            budget = min(budget, window_budget) if budget > 0 else window_budget
+        return budget
+
     async def _summarize_content(self, topic: str, content: str) -> str:
         """Summarize the provided content using the primary LLM and SUMMARY_PROMPT."""
         if not self.final_summary_llm: 
@@ -2946,7 +3078,9 @@ class ResearcherAgent:
             return "[Summary generation failed: Primary LLM not available]"
         logger.info(f"Attempting final summarization using PRIMARY LLM and SUMMARY_PROMPT for topic: '{topic}'")
         try:
-            prompt_str = SUMMARY_PROMPT.format(topic=topic, accumulated_content=content)
+            # Drop repeated passages and keep the most relevant sections within the token budget
+            packed = await asyncio.to_thread(pack_content, content, topic, self._final_summary_content_budget())
+            prompt_str = SUMMARY_PROMPT.format(topic=topic, accumulated_content=packed.text)
             messages = [HumanMessage(content=prompt_str)]
             callbacks = getattr(self, 'callbacks', None)
             # Pass tags to suppress callback handler message
@@ -3075,9 +3209,10 @@ class ResearcherAgent:
 
 
                 if urls_to_fetch:
-                    async with aiohttp.ClientSession() as session:
-                        tasks = [self._fetch_url_title(session, u) for u in urls_to_fetch]
-                        titles = await asyncio.gather(*tasks, return_exceptions=True)
+                    # Shared pooled session (per-host limits, DNS cache) instead of a new session per report
+                    session = http_clients.get_aiohttp_session()
+                    tasks = [self._fetch_url_title(session, u) for u in urls_to_fetch]
+                    titles = await asyncio.gather(*tasks, return_exceptions=True)
 
                     processed_urls = set()
                     title_map = {}
@@ -5,7 +5,7 @@ import logging
 logger = logging.getLogger(__name__)
 import json
 import random # <-- Added import
-from typing import Any, Dict, List, Type, Optional, Callable, Awaitable, Union, TypeVar
+from typing import Any, Dict, List, Set, Type, Optional, Callable, Awaitable, Union, TypeVar
 import io # For handling bytes data with pymupdf
 import os # Added import
 import re # <-- Moved import here
@@ -14,6 +14,8 @@ from datetime import datetime
 import tempfile
 import urllib.parse
 import httpx # <<< Added import
+from src.http_clients import http_clients
+from src.search_cache import get_search_cache
 
 # --- Tiktoken setup --- 
 import tiktoken
@@ -51,10 +53,9 @@ def get_token_count_for_text(text: str) -> int:
 
 from playwright.async_api import async_playwright, Page, Browser, Playwright, Response, BrowserContext, TimeoutError, Error # Import BrowserContext
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
-from readability import Document # Using readability-lxml
-import markdownify # For converting HTML to Markdown
-import pymupdf  # PyMuPDF's import name is now pymupdf, not fitz
+from pydantic import BaseModel, Field, PrivateAttr
+from src.extraction_pool import extraction_pool
+from src.pdf_extractor import PAGE_BREAK, aextract_content_from_pdf
 import aiofiles
 from bs4 import BeautifulSoup
 # from src.content_manager import ContentManager # Remove direct import
@@ -65,7 +66,15 @@ from config.settings import (
     USE_PROGRESSIVE_LOADING,
     USE_CAPTCHA_SOLVER,
     TRACK_TOKEN_USAGE,
-    TOTAL_EXTRACTION_TIMEOUT
+    TOTAL_EXTRACTION_TIMEOUT,
+    PAGE_READINESS_POLICIES,
+    PAGE_READINESS_TIMEOUT,
+    ENABLE_HTTP_FAST_PATH,
+    HTTP_FAST_PATH_TIMEOUT,
+    HTTP_FAST_PATH_MIN_CHARS,
+    HTTP_FAST_PATH_BROWSER_DOMAINS,
+    HTTP_FAST_PATH_FAILURES_BEFORE_BROWSER,
+    HTTP_FAST_PATH_BROWSER_TTL,
 )
 
 # Import BaseCallbackHandler for type hinting
@@ -85,134 +94,9 @@ except ImportError:
 if not USE_CAPTCHA_SOLVER:
     logger.info("Automatic CAPTCHA solving is disabled via configuration")
 
-def extract_content_from_html(html: str) -> dict:
-    """Extracts the main content from HTML using readability and converts to Markdown."""
-    try:
-        doc = Document(html)
-        title = doc.title()
-        content_html = doc.summary(html_partial=True)
-        # Convert to Markdown, maybe simplify structure slightly
-        content_md = markdownify.markdownify(content_html, heading_style="ATX")
-
-        # Removed section/toc extraction
-
-        return {
-            "title": title,
-            "full_content": f"# {title}\n\n{content_md}",
-            # "toc": toc, # Removed
-            # "sections": sections # Removed
-        }
-    except Exception as e:
-        logger.warning(f"Readability/Markdownify failed: {e}", exc_info=True)
-        # Fallback: return error as structured response
-        return {
-            "title": "Error during extraction",
-            "full_content": "Error during HTML content extraction.",
-            # "toc": ["Error"], # Removed
-            # "sections": {"Error": "Error during HTML content extraction."} # Removed
-        }
-
 # Replace old _estimate_tokens with tiktoken wrapper
 _estimate_tokens = get_token_count_for_text
 
-def extract_content_from_pdf(pdf_bytes: bytes) -> dict:
-    """Extracts text content from PDF bytes using PyMuPDF."""
-    try:
-        text_content = ""
-        token_count = 0
-        has_images = False
-        image_count = 0
-        text_blocks_count = 0
-        
-        logger.info("Starting PDF content extraction")
-        start_time = time.time()
-        
-        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
-            # Get PDF metadata
-            pdf_size_kb = len(pdf_bytes) / 1024
-            total_pages = len(doc)
-            logger.info(f"Processing PDF: {total_pages} pages, {pdf_size_kb:.1f} KB")
-            
-            # Extract text by page
-            page_texts = []
-            for page_num in range(total_pages):
-                page = doc.load_page(page_num)
-                
-                # Check for images on the page
-                page_images = page.get_images(full=True)
-                if len(page_images) > 0:
-                    has_images = True
-                    image_count += len(page_images)
-                
-                # Get text blocks to determine if it's a text-based or image-based PDF
-                blocks = page.get_text("blocks")
-                text_blocks_count += len(blocks)
-                
-                # Extract page text
-                page_text = page.get_text()
-                page_texts.append(page_text)
-                text_content += page_text
-                
-                # Add page break marker between pages
-                if page_num < total_pages - 1:
-                    text_content += "\n\n--- Page Break ---\n\n"
-                
-                # Log every 10 pages for large documents
-                if page_num > 0 and page_num % 10 == 0:
-                    # Estimate running total for logging purposes only
-                    current_token_estimate = get_token_count_for_text(text_content)
-                    logger.debug(f"Extracted {page_num}/{total_pages} PDF pages (~{current_token_estimate} tokens)")
-
-        # Basic cleanup (optional)
-        text_content = ' \n'.join([line.strip() for line in text_content.splitlines() if line.strip()])
-        
-        # Detect if PDF is likely scanned/image-based with little text
-        is_mostly_images = False
-        if has_images and (
-            text_blocks_count < total_pages * 3 or  # Few text blocks per page
-            len(text_content.strip()) < 100 * total_pages  # Very little text per page
-        ):
-            is_mostly_images = True
-            logger.warning(f"PDF appears to be primarily image-based: {image_count} images, {text_blocks_count} text blocks, {len(text_content)} chars in {total_pages} pages")
-        
-        # Final token count for the cleaned content using tiktoken
-        final_token_count = get_token_count_for_text(text_content)
-        
-        # Log extraction time
-        extraction_time = time.time() - start_time
-        logger.info(f"PDF extraction complete: {total_pages} pages, {final_token_count} tokens in {extraction_time:.2f}s")
-
-        # If PDF is empty or mostly images, return appropriate message
-        if not text_content.strip():
-            return {
-                "title": "PDF Document (Empty)",
-                "full_content": "(PDF content appears empty or could not be extracted)",
-                "toc": ["Empty Document"],
-                "sections": {"Empty Document": "(PDF content appears empty or could not be extracted)"}
-            }
-        elif is_mostly_images:
-            return {
-                "title": "PDF Document (Primarily Images)",
-                "full_content": f"# PDF Content (Primarily Image-Based)\n\nThis PDF appears to be primarily image-based or scanned. Limited text extracted:\n\n{text_content}",
-                "toc": ["Image-Based PDF"],
-                "sections": {"Image-Based PDF": f"This PDF contains {image_count} images and appears to be scanned or primarily graphics-based. Limited text could be extracted."}
-            }
-
-        return {
-            "title": "PDF Document",
-            "full_content": f"# PDF Content\n\n{text_content}",
-            "toc": ["PDF Content"],
-            "sections": {"PDF Content": text_content}
-        }
-    except Exception as e:
-        logger.error(f"PyMuPDF failed to extract text from PDF: {e}", exc_info=True)
-        return {
-            "title": "Error during PDF extraction",
-            "full_content": f"Error during PDF content extraction: {str(e)}",
-            "toc": ["Error"],
-            "sections": {"Error": f"Error during PDF content extraction: {str(e)}"}
-        }
-
 async def handle_captcha(page: Page, chainlit_callback: Optional[ChainlitCallbackHandler] = None):
     """Handles CAPTCHA detection and solving, using Chainlit UI for manual intervention.
     
@@ -379,6 +263,140 @@ async def handle_captcha(page: Page, chainlit_callback: Optional[ChainlitCallbac
              logger.error(f"Error waiting for console input after generic error: {input_e}")
              return False
 
+# --- HTTP Fast Path --- #
+# Static pages (blogs, docs, Wikipedia) give the same readability output from the raw HTML as from a
+# rendered tab, so they are fetched with a pooled HTTP client first. Playwright is only used when the
+# response is empty, blocked or JS-gated, or when the domain is known to need a browser.
+
+# User-Agent and Accept-Language come from the shared client defaults (src/http_clients.py)
+FAST_PATH_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,application/pdf;q=0.8,*/*;q=0.7',
+}
+
+# Markers of pages that only render (or pass a bot check) with JavaScript
+JS_GATE_MARKERS = (
+    "enable javascript",
+    "javascript is required",
+    "javascript is disabled",
+    "please turn on javascript",
+    "cf-browser-verification",
+    "challenge-platform",
+    "just a moment...",
+    "checking your browser",
+    "g-recaptcha",
+    "h-captcha",
+)
+
+# Domains that always need a real browser (from config)
+NEEDS_BROWSER_DOMAINS: Set[str] = set(HTTP_FAST_PATH_BROWSER_DOMAINS)
+# Learned at runtime: consecutive fast path failures per host, and when a host was switched to the browser
+FAST_PATH_FAILURES: Dict[str, int] = {}
+LEARNED_BROWSER_HOSTS: Dict[str, float] = {}
+
+http_fast_path_stats = {"hits": 0, "fallbacks": 0, "skipped": 0}
+
+def _fast_path_host(url: str) -> str:
+    host = (urllib.parse.urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _domain_needs_browser(url: str) -> bool:
+    host = _fast_path_host(url)
+    if any(host == domain or host.endswith("." + domain) for domain in NEEDS_BROWSER_DOMAINS):
+        return True
+    marked_at = LEARNED_BROWSER_HOSTS.get(host)
+    if marked_at is None:
+        return False
+    if time.monotonic() - marked_at < HTTP_FAST_PATH_BROWSER_TTL:
+        return True
+    # Expired: give the fast path another chance (sites fix their rendering, bot checks come and go)
+    del LEARNED_BROWSER_HOSTS[host]
+    return False
+
+
+def _mark_needs_browser(url: str, reason: str):
+    """Count a fast path failure; after repeated failures the host uses the browser until the TTL ends."""
+    host = _fast_path_host(url)
+    if not host:
+        return
+    failures = FAST_PATH_FAILURES.get(host, 0) + 1
+    if failures < HTTP_FAST_PATH_FAILURES_BEFORE_BROWSER:
+        FAST_PATH_FAILURES[host] = failures
+        logger.debug(f"HTTP fast path failure {failures} for {host} ({reason})")
+        return
+    FAST_PATH_FAILURES.pop(host, None)
+    LEARNED_BROWSER_HOSTS[host] = time.monotonic()
+    logger.info(f"HTTP fast path: marking {host} as needing a browser for {HTTP_FAST_PATH_BROWSER_TTL}s after {failures} failures ({reason})")
+
+
+async def fetch_content_over_http(url: str, on_pdf_page: Optional[Callable[[Any], None]] = None) -> Optional[dict]:
+    """Try to extract a page with a plain HTTP GET instead of a browser tab.
+
+    Args:
+        url: The URL to fetch.
+        on_pdf_page: Optional callback receiving each page of a PDF response as it is parsed.
+
+    Returns:
+        Extracted data dict (title, full_content) on success, or None if the page should be
+        loaded with Playwright instead.
+    """
+    if not ENABLE_HTTP_FAST_PATH:
+        return None
+    if _domain_needs_browser(url):
+        http_fast_path_stats["skipped"] += 1
+        logger.debug(f"HTTP fast path skipped for {url}: domain needs a browser")
+        return None
+
+    start_time = time.monotonic()
+    try:
+        response = await http_clients.fetch(url, headers=FAST_PATH_HEADERS, timeout=HTTP_FAST_PATH_TIMEOUT)
+    except Exception as e:
+        logger.info(f"HTTP fast path fetch failed for {url}: {e}. Falling back to browser.")
+        http_fast_path_stats["fallbacks"] += 1
+        return None
+
+    if response.status_code in (401, 403, 429, 503):
+        # Typical bot protection responses; the browser usually gets through
+        _mark_needs_browser(url, f"HTTP {response.status_code}")
+        http_fast_path_stats["fallbacks"] += 1
+        return None
+    if not response.is_success:
+        logger.info(f"HTTP fast path got status {response.status_code} for {url}. Falling back to browser.")
+        http_fast_path_stats["fallbacks"] += 1
+        return None
+
+    content_type = response.headers.get("content-type", "").lower()
+    extracted_data = None
+    js_gated = False
+    if 'application/pdf' in content_type:
+        extracted_data = await aextract_content_from_pdf(response.content, on_page=on_pdf_page)
+    elif 'text/html' in content_type or 'application/xhtml+xml' in content_type:
+        html = response.text
+        # Markers alone are not conclusive (e.g. a reCAPTCHA comment form under a full article),
+        # so they only explain a fallback when extraction also comes up short
+        js_gated = any(marker in html[:20000].lower() for marker in JS_GATE_MARKERS)
+        extracted_data = await extraction_pool.extract_html(html)
+    elif 'text/plain' in content_type:
+        extracted_data = {"title": f"Plain Text from {url}", "full_content": response.text}
+    else:
+        logger.info(f"HTTP fast path does not handle content type '{content_type}' for {url}. Falling back to browser.")
+        http_fast_path_stats["fallbacks"] += 1
+        return None
+
+    full_content = (extracted_data or {}).get("full_content", "")
+    title = (extracted_data or {}).get("title", "")
+    body_length = len(full_content) - len(f"# {title}\n\n")
+    if not full_content or full_content.startswith("Error") or body_length < HTTP_FAST_PATH_MIN_CHARS:
+        # Probably rendered client-side or bot-checked; repeated failures send the domain straight to the browser
+        _mark_needs_browser(url, "JS-gated or bot check page" if js_gated else f"only {max(body_length, 0)} chars extracted")
+        http_fast_path_stats["fallbacks"] += 1
+        return None
+
+    FAST_PATH_FAILURES.pop(_fast_path_host(url), None)
+    http_fast_path_stats["hits"] += 1
+    logger.info(f"HTTP fast path extracted {len(full_content)} chars from {url} in {time.monotonic() - start_time:.2f}s")
+    return extracted_data
+
 # --- Tool Input Schemas --- #
 
 class NavigateInput(BaseModel):
@@ -436,7 +454,6 @@ class PlaywrightBrowserTool(BaseTool):
     last_response: Optional[Response] = None
     last_extracted_content: Optional[dict] = None
     last_search_query: Optional[str] = None
-    search_results_cache: Dict[str, List[Dict[str, str]]] = {}
     captcha_challenger: Optional[Any] = None
     # Add field for Chainlit callback handler
     chainlit_callback: Optional[Any] = None # Use Any for now to avoid circular import
@@ -475,7 +492,6 @@ class PlaywrightBrowserTool(BaseTool):
         self.last_response = None
         self.last_extracted_content = None
         self.last_search_query = None
-        self.search_results_cache = {}
         self.captcha_challenger = None # Initialize here
 
         # --- Store provided arguments ---
@@ -512,12 +528,18 @@ class PlaywrightBrowserTool(BaseTool):
     last_response: Optional[Response] = Field(None, exclude=True)
     last_extracted_content: Optional[dict] = Field(None, exclude=True)
     last_search_query: Optional[str] = Field(None, exclude=True)
-    search_results_cache: Dict[str, List[Dict[str, str]]] = Field(default_factory=dict, exclude=True)
     captcha_challenger: Optional[Any] = Field(None, exclude=True)
+    # Serializes browser/context setup when several tool calls run concurrently
+    _setup_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
     # --- End Pydantic field declarations ---
 
     async def _ensure_browser_running(self):
         """Initializes Playwright, browser, and context if not already running by using the BrowserManager singleton."""
+        async with self._setup_lock:
+            await self._ensure_browser_running_locked()
+
+    async def _ensure_browser_running_locked(self):
+        """Body of _ensure_browser_running; must be called with _setup_lock held."""
         from src.browser_manager import browser_manager  # Import here to avoid circular imports
         browser_valid = False
         if self.is_running and self.browser:
@@ -555,6 +577,105 @@ class PlaywrightBrowserTool(BaseTool):
             self.context.on("close", lambda _: _on_context_close())
             logger.info("Browser context created.")
 
+    @staticmethod
+    def _readiness_policy(url: str) -> str:
+        """Look up the readiness mode ("static", "adaptive" or "human") for a URL's domain.
+
+        Keys of PAGE_READINESS_POLICIES match the hostname and its subdomains
+        (e.g. "google.com" also covers "scholar.google.com").
+        """
+        host = (urllib.parse.urlparse(url).hostname or "").lower()
+        best_match = None
+        for domain in PAGE_READINESS_POLICIES:
+            if domain == "default":
+                continue
+            if host == domain or host.endswith("." + domain):
+                if best_match is None or len(domain) > len(best_match):
+                    best_match = domain
+        if best_match:
+            return PAGE_READINESS_POLICIES[best_match]
+        return PAGE_READINESS_POLICIES.get("default", "adaptive")
+
+    async def _wait_for_dom_quiescence(self, page: Page, quiet_ms: int, timeout_ms: int) -> dict:
+        """Wait until the DOM has had no mutations for quiet_ms (or timeout_ms elapsed).
+
+        Returns:
+            Dict with 'settled', 'elapsed' (ms), 'text_length', 'has_article' and 'scrollable' from the page.
+        """
+        return await page.evaluate(
+            """({quietMs, timeoutMs}) => new Promise(resolve => {
+                const start = performance.now();
+                let lastMutation = start;
+                const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+                observer.observe(document.documentElement || document, {childList: true, subtree: true, characterData: true});
+                const check = () => {
+                    const now = performance.now();
+                    const settled = now - lastMutation >= quietMs;
+                    if (settled || now - start >= timeoutMs) {
+                        observer.disconnect();
+                        const body = document.body;
+                        resolve({
+                            settled: settled,
+                            elapsed: Math.round(now - start),
+                            text_length: body ? (body.innerText || '').length : 0,
+                            has_article: !!document.querySelector('article, main [itemprop="articleBody"], [role="main"] article'),
+                            scrollable: body ? body.scrollHeight > window.innerHeight * 1.5 : false,
+                        });
+                    } else {
+                        setTimeout(check, 100);
+                    }
+                };
+                setTimeout(check, 100);
+            })""",
+            {"quietMs": quiet_ms, "timeoutMs": timeout_ms},
+        )
+
+    async def _wait_for_page_ready(self, page: Page, url: str, content_type: Optional[str] = None):
+        """Wait until a page is ready for extraction, using the per-domain readiness policy.
+
+        - PDFs and other non-HTML responses are extracted immediately.
+        - "static": no wait beyond domcontentloaded.
+        - "adaptive": wait for the DOM to stop changing; scroll once only if the page looks
+          lazy-loaded (little text, no article element, scrollable), then wait for quiescence again.
+        - "human": the original human-like scroll with network idle wait, for bot-sensitive domains.
+        """
+        if content_type and not ('text/html' in content_type or 'application/xhtml+xml' in content_type):
+            logger.info(f"Skipping readiness wait for non-HTML content ({content_type}): {url}")
+            return
+
+        policy = self._readiness_policy(url)
+        if policy == "human":
+            await self._human_like_scroll(page)
+            return
+        if policy == "static":
+            logger.info(f"Readiness policy 'static' for {url}. Extracting immediately.")
+            return
+
+        start_time = asyncio.get_event_loop().time()
+        timeout_ms = int(PAGE_READINESS_TIMEOUT * 1000)
+        try:
+            probe = await self._wait_for_dom_quiescence(page, quiet_ms=500, timeout_ms=timeout_ms)
+            logger.info(f"DOM quiescence probe for {url}: {probe}")
+
+            # Static/article pages already have their readable text; only lazy-loaded pages need a scroll
+            needs_scroll = probe.get("scrollable") and not probe.get("has_article") and probe.get("text_length", 0) < 2000
+            if needs_scroll:
+                remaining_ms = timeout_ms - probe.get("elapsed", 0)
+                if remaining_ms > 500:
+                    logger.info(f"Page looks lazy-loaded ({probe.get('text_length')} chars). Scrolling once to trigger loading.")
+                    await page.evaluate("window.scrollTo({ top: document.body.scrollHeight, behavior: 'instant' })")
+                    probe = await self._wait_for_dom_quiescence(page, quiet_ms=500, timeout_ms=remaining_ms)
+                    logger.info(f"DOM quiescence probe after scroll for {url}: {probe}")
+        except Error as e:
+            if "Execution context was destroyed" in str(e):
+                logger.warning(f"Page navigated during readiness probe for {url}. Proceeding with extraction.")
+            else:
+                logger.warning(f"Readiness probe failed for {url}: {e}. Proceeding with extraction.")
+        except Exception as e:
+            logger.warning(f"Unexpected error during readiness probe for {url}: {e}. Proceeding with extraction.")
+        elapsed = asyncio.get_event_loop().time() - start_time
+        logger.info(f"Page ready for extraction after {elapsed:.2f}s (policy: {policy}): {url}")
+
     async def _human_like_scroll(self, page: Page):
         """Simulates human-like scrolling on the page, with network idle wait and a hard timeout."""
         logger.info("Performing human-like scrolling to trigger lazy-loaded content")
@@ -608,13 +729,76 @@ class PlaywrightBrowserTool(BaseTool):
         except Exception as e:
             logger.error(f"Unexpected error during human-like scrolling: {e}", exc_info=True)
 
+    def _get_stored_extraction(self, url: str) -> Optional[dict]:
+        """Return content extracted for this URL in an earlier session, if the content store has a fresh copy."""
+        if not self.content_manager or not hasattr(self.content_manager, "get_cached_content"):
+            return None
+        try:
+            return self.content_manager.get_cached_content(url)
+        except Exception as e:
+            logger.warning(f"Content store lookup failed for {url}: {e}")
+            return None
+
+    def _store_extraction(self, url: str, extracted_data: dict) -> None:
+        """Persist a successful extraction so later sessions can skip the browser for this URL."""
+        if not self.content_manager or not hasattr(self.content_manager, "cache_extracted_content"):
+            return
+        full_content = (extracted_data or {}).get("full_content") or ""
+        if not full_content or full_content.startswith(("Error", "Unsupported content type")):
+            return
+        try:
+            self.content_manager.cache_extracted_content(url, extracted_data, source_type="web")
+        except Exception as e:
+            logger.warning(f"Failed to persist extracted content for {url}: {e}")
+
+    def _open_pdf_stream(self, url: str) -> Optional[Any]:
+        """Content manager stream that a PDF's pages are chunked into as they are parsed, if there is a content manager."""
+        if not self.content_manager or not hasattr(self.content_manager, "open_content_stream"):
+            return None
+        return self.content_manager.open_content_stream(url, source_type="pdf", separator=PAGE_BREAK)
+
+    def _close_pdf_stream(self, stream: Optional[Any], extracted_data: dict) -> None:
+        """Index the chunks streamed from a PDF once its extraction succeeded."""
+        if stream is None:
+            return
+        full_content = (extracted_data or {}).get("full_content") or ""
+        if not full_content or full_content.startswith("Error"):
+            return
+        try:
+            stream.close(title=extracted_data.get("title"))
+        except Exception as e:
+            logger.warning(f"Failed to index streamed PDF chunks for {stream.source}: {e}")
+
+    async def _extract_pdf(self, url: str, pdf_bytes: bytes) -> dict:
+        """Extract a PDF, handing its pages to the content manager's splitter as they are parsed."""
+        stream = self._open_pdf_stream(url)
+        extracted_data = await aextract_content_from_pdf(pdf_bytes, on_page=stream.add_page if stream else None)
+        self._close_pdf_stream(stream, extracted_data)
+        return extracted_data
+
     async def _extract_content(self, url: str) -> dict:
         """Extracts content from the specified URL."""
+        stored = self._get_stored_extraction(url)
+        if stored:
+            logger.info(f"Using stored content for {url}; skipping browser extraction.")
+            self.last_extracted_content = stored
+            return stored
+
+        pdf_stream = self._open_pdf_stream(url)
+        fetched = await fetch_content_over_http(url, on_pdf_page=pdf_stream.add_page if pdf_stream else None)
+        if fetched:
+            self._close_pdf_stream(pdf_stream, fetched)
+            fetched["source_url"] = url
+            self.last_extracted_content = fetched
+            self._store_extraction(url, fetched)
+            return fetched
+
         await self._ensure_browser_running()
         if not self.browser or not self.context:
             logger.error("Browser or context is not available.")
             return {"title": "Error", "full_content": "Browser or context not available."}
-        page = await self.context.new_page()
+        from src.browser_manager import browser_manager  # Import here to avoid circular imports
+        page = await browser_manager.acquire_page(self.context)
         current_url = url
         response = None
         
@@ -651,29 +835,23 @@ class PlaywrightBrowserTool(BaseTool):
                     content_type = 'text/html'
                     logger.info(f"Assuming content type is HTML (fallback): {current_url}")
             
-            # Perform human-like scrolling for better content loading
-            await self._human_like_scroll(page)
+            # Wait for the page to be ready according to its domain's readiness policy
+            await self._wait_for_page_ready(page, current_url, content_type)
             
             # Extract content based on type
             if content_type and 'application/pdf' in content_type:
                 logger.info("Detected PDF content, downloading raw bytes...")
                 pdf_bytes = None
                 try:
-                    # Download raw PDF bytes using httpx
-                    async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                            'Accept': 'application/pdf,*/*',
-                            'Accept-Language': 'en-US,en;q=0.9',
-                            'Connection': 'keep-alive'
-                        }
-                        response = await client.get(current_url, headers=headers)
-                        response.raise_for_status()
-                        pdf_bytes = response.content
-                        logger.info(f"Successfully downloaded {len(pdf_bytes)} bytes of PDF data from {current_url}")
+                    # Download raw PDF bytes using the shared pooled HTTP client
+                    headers = {'Accept': 'application/pdf,*/*'}
+                    response = await http_clients.fetch(current_url, headers=headers)
+                    response.raise_for_status()
+                    pdf_bytes = response.content
+                    logger.info(f"Successfully downloaded {len(pdf_bytes)} bytes of PDF data from {current_url}")
                         
                     if pdf_bytes:
-                        extracted_data = extract_content_from_pdf(pdf_bytes)
+                        extracted_data = await self._extract_pdf(url, pdf_bytes)
                         extracted_data['source_url'] = current_url
                     else:
                         logger.error("PDF download failed or returned empty bytes.")
@@ -689,7 +867,7 @@ class PlaywrightBrowserTool(BaseTool):
             elif content_type and ('text/html' in content_type or 'text/plain' in content_type or 'application/xhtml+xml' in content_type):
                 logger.info("Detected HTML or Text content, extracting...")
                 html_content = await page.content()
-                extracted_data = extract_content_from_html(html_content)
+                extracted_data = await extraction_pool.extract_html(html_content)
                 extracted_data['source_url'] = current_url
                 
             elif content_type and 'application/json' in content_type:
@@ -748,6 +926,7 @@ class PlaywrightBrowserTool(BaseTool):
 
             # Store and return the extracted content
             self.last_extracted_content = extracted_data
+            self._store_extraction(url, extracted_data)
             logger.info(f"Content extracted successfully from {current_url}. Title: {extracted_data.get('title', 'N/A')}")
             return extracted_data
             
@@ -763,8 +942,8 @@ class PlaywrightBrowserTool(BaseTool):
             logger.error(f"Error during content extraction from {current_url}: {e}", exc_info=True)
             return {"title": "Error", "full_content": f"Error during content extraction: {e}", "source_url": current_url}
         finally:
-            # Keep page open - don't close
-            pass
+            # Return the page to the pool (reset to about:blank) instead of leaving the tab open
+            await browser_manager.release_page(page)
 
     # --- Search Query Cleaning for Google ---
     def clean_search_query(self, query: str) -> str:
@@ -819,15 +998,17 @@ class PlaywrightBrowserTool(BaseTool):
         print(f"- Requesting {num_results} results")
         print(f"- Using Google homepage interaction method")
 
-        # Check if results are in cache (using renamed attribute)
-        if query in self.search_results_cache:
-            logging.info(f"Using cached search results for: '{query}'")
-            results = self.search_results_cache[query]
-            # Limit results from cache as well
-            final_cached_results = results[:num_results]
-            # <<< RETURN STRUCTURED DATA DIRECTLY FROM CACHE >>>
-            logger.debug(f"Returning {len(final_cached_results)} cached results as list of dicts.")
-            return final_cached_results 
+        # Check the shared search cache, keyed by the cleaned query so trivial re-spellings hit
+        cleaned_query = self.clean_search_query(query)
+        search_cache = get_search_cache()
+        if search_cache:
+            cached_results = search_cache.get(cleaned_query, page=1, min_results=num_results)
+            if cached_results is not None:
+                logger.info(f"Using cached search results for: '{query}'")
+                # Limit results from cache as well
+                final_cached_results = cached_results[:num_results]
+                logger.debug(f"Returning {len(final_cached_results)} cached results as list of dicts.")
+                return final_cached_results
 
         logger.info(f"Performing Google search for: '{query}' via homepage interaction.")
         
@@ -837,8 +1018,9 @@ class PlaywrightBrowserTool(BaseTool):
             logger.error("Browser or context is not available.")
             return "Error: Browser or context is not available."
             
-        # Create a new page for this search operation
-        page = await self.context.new_page()
+        # Lease a pooled page for this search operation
+        from src.browser_manager import browser_manager  # Import here to avoid circular imports
+        page = await browser_manager.acquire_page(self.context)
         
         try:
             # --- Step 1: Navigate to Google Homepage --- #
@@ -860,8 +1042,7 @@ class PlaywrightBrowserTool(BaseTool):
                 search_box = page.locator(search_box_selector)
                 await search_box.wait_for(state="visible", timeout=10000)
 
-                # Clean the query for Google best practices
-                cleaned_query = self.clean_search_query(query)
+                # Type the query cleaned for Google best practices
                 await search_box.fill(cleaned_query)
                 await asyncio.sleep(0.5) # Brief pause after typing
                 await search_box.press("Enter")
@@ -1065,7 +1246,8 @@ class PlaywrightBrowserTool(BaseTool):
                 if not parsed_results_data:
                     print("[DEBUG] No results found after fallback, returning empty list.")
                     return []
-                self.search_results_cache[query] = parsed_results_data
+                if search_cache:
+                    search_cache.put(cleaned_query, parsed_results_data, page=1, result_limit=num_results)
                 print(f"[DEBUG] Returning {len(parsed_results_data)} results.")
                 return parsed_results_data
             except Exception as e:
@@ -1076,20 +1258,35 @@ class PlaywrightBrowserTool(BaseTool):
             logger.error(f"Unexpected error during search: {e}", exc_info=True)
             return f"Error: {str(e)}"
         finally:
-            # Keep page open - don't close
-            pass
+            # Return the page to the pool (reset to about:blank) instead of leaving the tab open
+            await browser_manager.release_page(page)
 
     async def _navigate_and_extract(self, url: str) -> str:
         """Navigates to a URL and extracts the main content."""
         
+        stored = self._get_stored_extraction(url)
+        if stored:
+            logger.info(f"Using stored content for {url}; skipping navigation and extraction.")
+            self.last_extracted_content = stored
+            return stored.get("full_content", "")
+
+        pdf_stream = self._open_pdf_stream(url)
+        fetched = await fetch_content_over_http(url, on_pdf_page=pdf_stream.add_page if pdf_stream else None)
+        if fetched:
+            self._close_pdf_stream(pdf_stream, fetched)
+            self.last_extracted_content = fetched
+            self._store_extraction(url, fetched)
+            return fetched.get("full_content", "")
+
         # Ensure browser is running
         await self._ensure_browser_running()
         if not self.browser or not self.context:
             logger.error("Browser or context is not available.")
             return "Error: Browser or context is not available."
             
-        # Create a new page for this navigation and extraction
-        page = await self.context.new_page()
+        # Lease a pooled page for this navigation and extraction
+        from src.browser_manager import browser_manager  # Import here to avoid circular imports
+        page = await browser_manager.acquire_page(self.context)
         content_type = 'text/html'  # Default assumption
         
         try:
@@ -1116,36 +1313,30 @@ class PlaywrightBrowserTool(BaseTool):
                     logger.warning(f"Could not get headers from response for {url}: {e}. Assuming HTML.")
                     content_type = 'text/html'
             
-            # Scroll for better content loading
+            # Wait for the page to be ready according to its domain's readiness policy
             if USE_PROGRESSIVE_LOADING:
-                await self._human_like_scroll(page)
+                await self._wait_for_page_ready(page, page.url, content_type)
                 
             # Extract content based on type
             extracted_data = None
             try:
                 if 'application/pdf' in content_type:
                     logger.info("Detected PDF content, extracting text...")
-                    # Download PDF content using httpx
-                    async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                            'Accept': 'application/pdf,*/*',
-                            'Accept-Language': 'en-US,en;q=0.9',
-                            'Connection': 'keep-alive'
-                        }
-                        pdf_response = await client.get(url, headers=headers)
-                        pdf_response.raise_for_status()
-                        pdf_bytes = pdf_response.content
-                        
-                        if pdf_bytes:
-                            extracted_data = extract_content_from_pdf(pdf_bytes)
-                        else:
-                            return f"Error: Could not retrieve PDF content for {url} due to empty response."
+                    # Download PDF content using the shared pooled HTTP client
+                    headers = {'Accept': 'application/pdf,*/*'}
+                    pdf_response = await http_clients.fetch(url, headers=headers)
+                    pdf_response.raise_for_status()
+                    pdf_bytes = pdf_response.content
+                    
+                    if pdf_bytes:
+                        extracted_data = await self._extract_pdf(url, pdf_bytes)
+                    else:
+                        return f"Error: Could not retrieve PDF content for {url} due to empty response."
                 
                 elif 'text/html' in content_type or 'application/xhtml+xml' in content_type:
                     logger.info("Detected HTML content, extracting main content...")
                     html_content = await page.content()
-                    extracted_data = extract_content_from_html(html_content)
+                    extracted_data = await extraction_pool.extract_html(html_content)
                 
                 elif 'application/json' in content_type:
                     logger.info("Detected JSON content.")
@@ -1206,6 +1397,7 @@ class PlaywrightBrowserTool(BaseTool):
             # Store and return the extracted content
             if extracted_data:
                 self.last_extracted_content = extracted_data
+                self._store_extraction(url, extracted_data)
                 logger.info(f"Content extracted successfully from {url}. Title: {extracted_data.get('title')}")
                 # Return only the full content string
                 return extracted_data.get("full_content", "Error: Extracted data was empty.") 
@@ -1217,8 +1409,8 @@ class PlaywrightBrowserTool(BaseTool):
             logger.error(f"Error during navigate and extract for {url}: {e}", exc_info=True)
             return f"Error: {str(e)}"
         finally:
-            # Keep page open - don't close
-            pass
+            # Return the page to the pool (reset to about:blank) instead of leaving the tab open
+            await browser_manager.release_page(page)
 
     async def _search_next_page(self, query: str, page_num: int = 2) -> str:
         """Gets the next page of search results for a query."""
@@ -1228,14 +1420,23 @@ class PlaywrightBrowserTool(BaseTool):
             logger.info(f"Search query changed: {self.last_search_query} -> {query}")
             self.last_search_query = query
         
+        cleaned_query = self.clean_search_query(query)
+        search_cache = get_search_cache()
+        if search_cache:
+            cached_page = search_cache.get(cleaned_query, page=page_num)
+            if cached_page is not None:
+                logger.info(f"Using cached search results page {page_num} for: '{query}'")
+                return cached_page
+
         # Ensure browser is running
         await self._ensure_browser_running()
         if not self.browser or not self.context:
             logger.error("Browser or context is not available.")
             return "Error: Browser or context is not available."
             
-        # Create a new page for this search pagination
-        page = await self.context.new_page()
+        # Lease a pooled page for this search pagination
+        from src.browser_manager import browser_manager  # Import here to avoid circular imports
+        page = await browser_manager.acquire_page(self.context)
         
         try:
             logger.info(f"Searching for next page {page_num} of results for: '{query}'")
@@ -1260,7 +1461,7 @@ class PlaywrightBrowserTool(BaseTool):
             
             # Wait for the results to stabilize
             await asyncio.sleep(2)
-            await self._human_like_scroll(page)
+            await self._wait_for_page_ready(page, search_url, "text/html")
             
             # Extract search results
             results = []
@@ -1348,13 +1549,16 @@ class PlaywrightBrowserTool(BaseTool):
             if not results:
                 return f"No search results found on page {page_num} for query: {query}"
                 
-            return f"Search results for '{query}' (Page {page_num}):\n\n" + "\n".join(results)
+            formatted_results = f"Search results for '{query}' (Page {page_num}):\n\n" + "\n".join(results)
+            if search_cache:
+                search_cache.put(cleaned_query, formatted_results, page=page_num)
+            return formatted_results
         except Exception as e:
             logger.error(f"Error in search_next_page: {e}", exc_info=True)
             return f"Error performing search: {str(e)}"
         finally:
-            # Keep page open - don't close
-            pass
+            # Return the page to the pool (reset to about:blank) instead of leaving the tab open
+            await browser_manager.release_page(page)
 
     async def arun(
         self,
@@ -1,7 +1,9 @@
 import logging
 import asyncio
-from typing import Optional, Dict
-from playwright.async_api import async_playwright, Browser, Playwright
+from typing import Optional, Dict, Any
+from playwright.async_api import async_playwright, Browser, Playwright, BrowserContext, Page
+
+from config.settings import BROWSER_PAGE_POOL_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +11,10 @@ class BrowserManager:
     """
     A singleton class to manage a single Playwright browser instance across the application.
     Provides browser access to different tools while ensuring only one instance is running.
+
+    Also owns a small page pool: tools lease pages with acquire_page()/release_page() instead of
+    opening a new tab per operation. Released pages are reset to about:blank and reused, and the
+    total number of pooled pages is capped at BROWSER_PAGE_POOL_SIZE.
     """
     _instance = None
     _lock = asyncio.Lock()
@@ -25,6 +31,19 @@ class BrowserManager:
                 "channel": "chrome",
                 "args": ["--disable-blink-features=AutomationControlled", "--start-maximized", "--mute-audio"]
             }
+            # --- Page pool state ---
+            cls._instance.max_pool_size = max(1, BROWSER_PAGE_POOL_SIZE)
+            cls._instance._page_slots = asyncio.Semaphore(cls._instance.max_pool_size)
+            cls._instance._idle_pages = {}  # context -> idle pages
+            cls._instance._leased_pages = set()
+            cls._instance._pool_stats = {
+                "created": 0,
+                "reused": 0,
+                "released": 0,
+                "discarded": 0,
+                "waits": 0,
+                "peak_in_use": 0,
+            }
         return cls._instance
     
     @property
@@ -65,7 +84,14 @@ class BrowserManager:
     async def clean_up(self):
         """
         Clean up the browser instance when no longer needed.
+        Also closes the shared HTTP clients and stops the extraction worker pools, which live as long as the browser.
         """
+        from src.http_clients import http_clients
+        from src.pdf_extractor import shutdown_pdf_executor
+        from src.extraction_pool import extraction_pool
+        await http_clients.aclose()
+        shutdown_pdf_executor()
+        extraction_pool.shutdown()
         async with self._lock:
             if self.is_running and not self._cleanup_in_progress:
                 self._cleanup_in_progress = True
@@ -130,11 +156,109 @@ class BrowserManager:
         else:
             logger.warning("Cannot update browser options while browser is running")
 
+    def _idle_count(self) -> int:
+        return sum(len(pages) for pages in self._idle_pages.values())
+
+    async def _close_page(self, page: Page):
+        """Close a page, ignoring errors from pages that are already gone."""
+        self._pool_stats["discarded"] += 1
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled page: {e}")
+
+    async def acquire_page(self, context: BrowserContext) -> Page:
+        """
+        Lease a page from the pool for the given context, reusing an idle page when possible.
+        Waits if BROWSER_PAGE_POOL_SIZE pages are already leased. Every acquire_page() must be
+        paired with release_page(), typically in a finally block.
+
+        Args:
+            context: The browser context the page must belong to.
+
+        Returns:
+            A page ready to navigate.
+        """
+        if self._page_slots.locked():
+            self._pool_stats["waits"] += 1
+            logger.debug(f"All {self.max_pool_size} pooled pages are in use. Waiting for a page to be released...")
+        await self._page_slots.acquire()
+        try:
+            # Reuse an idle page of this context if one is still alive
+            idle = self._idle_pages.get(context, [])
+            while idle:
+                page = idle.pop()
+                if not page.is_closed():
+                    self._pool_stats["reused"] += 1
+                    self._mark_leased(page)
+                    return page
+                self._pool_stats["discarded"] += 1
+
+            # Make room by closing an idle page of another context if the pool is full
+            if len(self._leased_pages) + self._idle_count() >= self.max_pool_size:
+                for other_pages in self._idle_pages.values():
+                    if other_pages:
+                        await self._close_page(other_pages.pop(0))
+                        break
+
+            page = await context.new_page()
+            self._pool_stats["created"] += 1
+            self._mark_leased(page)
+            return page
+        except BaseException:
+            self._page_slots.release()
+            raise
+
+    def _mark_leased(self, page: Page):
+        self._leased_pages.add(page)
+        self._pool_stats["peak_in_use"] = max(self._pool_stats["peak_in_use"], len(self._leased_pages))
+
+    async def release_page(self, page: Optional[Page]):
+        """
+        Return a leased page to the pool. The page is navigated to about:blank so it stops running
+        scripts and frees the previous document; pages that are closed or fail to reset are discarded.
+        """
+        if page is None or page not in self._leased_pages:
+            return
+        self._leased_pages.discard(page)
+        try:
+            self._pool_stats["released"] += 1
+            if page.is_closed():
+                self._pool_stats["discarded"] += 1
+                return
+            try:
+                await page.goto("about:blank", timeout=5000)
+            except Exception as e:
+                logger.debug(f"Could not reset pooled page, discarding it: {e}")
+                await self._close_page(page)
+                return
+            if self._idle_count() >= self.max_pool_size:
+                await self._close_page(page)
+                return
+            self._idle_pages.setdefault(page.context, []).append(page)
+        finally:
+            self._page_slots.release()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Return page pool counters together with the current number of leased and idle pages."""
+        return {
+            **self._pool_stats,
+            "max_size": self.max_pool_size,
+            "in_use": len(self._leased_pages),
+            "idle": self._idle_count(),
+        }
+
     async def close_all_pages(self):
         """
         Close all open pages but keep the browser running.
         This can be used periodically to clean up without closing the browser.
         """
+        # Pooled pages are closed below; forget them so they are not handed out again
+        self._idle_pages.clear()
+        if self._pool_stats["created"]:
+            logger.info(f"Browser page pool stats: {self.get_pool_stats()}")
+
         if not self.is_running or not self.browser:
             logger.warning("No browser running, cannot close pages")
             return
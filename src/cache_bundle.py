@@ -0,0 +1,71 @@
+"""
+Export and import LLM cache bundles, so fresh workers can start from another node's cache.
+
+Usage:
+    python -m src.cache_bundle export bundle.db --model gemini-2.0-flash --since 2025-01-01 --tag oncology
+    python -m src.cache_bundle import bundle.db
+
+A bundle is a small SQLite file with the compressed entries of a NormalizingCache database and
+their keys; importing merges it into the local cache (local entries win). Set
+CACHE_WARMUP_ENTRIES to also preload the most hit entries into memory when the app starts.
+"""
+
+import argparse
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from config.settings import CACHE_DB_PATH
+from src.advanced_cache import NormalizingCache
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value: str) -> float:
+    """Parse an ISO date or datetime (e.g. 2025-01-31 or 2025-01-31T12:00) as a Unix timestamp."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD[THH:MM[:SS]]")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Export or import LLM cache bundles.")
+    parser.add_argument("--db", default=CACHE_DB_PATH, help=f"Cache database (default: {CACHE_DB_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write unexpired cache entries to a bundle file")
+    export_parser.add_argument("bundle", help="Bundle file to create")
+    export_parser.add_argument("--model", help="Only entries of models whose identifier contains this")
+    export_parser.add_argument("--since", type=_timestamp, help="Only entries created on or after this date")
+    export_parser.add_argument("--until", type=_timestamp, help="Only entries created before this date")
+    export_parser.add_argument("--tag", help="Only entries written with this CACHE_TAG")
+
+    import_parser = commands.add_parser("import", help="Merge a bundle file into the cache")
+    import_parser.add_argument("bundle", help="Bundle file to import")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = build_parser().parse_args(argv)
+    # No background threads or memory tier needed for a one-off copy
+    cache = NormalizingCache(database_path=args.db, maintenance_interval=0, flush_interval=0, memory_max_mb=0)
+    try:
+        if args.command == "export":
+            exported = cache.export_bundle(args.bundle, model=args.model, since=args.since, until=args.until, tag=args.tag)
+            print(f"Exported {exported} entries to {args.bundle}")
+        else:
+            result = cache.import_bundle(args.bundle)
+            print(
+                f"Imported {result['imported']} entries from {args.bundle} "
+                f"(skipped {result['existing']} already cached, {result['expired']} expired, "
+                f"{result['unsupported']} with an unsupported codec)"
+            )
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -21,9 +21,9 @@ from chainlit.action import Action # Import Action for custom buttons
 import langchain
 # from langchain.cache import InMemoryCache # Keep previous for reference
 from langchain_community.cache import SQLiteCache
-from src.advanced_cache import NormalizingCache # Reverted to absolute import
+from src.advanced_cache import NormalizingCache, initialize_normalizing_cache # Reverted to absolute import
 # langchain.llm_cache = InMemoryCache()
-langchain.llm_cache = NormalizingCache(database_path=".langchain.db")
+langchain.llm_cache = initialize_normalizing_cache(db_path=".langchain.db")
 # print("INFO: LangChain LLM Caching enabled (In-Memory).")
 print("INFO: LangChain LLM Caching enabled (NormalizingCache at .langchain.db).")
 # === End Caching Setup ===
@@ -37,7 +37,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Project imports (adjust paths/names as needed)
-from config.settings import PRIMARY_MODEL_TYPE, LOCAL_MODEL_NAME, LOG_LEVEL, AVAILABLE_TOOLS, SUMMARIZER_MODEL, USE_LOCAL_SUMMARIZER_MODEL, NEXT_STEP_MODEL # Import new settings
+from config.settings import PRIMARY_MODEL_TYPE, LOCAL_MODEL_NAME, LOG_LEVEL, AVAILABLE_TOOLS, SUMMARIZER_MODEL, USE_LOCAL_SUMMARIZER_MODEL, NEXT_STEP_MODEL, FOLLOW_UP_RETRIEVAL_TOP_K # Import new settings
 from src.agent.researcher_agent import ResearcherAgent
 from src.llm_clients.factory import get_llm_client
 from src.token_callback import TokenCallbackManager, TokenCostProcess, TokenUsageCallbackHandler # Import the new TokenUsageCallbackHandler
@@ -73,19 +73,8 @@ from src.token_callback import TokenCostProcess
 token_cost_processor = TokenCostProcess()
 logger.info("Created central TokenCostProcess instance for Chainlit app.")
 
-# Initialize cache monitoring (after langchain cache is set up, before any LLM calls)
-# MODIFIED: Pass the processor instance
-cache_monitor = initialize_cache_monitoring(token_cost_processor=token_cost_processor)
-if cache_monitor:
-    logger.info("Cache monitoring initialized. Token savings from cache hits will be tracked.")
-else:
-    logger.warning("Cache monitoring not initialized. Token savings from cache hits will not be tracked.")
-logger.info(f"[DIAGNOSTIC] Logging level: {logging.getLogger().getEffectiveLevel()} ({logging.getLevelName(logging.getLogger().getEffectiveLevel())})")
-logger.info(f"[DIAGNOSTIC] Cache instance: {langchain.llm_cache}")
-logger.info(f"[DIAGNOSTIC] Cache monitor initialized: {cache_monitor is not None}")
-if cache_monitor:
-    logger.info(f"[DIAGNOSTIC] Cache monitor details: {cache_monitor}")
-print("Reached cache monitor init (chainlit_app.py)")
+# Forward cache hits to the token cost processor (after the cache is set up, before any LLM calls)
+cache_monitor = initialize_cache_monitoring(token_cost_processor=token_cost_processor, cache=langchain.llm_cache)
 
 @cl.on_chat_start
 async def start_chat():
@@ -308,6 +297,13 @@ async def handle_message(message: cl.Message):
                 payload={"choice": "summary"},
                 icon="sparkles"
             ),
+            cl.Action(
+                name="use_relevant_excerpts",
+                label="Use Relevant Excerpts",
+                description="Fast, only the passages matching your question",
+                payload={"choice": "relevant_excerpts"},
+                icon="search"
+            ),
             cl.Action(
                 name="use_full_content",
                 label="Use Full Content",
@@ -324,9 +320,10 @@ async def handle_message(message: cl.Message):
 Please choose how you'd like me to respond:
 
 - **Use Final Summary**: I'll analyze your question using only the research summary - faster and cheaper but with more limited context
+- **Use Relevant Excerpts**: I'll look up the passages of the gathered content that best match your question and answer from those, with their sources
 - **Use Full Content**: I'll use all the detailed content gathered during research - more comprehensive but requires more processing
 
-Both options include the original research topic and research plan for context.
+All options include the original research topic and research plan for context.
             """,
             actions=actions,
             author="Researcher"
@@ -704,9 +701,22 @@ async def on_use_summary(action: cl.Action):
         logger.error(f"Error generating follow-up response: {e}", exc_info=True)
         await cl.Message(content=f"❌ Error analyzing your question: {e}", author="Researcher").send()
 
+def _retrieve_follow_up_excerpts(agent, follow_up_query: str) -> str:
+    """Format the stored chunks most relevant to a follow-up question, or return "" if none match."""
+    content_manager = getattr(agent, "content_manager", None)
+    if not content_manager or FOLLOW_UP_RETRIEVAL_TOP_K <= 0:
+        return ""
+    docs = content_manager.retrieve(follow_up_query, k=FOLLOW_UP_RETRIEVAL_TOP_K)
+    return content_manager.format_retrieved_chunks(docs)
+
+@cl.action_callback("use_relevant_excerpts")
+async def on_use_relevant_excerpts(action: cl.Action):
+    """Handle action to answer a follow-up from the retrieved chunks most relevant to it."""
+    await on_use_full_content(action)
+
 @cl.action_callback("use_full_content")
 async def on_use_full_content(action: cl.Action):
-    """Handle action to use the full accumulated content for follow-up responses."""
+    """Handle action to use the full accumulated content (or its most relevant excerpts) for follow-up responses."""
     from config.prompts import POST_RESEARCH_PROMPT
     from langchain_core.messages import HumanMessage
     
@@ -731,14 +741,27 @@ async def on_use_full_content(action: cl.Action):
     if research_plan:
         research_plan_section = f"<research_plan>\n{research_plan}\n</research_plan>"
     
-    # Create a prompt with the full accumulated content
+    content_type = "full_content"
+    content = accumulated_content
+    content_type_description = "full research content"
+    if (action.payload or {}).get("choice") == "relevant_excerpts":
+        excerpts = _retrieve_follow_up_excerpts(agent, follow_up_query)
+        if excerpts:
+            content_type = "relevant_excerpts"
+            content = excerpts
+            content_type_description = "most relevant excerpts of the research content (with their sources)"
+            logger.info(f"Answering follow-up from retrieved excerpts ({len(excerpts)} chars instead of {len(accumulated_content)})")
+        else:
+            logger.info("No indexed content matched the follow-up query; using the full research content")
+
+    # Create a prompt with the full accumulated content or the retrieved excerpts
     prompt = POST_RESEARCH_PROMPT.format(
         topic=topic,
         research_plan_section=research_plan_section,
-        content_type="full_content",
-        content=accumulated_content,
+        content_type=content_type,
+        content=content,
         follow_up_query=follow_up_query,
-        content_type_description="full research content"
+        content_type_description=content_type_description
     )
     
     try:
@@ -982,6 +1005,19 @@ async def end_chat():
         logger.info("Cleaning up agent resources...")
         # Any additional agent-specific cleanup if needed
 
+@cl.on_app_shutdown
+async def app_shutdown():
+    """Close the shared browser, pooled HTTP clients and the LLM cache when the Chainlit server stops."""
+    logger.info("App shutting down. Closing browser pages, browser and shared HTTP clients...")
+    try:
+        await browser_manager.close_all_pages()
+        await browser_manager.clean_up()
+    except Exception as e:
+        logger.error(f"Error during app shutdown cleanup: {e}", exc_info=True)
+    if isinstance(langchain.llm_cache, NormalizingCache):
+        # Persists buffered hit timestamps used for LRU eviction
+        langchain.llm_cache.close()
+
 # Placeholder for running logic if needed directly (usually run via `chainlit run`)
 # if __name__ == "__main__":
 #     # This part is typically not needed as Chainlit CLI handles running the app
@@ -24,15 +24,23 @@ from config.settings import (
     USE_LOCAL_SUMMARIZER_MODEL, # For checking if local models are enabled
     SUMMARIZER_MODEL,  # New unified summarizer model setting
     SUMMARY_MAX_TOKENS,
-    LOCAL_MODELS_DIR # To check for model file existence
+    LOCAL_MODELS_DIR, # To check for model file existence
+    SUMMARIZER_MAP_CONCURRENCY,
+    LOCAL_SUMMARIZER_MAP_CONCURRENCY,
+    FOLLOW_UP_RETRIEVAL_TOP_K,
+    RETRIEVAL_EMBEDDING_MODEL,
 )
-from config.prompts import CONDENSE_PROMPT, COMBINE_PROMPT # <<< IMPORT BOTH PROMPTS
 
 # Import the factory function for creating LLM clients
 from src.llm_clients.factory import get_llm_client
 
 # --- Import Tiktoken helper --- 
 from src.browser import get_token_count_for_text
+from src.content_store import get_content_store
+from src.near_duplicate_cache import get_near_duplicate_cache
+from src.summarization_engine import SummarizationEngine, SummarizationStats
+from src.model_registry import get_llm_capabilities, get_model_name
+from src.retrieval import BM25Index, fuse_rankings, get_embedding_index
 # Replace old estimate with tiktoken
 _estimate_token_count = get_token_count_for_text
 # --------------------------
@@ -117,6 +125,84 @@ class ContentItem:
             self.documents = [Document(page_content=f"[Error processing content: {e}]", metadata=metadata)]
             return self.documents
 
+class ContentStream:
+    """Splits text that arrives in pieces (e.g. PDF pages as they are parsed) into chunks incrementally.
+
+    Pieces are buffered and split once the buffer holds two chunks' worth of text; every chunk but
+    the last is final, the last is carried over and split again together with the next piece.
+    Closing the stream indexes the chunks for retrieval under the stream's source.
+    """
+
+    def __init__(self, manager: "ContentManager", source: str, chunk_size: int, source_type: str = "web", separator: str = ""):
+        """Initialize a ContentStream.
+
+        Args:
+            manager: ContentManager whose splitter and retrieval index are used
+            source: URL or identifier of the streamed text
+            chunk_size: Splitter chunk size; pieces are split once the buffer holds twice this many characters
+            source_type: Type of source (e.g., "web", "pdf")
+            separator: Text inserted between consecutive pieces
+        """
+        self.manager = manager
+        self.source = source
+        self.chunk_size = chunk_size
+        self.source_type = source_type
+        self.separator = separator
+        self.parts: List[str] = []
+        self.chunks: List[str] = []
+        self.buffer = ""
+
+    def add(self, text: str) -> None:
+        """Append a piece of text, splitting off the chunks that are complete."""
+        if not text:
+            return
+        if self.parts and self.separator:
+            text = self.separator + text
+        self.parts.append(text)
+        if not self.manager.use_chunking:
+            return
+        self.buffer += text
+        if len(self.buffer) >= self.chunk_size * 2:
+            pieces = self.manager.splitter.split_text(self.buffer)
+            self.chunks.extend(pieces[:-1])
+            self.buffer = pieces[-1] if pieces else ""
+
+    def add_page(self, page: Any) -> None:
+        """Append a parsed page (anything with a .text, such as pdf_extractor.PdfPage); usable as an on_page callback."""
+        self.add(page.text)
+
+    def close(self, title: Optional[str] = None) -> int:
+        """Split the remaining buffer and index all chunks for retrieval.
+
+        Args:
+            title: Optional title shown with retrieved chunks
+
+        Returns:
+            Number of chunks indexed (0 if nothing was streamed)
+        """
+        text = "".join(self.parts)
+        if not text.strip():
+            return 0
+        if self.manager.use_chunking:
+            if self.buffer:
+                self.chunks.extend(self.manager.splitter.split_text(self.buffer))
+                self.buffer = ""
+        else:
+            self.chunks = [text]
+        content_item = ContentItem(content=text, source_url=self.source, source_type=self.source_type, title=title)
+        metadata = {
+            "source": self.source,
+            "title": content_item.title,
+            "content_id": content_item.content_id,
+            "source_type": self.source_type,
+            "estimated_tokens": _estimate_token_count(text),
+        }
+        docs = [Document(page_content=chunk, metadata=dict(metadata)) for chunk in self.chunks]
+        self.manager._index_documents(self.source, docs)
+        self.manager.streamed_sources.add(self.source)
+        logger.info(f"Indexed {len(docs)} chunks streamed from {self.source}")
+        return len(docs)
+
 class ContentManager:
     """Manages web content using LangChain Documents, TextSplitters, and summarization chains.
 
@@ -157,7 +243,22 @@ class ContentManager:
         # New content tracking with improved source attribution
         self.content_items: Dict[str, ContentItem] = {}
 
+        # Persistent cross-session store (None if disabled via ENABLE_CONTENT_STORE)
+        self.persistent_store = get_content_store()
+        # Summaries of near-identical texts (syndicated/AMP copies), None if disabled
+        self.near_duplicate_cache = get_near_duplicate_cache()
+
+        # Retrieval index over stored chunks, keyed by (source, chunk index) and updated as content is stored;
+        # the embedding index is None unless RETRIEVAL_EMBEDDING_MODEL is set and sentence-transformers is installed
+        self.retrieval_index = BM25Index()
+        self.embedding_index = get_embedding_index(RETRIEVAL_EMBEDDING_MODEL)
+        self.indexed_chunks: Dict[Tuple[str, int], Document] = {}
+        self.indexed_chunk_counts: Dict[str, int] = {}
+        # Sources chunked and indexed through a ContentStream while they were extracted
+        self.streamed_sources: Set[str] = set()
+
         # Splitter
+        self.chunk_size = chunk_size
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -220,15 +321,21 @@ class ContentManager:
         self.local_llm: Optional[BaseChatModel] = None
         self.summary_chain_local_mapreduce: Optional[Any] = None # Store map_reduce chain
 
+        # Summarization chains keyed by (id(model), strategy) and context windows keyed by id(model),
+        # built once per model; map_reduce entries are SummarizationEngines holding the model's concurrency limit
+        self.summary_chains: Dict[Tuple[int, str], Any] = {}
+        self.context_windows: Dict[int, int] = {}
+        self.summarization_stats = SummarizationStats()
+
         # --- Load standard summarization chains --- 
         # Primary chain (stuff)
-        self.summary_chain_primary = load_summarize_chain(self.primary_llm, chain_type="stuff") 
+        self.summary_chain_primary = self._get_summary_chain(self.primary_llm, "stuff")
         
         # Pre-loaded fallback chain (stuff, if provided)
         self.summary_chain_fallback = None
         if self.summarization_llm:
             # Use CONDENSE_PROMPT for fallback summarizer if desired, or standard prompt
-            self.summary_chain_fallback = load_summarize_chain(self.summarization_llm, chain_type="stuff")
+            self.summary_chain_fallback = self._get_summary_chain(self.summarization_llm, "stuff")
             logger.info(f"Initialized fallback summarization chain (stuff). Model: {getattr(self.summarization_llm, 'model', 'N/A')}")
         else:
              logger.info(f"No pre-initialized fallback model provided.")
@@ -262,48 +369,59 @@ class ContentManager:
             llm: The language model
             
         Returns:
-            The context window size in tokens (estimated)
+            The context window size in tokens, from the model capability registry
+            (capped at n_ctx for a loaded local model)
         """
-        # Try to get context window from model attributes if available
-        if hasattr(llm, "get_num_tokens_from_messages"):
+        capabilities = get_llm_capabilities(llm)
+        logger.info(f"Context window for {get_model_name(llm) or type(llm).__name__}: {capabilities.context_window} tokens")
+        return capabilities.context_window
+
+    def _get_context_window(self, llm: BaseChatModel) -> int:
+        """Context window of a model, determined once per model and then reused."""
+        window = self.context_windows.get(id(llm))
+        if window is None:
+            window = self._get_model_context_window(llm)
+            self.context_windows[id(llm)] = window
+        return window
+
+    def _get_summary_chain(self, llm: BaseChatModel, strategy: str) -> Any:
+        """Get the summarization chain for a model and strategy ("stuff" or "map_reduce"), building it on first use.
+
+        Map/reduce uses a SummarizationEngine, kept per model so concurrent summaries share the
+        model's concurrency limit.
+        """
+        key = (id(llm), strategy)
+        chain = self.summary_chains.get(key)
+        if chain is not None:
+            return chain
+        if strategy == "map_reduce":
+            is_local = llm is self.local_llm
+            concurrency = LOCAL_SUMMARIZER_MAP_CONCURRENCY if is_local else SUMMARIZER_MAP_CONCURRENCY
+            chain = SummarizationEngine(llm, self._get_context_window(llm), max_concurrency=concurrency, stats=self.summarization_stats)
+            logger.info(f"Created map/reduce summarization engine ({'local' if is_local else 'cloud'} model, concurrency {concurrency}, {chain.token_max} tokens per call)")
+        else:
+            chain = load_summarize_chain(llm, chain_type=strategy)
+        self.summary_chains[key] = chain
+        return chain
+
+    def warm_up(self) -> None:
+        """Build the summarization chains and probe the context windows of the loaded models ahead of the first summary.
+
+        The local model is not loaded here if it has not been yet; its chains are built on first use.
+        """
+        models = {id(m): m for m in (self.summarization_llm, self.local_llm, self.primary_llm) if m is not None}
+        for llm in models.values():
             try:
-                # Create a proper empty message instead of a string
-                from langchain_core.messages import HumanMessage
-                return getattr(llm, "get_num_tokens_from_messages", lambda x: 4096)([HumanMessage(content="")])[0]
-            except (ValueError, TypeError, IndexError, AttributeError) as e:
-                # Fall back to direct method if possible
-                if hasattr(llm, "get_num_tokens"):
-                    try:
-                        return llm.get_num_tokens("") + 4000  # Add buffer for message formatting
-                    except Exception:
-                        pass
-                # Log the issue but continue with fallback logic
-                logger.warning(f"Error getting context window from model: {e}. Using fallback estimation.")
-        
-        # For Gemini Flash models (handle any version)
-        if hasattr(llm, "model") and "flash" in getattr(llm, "model", "").lower():
-            # Gemini Flash has a large context window, but let's be slightly conservative
-            return 1000000 # Example: 1M tokens
-            
-        # For Claude models
-        if hasattr(llm, "model_name"):
-            model_name = getattr(llm, "model_name", "").lower()
-            if "claude-3" in model_name and "sonnet" in model_name:
-                return 200000  # ~200k tokens
-            if "claude-3" in model_name and "opus" in model_name:
-                return 200000  # ~200k tokens
-            if "claude-3" in model_name and "haiku" in model_name:
-                return 150000  # ~150k tokens
-                
-        # For local models - best effort estimates
-        if self.use_local_summarizer_model:
-            if "llama" in self.summarizer_model.lower():
-                return 4096  # Conservative estimate for Llama models
-            if "mistral" in self.summarizer_model.lower():
-                return 8192  # Mistral models
-            
-        # Default fallback: assume a conservative context window
-        return 4096  # Conservative default
+                self._get_context_window(llm)
+                for strategy in ("stuff", "map_reduce"):
+                    self._get_summary_chain(llm, strategy)
+            except Exception as e:
+                logger.warning(f"Failed to warm up summarization chains for {getattr(llm, 'model', type(llm).__name__)}: {e}")
+        logger.info(f"Summarization chains warmed up: {len(self.summary_chains)} chains for {len(self.context_windows)} models")
+
+    def get_summarization_stats(self) -> Dict[str, Any]:
+        """Per-stage latencies of map/reduce summaries generated so far."""
+        return self.summarization_stats.to_dict()
 
     def _estimate_document_size(self, docs: List[Document]) -> int:
         """Estimate the token size of a list of documents.
@@ -366,26 +484,166 @@ class ContentManager:
             metadata=metadata
         )
         
+        # Create documents using the ContentItem's method and store in traditional storage
+        docs = content_item.create_documents(self.splitter, self.use_chunking) if full_content else []
+        return self._register_content_item(url, content_item, docs)
+
+    def _register_content_item(self, url: str, content_item: ContentItem, docs: List[Document]) -> str:
+        """Record a ContentItem and its documents, and persist the content for later sessions."""
         # Generate a content ID and store mappings
         content_id = content_item.content_id
         self.content_hash_map[content_id] = url
         
         # Store the ContentItem
         self.content_items[url] = content_item
-        
-        # Create documents using the ContentItem's method and store in traditional storage
-        if not full_content:
+        self.documents[url] = docs
+        self._index_documents(url, docs)
+
+        if not content_item.content:
             logger.warning(f"No content provided for URL: {url}. Storing empty document list.")
-            self.documents[url] = []
             content_item.documents = []
-        else:
-            # Create and store documents
-            docs = content_item.create_documents(self.splitter, self.use_chunking)
-            self.documents[url] = docs
-            
-            logger.info(f"Stored content from {url} as {len(docs)} documents with source type '{source_type}' (ID: {content_id})")
+            self.documents[url] = []
+            return content_id
+
+        logger.info(f"Stored content from {url} as {len(docs)} documents with source type '{content_item.source_type}' (ID: {content_id})")
+
+        # Persist for later sessions and reuse a summary generated from identical content
+        if self.persistent_store:
+            self.persistent_store.put_content(url, content_item.content, source_type=content_item.source_type, title=content_item.title, metadata=content_item.metadata)
+            stored_summary = self.persistent_store.get_summary(url, content_item.content, model=self.summarizer_model)
+            if stored_summary and url not in self.summaries:
+                self.summaries[url] = stored_summary
 
         return content_id
+
+    def _index_documents(self, source: str, docs: List[Document]) -> None:
+        """Replace the indexed chunks of a source with docs."""
+        self._unindex_source(source)
+        chunks = [((source, i), doc) for i, doc in enumerate(docs) if doc.page_content.strip()]
+        for chunk_id, doc in chunks:
+            self.retrieval_index.add(chunk_id, doc.page_content)
+            self.indexed_chunks[chunk_id] = doc
+        self.indexed_chunk_counts[source] = len(docs)
+        if self.embedding_index is not None and chunks:
+            try:
+                self.embedding_index.add_many([(chunk_id, doc.page_content) for chunk_id, doc in chunks])
+            except Exception as e:
+                logger.warning(f"Failed to embed chunks of {source}: {e}")
+
+    def _unindex_source(self, source: str) -> None:
+        """Remove all indexed chunks of a source."""
+        self.streamed_sources.discard(source)
+        for i in range(self.indexed_chunk_counts.pop(source, 0)):
+            self.retrieval_index.remove((source, i))
+            self.indexed_chunks.pop((source, i), None)
+            if self.embedding_index is not None:
+                self.embedding_index.remove((source, i))
+
+    def index_text(self, source: str, text: str, title: Optional[str] = None, source_type: str = "web") -> int:
+        """Chunk and index text for retrieval without adding it to this session's sources.
+
+        Used for tool outputs that go into the research content but are not stored as content items.
+
+        Args:
+            source: URL or identifier the text came from
+            text: The text to index
+            title: Optional title shown with retrieved chunks
+            source_type: Type of source (e.g., "web", "transcript")
+
+        Returns:
+            Number of chunks indexed
+        """
+        if not text or not text.strip():
+            return 0
+        if source in self.streamed_sources:
+            # Already chunked page by page while it was extracted
+            return self.indexed_chunk_counts.get(source, 0)
+        docs = ContentItem(content=text, source_url=source, source_type=source_type, title=title).create_documents(self.splitter, self.use_chunking)
+        self._index_documents(source, docs)
+        return len(docs)
+
+    def open_content_stream(self, source: str, source_type: str = "web", separator: str = "") -> ContentStream:
+        """Start chunking text that is still being extracted (e.g. a PDF, page by page).
+
+        Args:
+            source: URL or identifier the text comes from
+            source_type: Type of source (e.g., "web", "pdf")
+            separator: Text inserted between consecutive pieces
+
+        Returns:
+            A ContentStream; call close() once extraction succeeded to index its chunks
+        """
+        return ContentStream(self, source, self.chunk_size, source_type=source_type, separator=separator)
+
+    def retrieve(self, query: str, k: int = FOLLOW_UP_RETRIEVAL_TOP_K) -> List[Document]:
+        """Return the k stored chunks most relevant to a query.
+
+        BM25 ranks the chunks; with an embedding model configured, its ranking is fused with the
+        BM25 one (reciprocal rank fusion).
+
+        Args:
+            query: The question or topic to match
+            k: Number of chunks to return
+
+        Returns:
+            Copies of the best matching Documents, best first, with "chunk_index" and
+            "retrieval_score" added to their metadata
+        """
+        if k <= 0 or not self.indexed_chunks:
+            return []
+        ranking = self.retrieval_index.search(query, k=k)
+        if self.embedding_index is not None:
+            try:
+                ranking = fuse_rankings(
+                    [self.retrieval_index.search(query, k=k * 3), self.embedding_index.search(query, k=k * 3)], k=k
+                )
+            except Exception as e:
+                logger.warning(f"Embedding search failed, using BM25 ranking only: {e}")
+        results = []
+        for chunk_id, score in ranking:
+            doc = self.indexed_chunks[chunk_id]
+            metadata = {**doc.metadata, "chunk_index": chunk_id[1], "retrieval_score": round(score, 4)}
+            results.append(Document(page_content=doc.page_content, metadata=metadata))
+        logger.info(f"Retrieved {len(results)} of {len(self.indexed_chunks)} indexed chunks for query: {query[:80]}")
+        return results
+
+    def format_retrieved_chunks(self, docs: List[Document]) -> str:
+        """Format retrieved chunks as numbered excerpts with their source title and URL."""
+        excerpts = []
+        for i, doc in enumerate(docs, 1):
+            title = doc.metadata.get("title", "Unknown Title")
+            source = doc.metadata.get("source", "Unknown source")
+            excerpts.append(f"[Excerpt {i}] {title}\nSource: {source}\n{doc.page_content}")
+        return "\n\n".join(excerpts)
+
+    def get_cached_content(self, url: str) -> Optional[Dict[str, Any]]:
+        """Look up previously extracted content for a URL in the persistent content store.
+
+        Args:
+            url: The source URL
+
+        Returns:
+            content_data dict (title, full_content, ...) if a fresh entry exists, otherwise None
+        """
+        if not self.persistent_store:
+            return None
+        return self.persistent_store.get_content(url)
+
+    def cache_extracted_content(self, url: str, content_data: Dict[str, Any], source_type: str = "web") -> None:
+        """Persist extracted content without adding it to this session's sources.
+
+        Used by extraction tools whose output is processed by the agent directly.
+
+        Args:
+            url: The source URL
+            content_data: Dictionary containing content data (title, full_content)
+            source_type: Type of source (e.g., "web", "reddit", "pubmed")
+        """
+        if not self.persistent_store:
+            return
+        full_content = content_data.get("full_content", "")
+        metadata = {k: v for k, v in content_data.items() if k not in ["full_content", "title"]}
+        self.persistent_store.put_content(url, full_content, source_type=source_type, title=content_data.get("title"), metadata=metadata)
         
     def generate_sources_section(self) -> str:
         """Generate a properly formatted sources section for the final output.
@@ -428,6 +686,31 @@ class ContentManager:
             return content # Return the error message directly
         # --- End Added ---
         
+        # --- Check Persistent Store --- 
+        # Summaries are keyed by the hash of the summarized text, so a changed page is never served a stale summary
+        source_text = content
+        if source_text is None and url not in self.summaries and self.documents.get(url):
+            source_text = "\n\n".join(doc.page_content for doc in self.documents[url])
+        if source_text and self.persistent_store:
+            stored_summary = self.persistent_store.get_summary(url, source_text, model=self.summarizer_model)
+            if stored_summary:
+                self.summaries[url] = stored_summary
+                return stored_summary
+        # --- End Check Persistent Store --- 
+
+        # --- Check Near-Duplicate Cache ---
+        near_duplicate_sketch = None
+        if source_text and self.near_duplicate_cache:
+            near_duplicate_sketch = await asyncio.to_thread(self.near_duplicate_cache.sketch, source_text)
+            match = await asyncio.to_thread(
+                self.near_duplicate_cache.find, source_text, self.summarizer_model, near_duplicate_sketch
+            )
+            if match:
+                logger.info(f"Reusing summary of a near-duplicate document for {url} (similarity {match[1]:.2f})")
+                self.summaries[url] = match[0]
+                return match[0]
+        # --- End Check Near-Duplicate Cache ---
+
         # --- Get Documents --- 
         if content is not None:
             # If content is provided directly, create Document object(s)
@@ -501,7 +784,7 @@ class ContentManager:
              # raise RuntimeError("Summarization model could not be determined.")
         
         # Get context window for the selected model
-        model_context_window = self._get_model_context_window(model_to_use)
+        model_context_window = self._get_context_window(model_to_use)
         logger.info(f"Model {model_desc} has estimated context window of {model_context_window} tokens")
         
         # Decide on summarization strategy based on document size vs. context window
@@ -517,18 +800,13 @@ class ContentManager:
         # --- Create chain based on strategy --- 
         try:
             if use_map_reduce:
-                # Use map_reduce with custom prompts
-                chain_to_use = load_summarize_chain(
-                    model_to_use,
-                    chain_type="map_reduce",
-                    map_prompt=CONDENSE_PROMPT,
-                    combine_prompt=COMBINE_PROMPT
-                )
+                # Parallel map phase and tree-reduce combines with the custom prompts
+                chain_to_use = self._get_summary_chain(model_to_use, "map_reduce")
                 model_desc += " [map_reduce with custom prompts]"
-                logger.info(f"Created map_reduce chain with custom prompts for {model_desc}")
+                logger.info(f"Using map/reduce summarization engine for {model_desc}")
             else:
                 # Use stuff strategy
-                chain_to_use = load_summarize_chain(model_to_use, chain_type="stuff")
+                chain_to_use = self._get_summary_chain(model_to_use, "stuff")
                 model_desc += " [stuff]"
                 logger.info(f"Using stuff chain for {model_desc}")
         except Exception as e:
@@ -553,10 +831,13 @@ class ContentManager:
             try:
                 logger.info(f"==> INVOKING chain {model_desc} for {url}") # Log before invoke
                 # Run the selected chain
-                result = await chain_to_use.ainvoke(
-                    {"input_documents": docs},
-                    {"callbacks": callbacks}
-                )
+                if use_map_reduce:
+                    result = await chain_to_use.summarize(docs, callbacks=callbacks)
+                else:
+                    result = await chain_to_use.ainvoke(
+                        {"input_documents": docs},
+                        {"callbacks": callbacks}
+                    )
                 logger.info(f"<== COMPLETED chain invocation for {url}") # Log after invoke
                 # --- FIX: Handle both dict and str chain outputs ---
                 if isinstance(result, dict):
@@ -596,6 +877,13 @@ class ContentManager:
                 
         # --- Cache the summary ---
         self.summaries[url] = final_summary
+        if self.persistent_store and source_text and not final_summary.startswith("[Summary"):
+            source_type = self.content_items[url].source_type if url in self.content_items else "direct"
+            self.persistent_store.put_summary(url, source_text, final_summary, source_type=source_type, model=self.summarizer_model)
+        if self.near_duplicate_cache and source_text and not final_summary.startswith("[Summary"):
+            await asyncio.to_thread(
+                self.near_duplicate_cache.put, source_text, final_summary, self.summarizer_model, near_duplicate_sketch
+            )
         
         return final_summary
 
@@ -688,6 +976,8 @@ class ContentManager:
             self.documents.clear()
             self.summaries.clear()
             self.content_hash_map.clear()
+            for source in list(self.indexed_chunk_counts):
+                self._unindex_source(source)
         else:
             url = self.content_hash_map.get(url_or_id, url_or_id)
             if url in self.documents:
@@ -695,6 +985,7 @@ class ContentManager:
                 del self.documents[url]
             if url in self.summaries:
                 del self.summaries[url]
+            self._unindex_source(url)
             # Try to remove from content_hash_map if it's a content ID
             if url_or_id in self.content_hash_map:
                 del self.content_hash_map[url_or_id]
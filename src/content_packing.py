@@ -0,0 +1,141 @@
+"""
+Token-budget packing of accumulated research content for the final report prompt.
+
+The accumulated content of a run is a sequence of sections ("--- Output from ... ---", Reddit
+posts, transcripts, step reasoning). When it exceeds the budget, sections are ranked by BM25
+relevance to the topic and added best first until the budget is full; the selected sections are
+then emitted in their original order so the report still reads the research chronologically.
+
+Before ranking, repeated passages are removed: lines seen verbatim earlier (the same page
+extracted twice, a post quoted in search results and again in full) and whole sections that are
+near-duplicates of an earlier one by MinHash similarity (syndicated copies of an article).
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+from config.settings import NEAR_DUPLICATE_THRESHOLD
+from src.browser import get_token_count_for_text
+from src.near_duplicate_cache import estimate_similarity, minhash_sketch
+from src.retrieval import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Sections start at a "--- Header ---" line after a blank line (closing "--- End ... ---" lines don't)
+_SECTION_RE = re.compile(r"\n{2,}(?=--- (?!End\b|END\b|BEGIN\b))")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Lines shorter than this (headers, separators, list bullets) are never treated as duplicates
+MIN_DEDUP_LINE_CHARS = 80
+
+
+@dataclass
+class PackedContent:
+    """Result of packing: the text for the prompt and what was dropped."""
+    text: str
+    sections: int
+    selected: int
+    duplicate_lines: int
+    duplicate_sections: int
+    input_tokens: int
+    output_tokens: int
+
+
+def split_sections(content: str) -> List[str]:
+    """Split accumulated content into its "--- Header ---" sections."""
+    return [section.strip() for section in _SECTION_RE.split(content) if section.strip()]
+
+
+def _drop_repeated_lines(sections: List[str]) -> Tuple[List[str], int]:
+    """Remove long lines already seen (whitespace/case-insensitively) earlier in the content."""
+    seen = set()
+    dropped = 0
+    result = []
+    for section in sections:
+        kept = []
+        for line in section.split("\n"):
+            key = _WHITESPACE_RE.sub(" ", line).strip().lower()
+            if len(key) >= MIN_DEDUP_LINE_CHARS:
+                if key in seen:
+                    dropped += 1
+                    continue
+                seen.add(key)
+            kept.append(line)
+        result.append("\n".join(kept))
+    return result, dropped
+
+
+def pack_content(
+    content: str,
+    topic: str,
+    budget_tokens: int,
+    count_tokens: Callable[[str], int] = get_token_count_for_text,
+    similarity_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> PackedContent:
+    """Fit accumulated content into a token budget, keeping the sections most relevant to the topic.
+
+    Args:
+        content: The accumulated research content.
+        topic: The research topic, used as the BM25 query.
+        budget_tokens: Maximum tokens of packed content (0 or less = no limit, only deduplicate).
+        count_tokens: Function estimating the token count of a text.
+        similarity_threshold: Estimated Jaccard similarity above which a section counts as a
+            near-duplicate of an earlier one.
+
+    Returns:
+        PackedContent with the packed text and counts of what was dropped.
+    """
+    input_tokens = count_tokens(content)
+    sections = split_sections(content)
+    sections, duplicate_lines = _drop_repeated_lines(sections)
+
+    unique: List[int] = []
+    sketches = []
+    duplicate_sections = 0
+    for index, section in enumerate(sections):
+        sketch = minhash_sketch(section)
+        if sketch and any(estimate_similarity(sketch, other) >= similarity_threshold for other in sketches):
+            duplicate_sections += 1
+            continue
+        if sketch:
+            sketches.append(sketch)
+        unique.append(index)
+
+    tokens = {index: count_tokens(sections[index]) for index in unique}
+    if budget_tokens <= 0 or sum(tokens.values()) <= budget_tokens:
+        selected = unique
+    else:
+        bm25 = BM25Index()
+        for i in unique:
+            bm25.add(i, sections[i])
+        scores = bm25.score(topic)
+        # Most relevant first; among equally relevant sections prefer the earlier ones
+        ranked = sorted(unique, key=lambda i: (-scores.get(i, 0.0), i))
+        selected, used = [], 0
+        for i in ranked:
+            if used + tokens[i] <= budget_tokens:
+                selected.append(i)
+                used += tokens[i]
+        if not selected and ranked:
+            # Even the best section alone is over budget: keep its beginning
+            best = ranked[0]
+            sections[best] = sections[best][:int(len(sections[best]) * budget_tokens / max(tokens[best], 1))]
+            selected = [best]
+        selected.sort()
+
+    text = "\n\n".join(sections[i] for i in selected)
+    packed = PackedContent(
+        text=text,
+        sections=len(sections),
+        selected=len(selected),
+        duplicate_lines=duplicate_lines,
+        duplicate_sections=duplicate_sections,
+        input_tokens=input_tokens,
+        output_tokens=count_tokens(text),
+    )
+    logger.info(
+        f"Packed research content: {packed.selected}/{packed.sections} sections, {packed.input_tokens} -> {packed.output_tokens} tokens "
+        f"(budget {budget_tokens}, dropped {duplicate_lines} repeated lines and {duplicate_sections} near-duplicate sections)"
+    )
+    return packed
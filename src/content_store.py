@@ -0,0 +1,262 @@
+"""
+Persistent, cross-session store for extracted content and its summaries.
+
+The in-memory dictionaries of ContentManager die with the Chainlit session, so researching a
+related topic again re-navigates, re-scrolls and re-summarizes the same URLs. This module keeps
+extracted page content (and the summary generated from it) in a small SQLite database keyed by
+normalized URL. Summaries are tied to the hash of the content they were generated from, so a
+changed page never returns a stale summary.
+
+Freshness is controlled per source type (web, reddit, pubmed, ...) and the total size of the
+store is capped, evicting the least recently used entries first.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config.settings import (
+    ENABLE_CONTENT_STORE,
+    CONTENT_STORE_DB_PATH,
+    CONTENT_STORE_MAX_MB,
+    CONTENT_STORE_TTL_HOURS,
+)
+from src.sqlite_store import ProcessStore, SqliteStore, resolve_ttl_seconds
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visitor and never change the page content
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings share one store entry.
+
+    Lowercases scheme and host, drops the fragment, tracking parameters (utm_*, fbclid, ...)
+    and a trailing slash, and sorts the remaining query parameters. Identifiers that are not
+    http(s) URLs (e.g. synthetic MCP ids) are returned unchanged.
+    """
+    if not url or not url.lower().startswith(("http://", "https://")):
+        return url
+    try:
+        parts = urlsplit(url.strip())
+        query = [
+            (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+        ]
+        path = parts.path.rstrip("/") if parts.path not in ("", "/") else ""
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+    except Exception as e:
+        logger.debug(f"Could not normalize URL {url}: {e}")
+        return url
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a content string."""
+    return hashlib.sha256((content or "").encode("utf-8", errors="replace")).hexdigest()
+
+
+@dataclass
+class ContentStoreStats:
+    """Statistics for the persistent content store."""
+    content_hits: int = 0
+    content_misses: int = 0
+    summary_hits: int = 0
+    summary_misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+
+class PersistentContentStore(SqliteStore):
+    """SQLite-backed store for extracted content and summaries, shared across sessions."""
+
+    TABLE = "content_store"
+    KEY_COLUMN = "url_key"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content_store (
+            url_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            source_type TEXT,
+            title TEXT,
+            content TEXT,
+            content_hash TEXT,
+            metadata TEXT,
+            summary TEXT,
+            summary_hash TEXT,
+            summary_model TEXT,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL,
+            size_bytes INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_content_store_last_accessed ON content_store (last_accessed);
+    """
+
+    def __init__(
+        self,
+        db_path: str = CONTENT_STORE_DB_PATH,
+        max_mb: float = CONTENT_STORE_MAX_MB,
+        ttl_hours: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            db_path: Path of the SQLite database file.
+            max_mb: Size cap for stored content and summaries; least recently used entries are evicted beyond it.
+            ttl_hours: Freshness per source type in hours, with a "default" entry for unknown types.
+        """
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_hours = dict(ttl_hours if ttl_hours is not None else CONTENT_STORE_TTL_HOURS)
+        self.stats = ContentStoreStats()
+        super().__init__(db_path)
+        logger.info(f"Persistent content store initialized at {db_path} (max {max_mb} MB, TTLs: {self.ttl_hours})")
+
+    def _ttl_seconds(self, source_type: Optional[str]) -> Optional[float]:
+        """Resolve the TTL for a source type. Exact match first, then substring (e.g. 'pubmedmcp' -> 'pubmed')."""
+        return resolve_ttl_seconds(self.ttl_hours, source_type, default_hours=72)
+
+    def _get_row(self, url: str) -> Optional[tuple]:
+        """Fetch a fresh row for a URL, deleting it if it has expired. Caller holds the lock."""
+        url_key = normalize_url(url)
+        cursor = self._conn.execute(
+            "SELECT url_key, url, source_type, title, content, content_hash, metadata, summary, summary_hash, "
+            "summary_model, created_at FROM content_store WHERE url_key = ?",
+            (url_key,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        if self._expire_if_stale(url_key, row[10], self._ttl_seconds(row[2])):
+            logger.info(f"Content store entry for {url} expired (source type '{row[2]}'). Removed it.")
+            return None
+        self._touch(url_key)
+        return row
+
+    def get_content(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return stored content for a URL as a content_data dict, or None if missing/expired."""
+        try:
+            with self._lock:
+                row = self._get_row(url)
+            if row is None or not row[4]:
+                self.stats.content_misses += 1
+                return None
+            self.stats.content_hits += 1
+            metadata = json.loads(row[6]) if row[6] else {}
+            logger.info(f"Content store hit for {url} ({len(row[4])} chars)")
+            return {
+                **metadata,
+                "title": row[3],
+                "full_content": row[4],
+                "source_url": row[1],
+                "source_type": row[2],
+            }
+        except Exception as e:
+            logger.warning(f"Content store lookup failed for {url}: {e}")
+            return None
+
+    def put_content(self, url: str, content: str, source_type: str = "web", title: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Store (or refresh) extracted content for a URL. The summary is kept only if the content is unchanged."""
+        if not content:
+            return
+        try:
+            now = time.time()
+            new_hash = content_hash(content)
+            try:
+                metadata_json = json.dumps(metadata or {}, default=str)
+            except Exception:
+                metadata_json = "{}"
+            with self._lock:
+                self._conn.execute(
+                    """
+                    INSERT INTO content_store (url_key, url, source_type, title, content, content_hash, metadata,
+                                               created_at, last_accessed, size_bytes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url_key) DO UPDATE SET
+                        url = excluded.url,
+                        source_type = excluded.source_type,
+                        title = excluded.title,
+                        content = excluded.content,
+                        content_hash = excluded.content_hash,
+                        metadata = excluded.metadata,
+                        summary = CASE WHEN content_store.summary_hash = excluded.content_hash THEN content_store.summary ELSE NULL END,
+                        summary_hash = CASE WHEN content_store.summary_hash = excluded.content_hash THEN content_store.summary_hash ELSE NULL END,
+                        created_at = CASE WHEN content_store.content_hash = excluded.content_hash THEN content_store.created_at ELSE excluded.created_at END,
+                        last_accessed = excluded.last_accessed,
+                        size_bytes = excluded.size_bytes + COALESCE(LENGTH(CAST(CASE WHEN content_store.summary_hash = excluded.content_hash THEN content_store.summary END AS BLOB)), 0)
+                    """,
+                    (normalize_url(url), url, source_type, title, content, new_hash, metadata_json, now, now, len(content.encode())),
+                )
+                self._conn.commit()
+                self._enforce_size_cap()
+        except Exception as e:
+            logger.warning(f"Failed to persist content for {url}: {e}")
+
+    def get_summary(self, url: str, content: str, model: Optional[str] = None) -> Optional[str]:
+        """Return a stored summary for a URL if it was generated from exactly this content (and model, if given)."""
+        try:
+            with self._lock:
+                row = self._get_row(url)
+            if row is None or not row[7] or row[8] != content_hash(content) or (model and row[9] and row[9] != model):
+                self.stats.summary_misses += 1
+                return None
+            self.stats.summary_hits += 1
+            logger.info(f"Content store summary hit for {url} ({len(row[7])} chars)")
+            return row[7]
+        except Exception as e:
+            logger.warning(f"Content store summary lookup failed for {url}: {e}")
+            return None
+
+    def put_summary(self, url: str, content: str, summary: str, source_type: str = "web", model: Optional[str] = None) -> None:
+        """Store the summary generated from `content` for a URL, creating a summary-only entry if needed."""
+        if not summary:
+            return
+        try:
+            now = time.time()
+            summary_hash = content_hash(content)
+            with self._lock:
+                self._conn.execute(
+                    """
+                    INSERT INTO content_store (url_key, url, source_type, summary, summary_hash, summary_model,
+                                               created_at, last_accessed, size_bytes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url_key) DO UPDATE SET
+                        summary = excluded.summary,
+                        summary_hash = excluded.summary_hash,
+                        summary_model = excluded.summary_model,
+                        last_accessed = excluded.last_accessed,
+                        size_bytes = COALESCE(LENGTH(CAST(content_store.content AS BLOB)), 0) + LENGTH(CAST(excluded.summary AS BLOB))
+                    """,
+                    (normalize_url(url), url, source_type, summary, summary_hash, model, now, now, len(summary.encode())),
+                )
+                self._conn.commit()
+                self._enforce_size_cap()
+        except Exception as e:
+            logger.warning(f"Failed to persist summary for {url}: {e}")
+
+    def _enforce_size_cap(self) -> None:
+        """Evict least recently used entries until the store fits its size cap. Caller holds the lock."""
+        self._evict_lru(max_bytes=self.max_bytes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters together with the current size of the store."""
+        return {
+            "content_hits": self.stats.content_hits,
+            "content_misses": self.stats.content_misses,
+            "summary_hits": self.stats.summary_hits,
+            "summary_misses": self.stats.summary_misses,
+            "expired": self.stats.expired,
+            "evicted": self.stats.evicted,
+            **self._size(),
+        }
+
+
+_content_store: ProcessStore[PersistentContentStore] = ProcessStore(
+    PersistentContentStore, ENABLE_CONTENT_STORE, f"persistent content store at {CONTENT_STORE_DB_PATH}"
+)
+
+
+def get_content_store() -> Optional[PersistentContentStore]:
+    """Return the process-wide content store, or None if ENABLE_CONTENT_STORE is off or it cannot be opened."""
+    return _content_store.get()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.settings import (
+    EXTRACTION_WORKERS,
+    EXTRACTION_QUEUE_SIZE,
+    EXTRACTION_TIMEOUT,
+)
+from src.utils import extract_content_from_html
+
+logger = logging.getLogger(__name__)
+
+
+def _call_in_worker(stage: str, func: Callable, args: Tuple) -> Tuple[Any, Dict[str, float]]:
+    """Run func(*args) in a worker and time it."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, {stage: time.perf_counter() - start}
+
+
+def _extract_html_in_worker(html: str) -> Tuple[dict, Dict[str, float]]:
+    """Run readability + markdownify in a worker, reporting both stages separately."""
+    timings: Dict[str, float] = {}
+    result = extract_content_from_html(html, timings=timings)
+    return result, timings
+
+
+class ExtractionPool:
+    """
+    A singleton running CPU-heavy HTML cleanup (readability, markdownify, lxml/BeautifulSoup
+    cleaning) in worker processes so it never blocks the asyncio event loop.
+    The number of queued jobs is bounded: callers wait for a slot instead of piling up work,
+    and each job has a timeout after which the caller gets its fallback value.
+    Time spent per stage (and waiting for a slot) is recorded for diagnostics.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ExtractionPool, cls).__new__(cls)
+            cls._instance._executor = None
+            cls._instance._slots = None
+            cls._instance._loop = None
+            cls._instance._stats = {}
+        return cls._instance
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if EXTRACTION_WORKERS <= 0:
+            return None
+        if self._executor is None:
+            # 'spawn' avoids forking a process that runs Playwright and the event loop threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Started extraction pool with {EXTRACTION_WORKERS} worker processes")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(max(1, EXTRACTION_WORKERS) + max(0, EXTRACTION_QUEUE_SIZE))
+            self._loop = loop
+        return self._slots
+
+    def _record(self, stage: str, seconds: float = 0.0, outcome: Optional[str] = None):
+        entry = self._stats.setdefault(stage, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "timeouts": 0, "errors": 0})
+        if outcome:
+            entry[outcome] += 1
+            return
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    async def _submit(self, stage: str, worker: Callable, *args: Any) -> Tuple[Any, Dict[str, float]]:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        if executor is not None:
+            try:
+                return await loop.run_in_executor(executor, worker, *args)
+            except BrokenProcessPool as e:
+                logger.warning(f"Extraction pool broke during '{stage}' ({e}); retrying in a thread")
+                self._executor = None
+        return await asyncio.to_thread(worker, *args)
+
+    async def _run_job(self, stage: str, fallback: Any, worker: Callable, *args: Any) -> Any:
+        wait_start = time.perf_counter()
+        async with self._get_slots():
+            self._record("queue_wait", time.perf_counter() - wait_start)
+            try:
+                result, timings = await asyncio.wait_for(self._submit(stage, worker, *args), timeout=EXTRACTION_TIMEOUT)
+            except asyncio.TimeoutError:
+                # The worker keeps running until it finishes; only the caller stops waiting
+                logger.warning(f"Extraction stage '{stage}' timed out after {EXTRACTION_TIMEOUT}s")
+                self._record(stage, outcome="timeouts")
+                return fallback
+            except Exception as e:
+                logger.warning(f"Extraction stage '{stage}' failed: {e}", exc_info=True)
+                self._record(stage, outcome="errors")
+                return fallback
+        for name, seconds in timings.items():
+            self._record(name, seconds)
+        return result
+
+    async def run(self, stage: str, func: Callable, *args: Any, fallback: Any = None) -> Any:
+        """Run a picklable, module-level function in the pool.
+
+        Args:
+            stage: Name under which the time spent is recorded (e.g. "reddit_clean").
+            func: The function to run.
+            *args: Arguments for func.
+            fallback: Returned if the job times out or fails.
+
+        Returns:
+            func's result, or fallback.
+        """
+        return await self._run_job(stage, fallback, _call_in_worker, stage, func, args)
+
+    async def extract_html(self, html: str) -> dict:
+        """Run extract_content_from_html in the pool. Returns the same dict as the sync function."""
+        fallback = {
+            "title": "Error during extraction",
+            "full_content": "Error during HTML content extraction (timed out or failed).",
+        }
+        return await self._run_job("html_extract", fallback, _extract_html_in_worker, html)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage call counts, total/max seconds, timeouts and errors."""
+        return {stage: dict(entry) for stage, entry in self._stats.items()}
+
+    def shutdown(self):
+        """Stop the worker processes. They are restarted on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info(f"Extraction pool shut down. Stage stats: {self.get_stats()}")
+
+# Singleton instance
+extraction_pool = ExtractionPool()
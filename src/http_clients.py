@@ -0,0 +1,195 @@
+import logging
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Iterator
+from urllib.parse import urlparse
+
+import aiohttp
+import httpx
+
+from config.settings import (
+    HTTP_CLIENT_TIMEOUT,
+    HTTP_CLIENT_MAX_CONNECTIONS,
+    HTTP_CLIENT_MAX_PER_HOST,
+    HTTP_CLIENT_DNS_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class HttpClientRegistry:
+    """
+    A singleton holding the application's shared HTTP clients.
+    All fetchers (HTTP fast path, PDF downloads, reference title lookups) reuse the same
+    connection pools instead of opening a client per request, so TLS handshakes and DNS
+    lookups to the same hosts are paid once. Clients are created lazily and recreated if
+    they were closed or belong to a different event loop.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(HttpClientRegistry, cls).__new__(cls)
+            cls._instance._httpx_client = None
+            cls._instance._aiohttp_session = None
+            cls._instance._loop = None
+            cls._instance._host_slots = {}
+            cls._instance._stats = {"requests": 0, "clients_created": 0}
+        return cls._instance
+
+    def _check_loop(self):
+        """Close and drop clients bound to another (possibly closed) event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                logger.info("Event loop changed; recreating shared HTTP clients")
+                self._close_stale_clients(self._loop, self._httpx_client, self._aiohttp_session)
+            self._httpx_client = None
+            self._aiohttp_session = None
+            self._host_slots = {}
+            self._loop = loop
+
+    def _close_stale_clients(self, loop: asyncio.AbstractEventLoop, httpx_client: Any, aiohttp_session: Any) -> None:
+        """Close clients created on a previous event loop.
+
+        If that loop is still running (in another thread) the clients are closed on it. Otherwise
+        nothing can be awaited on it any more, so their pooled connections are shut down directly.
+        """
+        if httpx_client is None and aiohttp_session is None:
+            return
+        if loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._aclose_clients(httpx_client, aiohttp_session), loop)
+            return
+        closed = 0
+        for sock in self._pooled_sockets(httpx_client, aiohttp_session):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+                closed += 1
+            except OSError:
+                pass  # Already disconnected
+        if aiohttp_session is not None and not aiohttp_session.closed:
+            aiohttp_session.detach()
+        logger.info(f"Shut down {closed} pooled connections left on the previous event loop")
+
+    @staticmethod
+    def _pooled_sockets(httpx_client: Any, aiohttp_session: Any) -> Iterator[Any]:
+        """Sockets of the open connections held by an httpx client and an aiohttp session."""
+        pool = getattr(getattr(httpx_client, "_transport", None), "_pool", None)
+        for connection in list(getattr(pool, "connections", None) or []):
+            stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            if sock is not None:
+                yield sock
+        connector = getattr(aiohttp_session, "connector", None)
+        if connector is not None:
+            protocols = [proto for conns in getattr(connector, "_conns", {}).values() for proto, _ in conns]
+            protocols.extend(getattr(connector, "_acquired", ()))
+            for proto in protocols:
+                transport = getattr(proto, "transport", None)
+                sock = transport.get_extra_info("socket") if transport is not None else None
+                if sock is not None:
+                    yield sock
+
+    @staticmethod
+    async def _aclose_clients(httpx_client: Any, aiohttp_session: Any) -> None:
+        """Close an httpx client and an aiohttp session (either may be None)."""
+        if httpx_client is not None and not httpx_client.is_closed:
+            try:
+                await httpx_client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing shared httpx client: {e}")
+        if aiohttp_session is not None and not aiohttp_session.closed:
+            try:
+                await aiohttp_session.close()
+            except Exception as e:
+                logger.warning(f"Error closing shared aiohttp session: {e}")
+
+    def get_httpx_client(self) -> httpx.AsyncClient:
+        """Return the shared httpx client (connection pooling, keep-alive, HTTP/2 when available)."""
+        self._check_loop()
+        if self._httpx_client is None or self._httpx_client.is_closed:
+            self._httpx_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=HTTP_CLIENT_TIMEOUT,
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(
+                    max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+                ),
+            )
+            self._stats["clients_created"] += 1
+            logger.info(f"Created shared httpx client (http2={HTTP2_AVAILABLE}, max_connections={HTTP_CLIENT_MAX_CONNECTIONS})")
+        return self._httpx_client
+
+    def get_aiohttp_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session (per-host connection limit and DNS cache)."""
+        self._check_loop()
+        if self._aiohttp_session is None or self._aiohttp_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_CLIENT_MAX_CONNECTIONS,
+                limit_per_host=HTTP_CLIENT_MAX_PER_HOST,
+                ttl_dns_cache=HTTP_CLIENT_DNS_CACHE_TTL,
+            )
+            self._aiohttp_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_CLIENT_TIMEOUT),
+                headers=DEFAULT_HEADERS,
+            )
+            self._stats["clients_created"] += 1
+            logger.info(f"Created shared aiohttp session (limit_per_host={HTTP_CLIENT_MAX_PER_HOST})")
+        return self._aiohttp_session
+
+    @asynccontextmanager
+    async def host_slot(self, url: str):
+        """Limit concurrent requests per host to HTTP_CLIENT_MAX_PER_HOST (httpx has no per-host limit)."""
+        self._check_loop()
+        host = (urlparse(url).hostname or "").lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(max(1, HTTP_CLIENT_MAX_PER_HOST))
+            self._host_slots[host] = slot
+        async with slot:
+            yield
+
+    async def fetch(self, url: str, **kwargs: Any) -> httpx.Response:
+        """GET a URL with the shared httpx client, respecting the per-host concurrency limit.
+
+        Args:
+            url: The URL to fetch.
+            **kwargs: Passed to httpx.AsyncClient.get (e.g. headers, timeout).
+
+        Returns:
+            The httpx response.
+        """
+        client = self.get_httpx_client()
+        async with self.host_slot(url):
+            self._stats["requests"] += 1
+            return await client.get(url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "hosts": len(self._host_slots)}
+
+    async def aclose(self):
+        """Close all shared clients. They are recreated on next use."""
+        await self._aclose_clients(self._httpx_client, self._aiohttp_session)
+        self._httpx_client = None
+        self._aiohttp_session = None
+        self._host_slots = {}
+        logger.info(f"Shared HTTP clients closed. Stats: {self.get_stats()}")
+
+# Singleton instance
+http_clients = HttpClientRegistry()
@@ -19,6 +19,7 @@ from langchain_core.outputs import ChatGeneration, ChatResult
 
 # Configuration imports
 import config.settings
+from src.model_registry import get_model_capabilities
 
 # Remove: from src.model_context import get_context_window, get_recommended_chunk_size
 # Use config.settings.get_context_window and config.settings.get_recommended_chunk_size instead
@@ -27,6 +28,16 @@ logger = logging.getLogger(__name__)
 
 ProviderType = Literal["claude", "gemini", "local"]
 
+
+def _clamp_output_tokens(model_name: str, max_tokens: int) -> int:
+    """Clamp an output token limit to the model's maximum output, if the model is known."""
+    capabilities = get_model_capabilities(model_name)
+    if capabilities.provider != "unknown" and max_tokens > capabilities.max_output_tokens:
+        logger.warning(f"max_tokens={max_tokens} exceeds the maximum output of {model_name} ({capabilities.max_output_tokens}). Using {capabilities.max_output_tokens}.")
+        return capabilities.max_output_tokens
+    return max_tokens
+
+
 # Add a RetryingLLM class that wraps any LLM with retry functionality
 class RetryingLLM(BaseChatModel):
     """A wrapper around any LLM that adds retry functionality.
@@ -433,6 +444,7 @@ def get_llm_client(
              # Add a fallback default model if not configured
              final_model_name = "claude-3-haiku-20240307"
              logger.warning(f"Claude model name not specified, defaulting to {final_model_name}")
+        final_max_tokens = _clamp_output_tokens(final_model_name, final_max_tokens)
 
         try:
             llm_client = ChatAnthropic(
@@ -469,6 +481,7 @@ def get_llm_client(
             # Add a fallback default model if not configured
             final_model_name = "gemini-1.5-flash-latest"
             logger.warning(f"Gemini model name not specified, defaulting to {final_model_name}")
+        final_max_tokens = _clamp_output_tokens(final_model_name, final_max_tokens)
 
         try:
             # <<< ADD DEBUG LOGGING >>>
@@ -541,6 +554,10 @@ def get_llm_client(
             if not is_summary_client:
                 # For primary reasoning model, try to use larger context
                 default_n_ctx = 65536  # 64K context window for reasoning model
+            capabilities = get_model_capabilities(selected_model)
+            if capabilities.provider != "unknown" and capabilities.context_window < default_n_ctx:
+                # Do not allocate more context than the model was trained for
+                default_n_ctx = capabilities.context_window
                 
             logger.info(f"Setting default n_ctx={default_n_ctx} for LlamaCpp initialization.")
 
@@ -550,6 +567,7 @@ def get_llm_client(
             else:
                 # For primary reasoning, allow longer responses
                 final_max_tokens = max_tokens or 16384
+            final_max_tokens = min(_clamp_output_tokens(selected_model, final_max_tokens), default_n_ctx // 2)
 
             # Basic GPU layer offloading
             n_gpu_layers = config.settings.N_GPU_LAYERS # Default: -1 in settings
@@ -70,6 +70,7 @@ logger.info(f"Logging level set to: {log_level_str} ({log_level})")
 # Import browser tool AFTER setting log level potentially?
 # Might affect browser tool logging level if it initializes its own logger early.
 from src.browser import PlaywrightBrowserTool
+from src.http_clients import http_clients
 # Import for caching and token tracking
 from langchain.globals import set_llm_cache
 # Import caching options
@@ -100,15 +101,8 @@ else:
 token_cost_processor = TokenCostProcess()
 logger.info("Created central TokenCostProcess instance.")
 
-# Initialize cache monitoring to track token usage from cache hits
-# MODIFIED: Pass the processor instance
-cache_monitor = initialize_cache_monitoring(token_cost_processor=token_cost_processor)
-logger.info(f"[DIAGNOSTIC] Logging level: {logging.getLogger().getEffectiveLevel()} ({logging.getLevelName(logging.getLogger().getEffectiveLevel())})")
-logger.info(f"[DIAGNOSTIC] Cache instance: {llm_cache}")
-logger.info(f"[DIAGNOSTIC] Cache monitor initialized: {cache_monitor is not None}")
-if cache_monitor:
-    logger.info(f"[DIAGNOSTIC] Cache monitor details: {cache_monitor}")
-print("Reached cache monitor init")
+# Forward cache hits to the token cost processor so saved tokens are reported
+cache_monitor = initialize_cache_monitoring(token_cost_processor=token_cost_processor, cache=llm_cache)
 
 # ADDED: Create the single callback handler instance
 token_usage_handler = TokenUsageCallbackHandler(token_cost_processor=token_cost_processor)
@@ -158,6 +152,13 @@ async def run_agent(topic: str):
         # Log cache statistics if available
         if isinstance(llm_cache, NormalizingCache):
             logger.info(llm_cache.print_stats())
+            for metrics in llm_cache.get_metrics():
+                latency = metrics["lookup_latency"]
+                logger.info(
+                    f"Cache {metrics['model']} ({metrics['role']}): {metrics['hits']} hits, {metrics['misses']} misses, "
+                    f"{metrics['saved_input_tokens']}/{metrics['saved_output_tokens']} input/output tokens saved, "
+                    f"lookup {latency['mean_ms']:.2f} ms mean, {latency['max_ms']:.2f} ms max"
+                )
 
         # Print the research summary
         print(f"\n{'='*20} Research Summary {'='*20}")
@@ -173,6 +174,9 @@ async def run_agent(topic: str):
              await browser_tool_instance.clean_up()
              logger.info("Browser resources cleaned up.")
 
+        # Close the shared pooled HTTP clients
+        await http_clients.aclose()
+
         return 0  # Success
     except Exception as e:
         logger.error(f"Error during research run: {e}", exc_info=True)
@@ -184,6 +188,7 @@ async def run_agent(topic: str):
                 logger.info("Cleaning up browser resources after error...")
                 await browser_tool_instance.clean_up()
                 logger.info("Browser resources cleaned up after error.")
+            await http_clients.aclose()
         except Exception as cleanup_error:
             logger.error(f"Error during browser cleanup: {cleanup_error}")
             
@@ -207,7 +212,10 @@ def setup_agent():
         # Get topic from args
         parser = argparse.ArgumentParser(description="Run a research assistant for the specified topic.")
         parser.add_argument("--topic", required=True, help="The topic to research")
+        parser.add_argument("--cache-tag", help="Label stored with new LLM cache entries (overrides CACHE_TAG)")
         args = parser.parse_args()
+        if args.cache_tag and isinstance(llm_cache, NormalizingCache):
+            llm_cache.tag = args.cache_tag
         
         # Create agent using settings loaded from config
         agent = ResearcherAgent(
@@ -317,6 +325,8 @@ def main():
         logger.error(f"Unhandled exception in main: {e}", exc_info=True)
         return 1
     finally:
+        if isinstance(llm_cache, NormalizingCache):
+            llm_cache.close()
         logger.info("Research process finished.")
 
 if __name__ == "__main__":
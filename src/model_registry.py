@@ -0,0 +1,164 @@
+"""
+Model capability registry: context window, output limit, tokenizer family and feature support.
+
+ContentManager picks stuff vs map_reduce summarization from the context window, the LLM factory
+clamps default output limits and local n_ctx to what a model supports, and the token callback
+uses the provider and tokenizer family to price calls and estimate usage that was not reported.
+
+Entries are matched against model names by substring (case-insensitive), the longest matching
+pattern winning, so "gemini-2.0-flash-001" and "models/gemini-2.0-flash" both resolve to the
+"gemini-2.0-flash" entry and a local "DeepSeek-R1-Distill-Llama-8B-Q4_K_M.gguf" to
+"deepseek-r1-distill-llama". Entries from the MODEL_CAPABILITIES setting in config.yaml add to or
+override the built-in ones field by field.
+"""
+
+import dataclasses
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from langchain_core.language_models import BaseLanguageModel
+
+from config.settings import MODEL_CAPABILITIES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """What a model supports."""
+    provider: str  # "anthropic", "google" or "local"
+    context_window: int  # Input + output tokens per call
+    max_output_tokens: int
+    tokenizer: str  # Tokenizer family, used for token estimates (see CHARS_PER_TOKEN)
+    supports_tools: bool = True
+    supports_prompt_caching: bool = False
+
+
+# Average characters per token by tokenizer family, for estimates where no usage is reported
+CHARS_PER_TOKEN = {
+    "claude": 3.5,
+    "gemini": 4.0,
+    "llama": 4.0,
+    "qwen": 3.8,
+    "mistral": 3.6,
+    "default": 4.0,
+}
+
+_CLAUDE = {"provider": "anthropic", "context_window": 200_000, "tokenizer": "claude", "supports_prompt_caching": True}
+_GEMINI = {"provider": "google", "context_window": 1_048_576, "tokenizer": "gemini", "supports_prompt_caching": True}
+_LOCAL = {"provider": "local", "supports_tools": False}
+
+BUILTIN_MODEL_CAPABILITIES: Dict[str, Dict[str, Any]] = {
+    # Anthropic
+    "claude": {**_CLAUDE, "max_output_tokens": 4096},
+    "claude-3-haiku": {**_CLAUDE, "max_output_tokens": 4096},
+    "claude-3-sonnet": {**_CLAUDE, "max_output_tokens": 4096},
+    "claude-3-opus": {**_CLAUDE, "max_output_tokens": 4096},
+    "claude-3-5-haiku": {**_CLAUDE, "max_output_tokens": 8192},
+    "claude-3-5-sonnet": {**_CLAUDE, "max_output_tokens": 8192},
+    "claude-3-7-sonnet": {**_CLAUDE, "max_output_tokens": 64_000},
+    "claude-sonnet-4": {**_CLAUDE, "max_output_tokens": 64_000},
+    "claude-opus-4": {**_CLAUDE, "max_output_tokens": 32_000},
+    # Google
+    "gemini": {**_GEMINI, "max_output_tokens": 8192},
+    "gemini-1.5-flash": {**_GEMINI, "max_output_tokens": 8192},
+    "gemini-1.5-pro": {**_GEMINI, "context_window": 2_097_152, "max_output_tokens": 8192},
+    "gemini-2.0-flash": {**_GEMINI, "max_output_tokens": 8192},
+    "gemini-2.0-flash-lite": {**_GEMINI, "max_output_tokens": 8192, "supports_prompt_caching": False},
+    "gemini-2.5-flash": {**_GEMINI, "max_output_tokens": 65_536},
+    "gemini-2.5-pro": {**_GEMINI, "max_output_tokens": 65_536},
+    # Local GGUF models offered by setup.sh (trained context; the loaded n_ctx may be smaller)
+    "deepseek-r1-distill-llama": {**_LOCAL, "context_window": 131_072, "max_output_tokens": 8192, "tokenizer": "llama"},
+    "deepseek-r1-distill-qwen": {**_LOCAL, "context_window": 131_072, "max_output_tokens": 8192, "tokenizer": "qwen"},
+    "llama-3.1": {**_LOCAL, "context_window": 131_072, "max_output_tokens": 8192, "tokenizer": "llama"},
+    "llama-3.3": {**_LOCAL, "context_window": 131_072, "max_output_tokens": 8192, "tokenizer": "llama"},
+    "qwen2.5": {**_LOCAL, "context_window": 32_768, "max_output_tokens": 8192, "tokenizer": "qwen"},
+    "qwen-2.5": {**_LOCAL, "context_window": 32_768, "max_output_tokens": 8192, "tokenizer": "qwen"},
+    "mistral-7b-instruct-v0.2": {**_LOCAL, "context_window": 32_768, "max_output_tokens": 4096, "tokenizer": "mistral"},
+    "yarn-mistral-7b-64k": {**_LOCAL, "context_window": 65_536, "max_output_tokens": 4096, "tokenizer": "mistral"},
+    "xwin-lm-70b": {**_LOCAL, "context_window": 4096, "max_output_tokens": 2048, "tokenizer": "llama"},
+}
+
+# Used for models no entry matches; deliberately conservative
+DEFAULT_CAPABILITIES = ModelCapabilities(
+    provider="unknown", context_window=4096, max_output_tokens=2048, tokenizer="default", supports_tools=False
+)
+
+
+class ModelRegistry:
+    """Capabilities by model name pattern."""
+
+    def __init__(self, overrides: Optional[Mapping[str, Mapping[str, Any]]] = None):
+        """
+        Args:
+            overrides: Entries (pattern -> fields) added to the built-in ones; fields of an existing
+                pattern override only those fields.
+        """
+        self.entries: Dict[str, Dict[str, Any]] = {pattern: dict(fields) for pattern, fields in BUILTIN_MODEL_CAPABILITIES.items()}
+        for pattern, fields in (overrides or {}).items():
+            pattern = pattern.lower()
+            unknown = set(fields) - {f.name for f in dataclasses.fields(ModelCapabilities)}
+            if unknown:
+                logger.warning(f"Ignoring unknown MODEL_CAPABILITIES fields for '{pattern}': {sorted(unknown)}")
+            base = self.entries.get(pattern, dataclasses.asdict(DEFAULT_CAPABILITIES))
+            self.entries[pattern] = {**base, **{k: v for k, v in fields.items() if k not in unknown}}
+        self._lookup = lru_cache(maxsize=256)(self._resolve)
+
+    def _resolve(self, model_name: str) -> ModelCapabilities:
+        name = model_name.lower()
+        matches = [pattern for pattern in self.entries if pattern in name]
+        if not matches:
+            logger.warning(f"No capabilities known for model '{model_name}'; assuming a {DEFAULT_CAPABILITIES.context_window}-token context window. Add it to MODEL_CAPABILITIES in config.yaml.")
+            return DEFAULT_CAPABILITIES
+        return ModelCapabilities(**self.entries[max(matches, key=len)])
+
+    def get(self, model_name: Optional[str]) -> ModelCapabilities:
+        """Capabilities of a model by name (DEFAULT_CAPABILITIES if unknown)."""
+        if not model_name:
+            return DEFAULT_CAPABILITIES
+        return self._lookup(model_name)
+
+
+def _unwrap(llm: Any) -> Any:
+    """The client inside the retry wrapper (RetryingLLM keeps it in .llm)."""
+    inner = getattr(llm, "llm", None)
+    return inner if isinstance(inner, BaseLanguageModel) else llm
+
+
+def get_model_name(llm: Any) -> Optional[str]:
+    """Model name of an LLM client, looking through the retry wrapper; local models by GGUF file name."""
+    llm = _unwrap(llm)
+    for attribute in ("model_name", "model"):
+        value = getattr(llm, attribute, None)
+        if isinstance(value, str) and value:
+            return value
+    model_path = getattr(llm, "model_path", None)
+    if isinstance(model_path, str) and model_path:
+        return Path(model_path).name
+    return None
+
+
+_registry = ModelRegistry(MODEL_CAPABILITIES)
+
+
+def get_model_capabilities(model_name: Optional[str]) -> ModelCapabilities:
+    """Capabilities of a model by name, from the built-in entries and MODEL_CAPABILITIES."""
+    return _registry.get(model_name)
+
+
+def get_llm_capabilities(llm: Any) -> ModelCapabilities:
+    """Capabilities of an LLM client; for local models the context window is capped at the loaded n_ctx."""
+    capabilities = get_model_capabilities(get_model_name(llm))
+    n_ctx = getattr(_unwrap(llm), "n_ctx", None)
+    if isinstance(n_ctx, int) and 0 < n_ctx < capabilities.context_window:
+        capabilities = dataclasses.replace(capabilities, context_window=n_ctx)
+    return capabilities
+
+
+def estimate_token_count(char_count: int, model_name: Optional[str] = None) -> int:
+    """Rough token count of a text of char_count characters for a model's tokenizer family (for calls that report no usage)."""
+    tokenizer = get_model_capabilities(model_name).tokenizer
+    return int(char_count / CHARS_PER_TOKEN.get(tokenizer, CHARS_PER_TOKEN["default"]))
@@ -0,0 +1,249 @@
+"""
+Near-duplicate summary cache for summarization calls.
+
+Exact-match caching (NormalizingCache, the content store) misses the same article served under
+another URL, AMP vs canonical pages and syndicated press releases: the text differs by a few
+navigation lines or a byline, so every copy is summarized again. This cache keys summaries by a
+MinHash sketch of the document text instead and returns a stored summary when the estimated
+Jaccard similarity of word shingles reaches NEAR_DUPLICATE_THRESHOLD.
+
+Sketches are bottom-k MinHash: every shingle is hashed once and the k smallest hashes are kept,
+which is cheap in pure Python and gives an unbiased Jaccard estimate. Candidates are found
+through the few smallest hashes of each sketch (two documents with high similarity almost always
+share one of them), so a lookup only compares sketches of plausible matches.
+"""
+
+import hashlib
+import heapq
+import logging
+import re
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import (
+    ENABLE_NEAR_DUPLICATE_CACHE,
+    NEAR_DUPLICATE_DB_PATH,
+    NEAR_DUPLICATE_THRESHOLD,
+    NEAR_DUPLICATE_SKETCH_SIZE,
+    NEAR_DUPLICATE_SHINGLE_WORDS,
+    NEAR_DUPLICATE_TTL_HOURS,
+    NEAR_DUPLICATE_MAX_ENTRIES,
+)
+from src.sqlite_store import ProcessStore, SqliteStore, resolve_ttl_seconds
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+# Hashes are kept below 2**63 so they fit SQLite's signed INTEGER
+_HASH_MASK = (1 << 63) - 1
+
+
+def _shingle_hashes(text: str, shingle_words: int) -> set:
+    """Hashes of all word n-grams of the lowercased text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_words:
+        return set()
+    hashes = set()
+    for i in range(len(words) - shingle_words + 1):
+        shingle = " ".join(words[i:i + shingle_words]).encode("utf-8")
+        hashes.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little") & _HASH_MASK)
+    return hashes
+
+
+def minhash_sketch(text: str, sketch_size: int = NEAR_DUPLICATE_SKETCH_SIZE, shingle_words: int = NEAR_DUPLICATE_SHINGLE_WORDS) -> List[int]:
+    """Bottom-k MinHash sketch of a text: the sketch_size smallest shingle hashes, ascending."""
+    return heapq.nsmallest(sketch_size, _shingle_hashes(text, shingle_words))
+
+
+def estimate_similarity(a: List[int], b: List[int], sketch_size: int = NEAR_DUPLICATE_SKETCH_SIZE) -> float:
+    """Estimate the Jaccard similarity of two documents from their bottom-k sketches."""
+    if not a or not b:
+        return 0.0
+    set_a, set_b = set(a), set(b)
+    union_sketch = heapq.nsmallest(sketch_size, set_a | set_b)
+    shared = sum(1 for h in union_sketch if h in set_a and h in set_b)
+    return shared / len(union_sketch)
+
+
+def _pack(sketch: List[int]) -> bytes:
+    return struct.pack(f"<{len(sketch)}q", *sketch)
+
+
+def _unpack(blob: bytes) -> List[int]:
+    return list(struct.unpack(f"<{len(blob) // 8}q", blob))
+
+
+@dataclass
+class NearDuplicateStats:
+    """Statistics for the near-duplicate summary cache."""
+    hits: int = 0
+    misses: int = 0
+    skipped: int = 0
+    candidates: int = 0
+    expired: int = 0
+    evicted: int = 0
+    best_similarity: float = 0.0
+
+
+class NearDuplicateSummaryCache(SqliteStore):
+    """Summaries keyed by MinHash sketches of the summarized text, per summarizer tag."""
+
+    TABLE = "near_duplicate_summaries"
+    KEY_COLUMN = "entry_key"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS near_duplicate_summaries (
+            entry_key TEXT PRIMARY KEY,
+            tag TEXT NOT NULL,
+            sketch BLOB NOT NULL,
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL,
+            size_bytes INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS near_duplicate_anchors (
+            anchor INTEGER NOT NULL,
+            entry_key TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_near_duplicate_anchors ON near_duplicate_anchors (anchor);
+        CREATE INDEX IF NOT EXISTS idx_near_duplicate_last_accessed ON near_duplicate_summaries (last_accessed);
+        CREATE TRIGGER IF NOT EXISTS near_duplicate_drop_anchors AFTER DELETE ON near_duplicate_summaries
+        BEGIN
+            DELETE FROM near_duplicate_anchors WHERE entry_key = old.entry_key;
+        END;
+    """
+    # Smallest hashes of a sketch used to find candidates
+    ANCHORS = 8
+
+    def __init__(
+        self,
+        db_path: str = NEAR_DUPLICATE_DB_PATH,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+        sketch_size: int = NEAR_DUPLICATE_SKETCH_SIZE,
+        shingle_words: int = NEAR_DUPLICATE_SHINGLE_WORDS,
+        ttl_hours: float = NEAR_DUPLICATE_TTL_HOURS,
+        max_entries: int = NEAR_DUPLICATE_MAX_ENTRIES,
+    ):
+        """
+        Args:
+            db_path: Path of the SQLite database file.
+            threshold: Minimum estimated Jaccard similarity for a stored summary to be reused.
+            sketch_size: Number of hashes kept per document (larger = more accurate estimates).
+            shingle_words: Words per shingle.
+            ttl_hours: How long summaries are reused (0 = never expire).
+            max_entries: Least recently used summaries are evicted beyond this.
+        """
+        self.threshold = threshold
+        self.sketch_size = sketch_size
+        self.shingle_words = shingle_words
+        self.ttl_seconds = resolve_ttl_seconds(ttl_hours)
+        self.max_entries = max_entries
+        self.stats = NearDuplicateStats()
+        super().__init__(db_path)
+        logger.info(f"Near-duplicate summary cache initialized at {db_path} (threshold {threshold}, sketch size {sketch_size})")
+
+    def sketch(self, text: str) -> Optional[List[int]]:
+        """Sketch a text, or None if it is too short for a meaningful estimate."""
+        sketch = minhash_sketch(text, self.sketch_size, self.shingle_words)
+        return sketch if len(sketch) >= self.sketch_size // 2 else None
+
+    def find(self, text: str, tag: str, sketch: Optional[List[int]] = None) -> Optional[Tuple[str, float]]:
+        """Return (summary, similarity) of the most similar stored text for this tag, if above the threshold.
+
+        Args:
+            text: The text about to be summarized.
+            tag: Summarizer tag (e.g. the summarizer model, or "condense:<model>"); only entries with the same tag match.
+            sketch: Precomputed sketch of text, if available.
+        """
+        try:
+            sketch = sketch or self.sketch(text)
+            if sketch is None:
+                self.stats.skipped += 1
+                return None
+            anchors = sketch[:self.ANCHORS]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"""
+                    SELECT DISTINCT s.entry_key, s.sketch, s.summary, s.created_at FROM near_duplicate_anchors a
+                    JOIN near_duplicate_summaries s ON s.entry_key = a.entry_key
+                    WHERE a.anchor IN ({','.join('?' * len(anchors))}) AND s.tag = ?
+                    """,
+                    [*anchors, tag],
+                ).fetchall()
+                self.stats.candidates += len(rows)
+                best: Optional[Tuple[str, str, float]] = None
+                for entry_key, blob, summary, created_at in rows:
+                    if self._expire_if_stale(entry_key, created_at, self.ttl_seconds):
+                        continue
+                    similarity = estimate_similarity(sketch, _unpack(blob), self.sketch_size)
+                    if best is None or similarity > best[2]:
+                        best = (entry_key, summary, similarity)
+                if best is not None and best[2] >= self.threshold:
+                    self._touch(best[0])
+            if best is None or best[2] < self.threshold:
+                self.stats.misses += 1
+                if best is not None:
+                    logger.info(f"Near-duplicate miss: best similarity {best[2]:.2f} below threshold {self.threshold}")
+                return None
+            self.stats.hits += 1
+            self.stats.best_similarity = max(self.stats.best_similarity, best[2])
+            logger.info(f"Near-duplicate summary hit (similarity {best[2]:.2f} >= {self.threshold}, tag '{tag}')")
+            return best[1], best[2]
+        except Exception as e:
+            logger.warning(f"Near-duplicate lookup failed: {e}")
+            return None
+
+    def put(self, text: str, summary: str, tag: str, sketch: Optional[List[int]] = None) -> None:
+        """Store the summary generated from text under this tag."""
+        if not summary:
+            return
+        try:
+            sketch = sketch or self.sketch(text)
+            if sketch is None:
+                return
+            entry_key = f"{tag}|{hashlib.sha256(_pack(sketch)).hexdigest()}"
+            now = time.time()
+            with self._lock:
+                self._conn.execute("DELETE FROM near_duplicate_summaries WHERE entry_key = ?", (entry_key,))
+                self._conn.execute(
+                    """
+                    INSERT INTO near_duplicate_summaries (entry_key, tag, sketch, summary, created_at, last_accessed, size_bytes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (entry_key, tag, _pack(sketch), summary, now, now, len(summary.encode("utf-8")) + 8 * len(sketch)),
+                )
+                self._conn.executemany(
+                    "INSERT INTO near_duplicate_anchors (anchor, entry_key) VALUES (?, ?)",
+                    [(anchor, entry_key) for anchor in sketch[:self.ANCHORS]],
+                )
+                self._conn.commit()
+                self._evict_lru(max_entries=self.max_entries)
+        except Exception as e:
+            logger.warning(f"Failed to store near-duplicate summary: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, the threshold in use and the number of stored summaries."""
+        lookups = self.stats.hits + self.stats.misses
+        return {
+            "threshold": self.threshold,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "hit_rate": self.stats.hits / lookups if lookups else 0.0,
+            "skipped": self.stats.skipped,
+            "candidates": self.stats.candidates,
+            "best_similarity": self.stats.best_similarity,
+            "expired": self.stats.expired,
+            "evicted": self.stats.evicted,
+            **self._size(),
+        }
+
+
+_near_duplicate_cache: ProcessStore[NearDuplicateSummaryCache] = ProcessStore(
+    NearDuplicateSummaryCache, ENABLE_NEAR_DUPLICATE_CACHE, f"near-duplicate summary cache at {NEAR_DUPLICATE_DB_PATH}"
+)
+
+
+def get_near_duplicate_cache() -> Optional[NearDuplicateSummaryCache]:
+    """Return the process-wide near-duplicate cache, or None if ENABLE_NEAR_DUPLICATE_CACHE is off or it cannot be opened."""
+    return _near_duplicate_cache.get()
@@ -0,0 +1,317 @@
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple, Union
+
+import pymupdf  # PyMuPDF's import name is now pymupdf, not fitz
+
+from config.settings import (
+    PDF_EXTRACTION_WORKERS,
+    PDF_PAGES_PER_TASK,
+    PDF_MAX_PAGES,
+    PDF_MAX_TOKENS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Separator between pages in the extracted text (same output as the previous serial extractor)
+PAGE_BREAK = " \n--- Page Break --- \n"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_encoding = None
+
+
+@dataclass
+class PdfPage:
+    """Text and layout stats of a single extracted PDF page."""
+    number: int
+    text: str
+    tokens: int
+    blocks: int
+    images: int
+
+
+def _count_tokens(text: str) -> int:
+    """tiktoken count, loaded lazily so worker processes only pay for it once."""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if not _encoding:
+        return len(text) // 4
+    try:
+        return len(_encoding.encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def _open_pdf(source: Union[bytes, str]) -> "pymupdf.Document":
+    """Open a PDF from raw bytes or from a file path."""
+    if isinstance(source, str):
+        return pymupdf.open(source, filetype="pdf")
+    return pymupdf.open(stream=source, filetype="pdf")
+
+
+def _extract_page_range(source: Union[bytes, str], start: int, end: int) -> List[Tuple[int, str, int, int, int]]:
+    """Extract pages [start, end) of a PDF. Runs inside a worker process.
+
+    Each page is read with a single get_text("blocks") call: the text blocks give both the
+    page text and the block count used to detect scanned documents.
+
+    Args:
+        source: Raw PDF data, or the path of a temp file holding it (cheap to send to a worker).
+
+    Returns:
+        List of (page_number, text, tokens, block_count, image_count) tuples.
+    """
+    results = []
+    with _open_pdf(source) as doc:
+        for page_num in range(start, min(end, len(doc))):
+            page = doc.load_page(page_num)
+            image_count = len(page.get_images(full=True))
+            blocks = page.get_text("blocks")
+            # Block tuples are (x0, y0, x1, y1, text, block_no, block_type); type 1 is an image
+            raw_text = "".join(block[4] for block in blocks if block[6] == 0)
+            text = ' \n'.join(line.strip() for line in raw_text.splitlines() if line.strip())
+            results.append((page_num, text, _count_tokens(text), len(blocks), image_count))
+    return results
+
+
+def _count_pages(source: Union[bytes, str]) -> int:
+    with _open_pdf(source) as doc:
+        return len(doc)
+
+
+def get_pdf_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared PDF worker pool, or None if PDF_EXTRACTION_WORKERS is 0."""
+    global _executor
+    if PDF_EXTRACTION_WORKERS <= 0:
+        return None
+    if _executor is None:
+        # 'spawn' avoids forking a process that runs Playwright and the event loop threads
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Started PDF extraction pool with {PDF_EXTRACTION_WORKERS} worker processes")
+    return _executor
+
+
+def shutdown_pdf_executor():
+    """Stop the PDF worker pool. It is recreated on next use."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("PDF extraction pool shut down")
+
+
+async def _run_in_worker(func: Callable, *args: Any):
+    """Run func in the PDF process pool, falling back to a thread if the pool is unavailable."""
+    global _executor
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    if executor is not None:
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF extraction pool broke ({e}); retrying in a thread")
+            _executor = None
+    return await asyncio.to_thread(func, *args)
+
+
+@contextlib.asynccontextmanager
+async def _worker_source(pdf_bytes: bytes) -> AsyncIterator[Union[bytes, str]]:
+    """Give worker processes a temp file path instead of pickling the whole PDF into every task."""
+    if get_pdf_executor() is None:
+        yield pdf_bytes
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        yield path
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+
+
+async def iter_pdf_pages(pdf_bytes: bytes, max_pages: Optional[int] = None, total_pages: Optional[int] = None) -> AsyncIterator[PdfPage]:
+    """Stream the pages of a PDF in order while they are extracted in parallel.
+
+    Page ranges are parsed concurrently in the worker pool; pages are yielded as soon as
+    their range is done, so consumers can stop early. Stopping the iteration cancels
+    ranges that have not started yet.
+
+    Args:
+        pdf_bytes: Raw PDF data.
+        max_pages: Only extract the first max_pages pages (None or 0 = all pages).
+        total_pages: Page count if already known, saves opening the document once more.
+
+    Yields:
+        PdfPage objects in page order.
+    """
+    if total_pages is None:
+        total_pages = await asyncio.to_thread(_count_pages, pdf_bytes)
+    page_limit = min(total_pages, max_pages) if max_pages else total_pages
+    if page_limit == 0:
+        return
+
+    # Enough ranges to keep every worker busy; each task gets the PDF's temp file path, not its bytes
+    workers = max(1, PDF_EXTRACTION_WORKERS)
+    per_task = max(PDF_PAGES_PER_TASK, math.ceil(page_limit / (workers * 2)))
+    async with _worker_source(pdf_bytes) as source:
+        tasks = [
+            asyncio.ensure_future(_run_in_worker(_extract_page_range, source, start, min(start + per_task, page_limit)))
+            for start in range(0, page_limit, per_task)
+        ]
+        try:
+            for task in tasks:
+                for page_num, text, tokens, blocks, images in await task:
+                    yield PdfPage(number=page_num, text=text, tokens=tokens, blocks=blocks, images=images)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+def _build_pdf_result(pages: List[PdfPage], total_pages: int, pdf_size_kb: float, start_time: float, truncated: bool) -> dict:
+    """Assemble the extraction result dict from extracted pages."""
+    text_content = PAGE_BREAK.join(page.text for page in pages if page.text)
+    image_count = sum(page.images for page in pages)
+    text_blocks_count = sum(page.blocks for page in pages)
+    token_count = sum(page.tokens for page in pages)
+    pages_extracted = len(pages)
+
+    # Detect if PDF is likely scanned/image-based with little text
+    is_mostly_images = False
+    if image_count > 0 and (
+        text_blocks_count < pages_extracted * 3 or  # Few text blocks per page
+        len(text_content.strip()) < 100 * pages_extracted  # Very little text per page
+    ):
+        is_mostly_images = True
+        logger.warning(f"PDF appears to be primarily image-based: {image_count} images, {text_blocks_count} text blocks, {len(text_content)} chars in {pages_extracted} pages")
+
+    extraction_time = time.time() - start_time
+    logger.info(
+        f"PDF extraction complete: {pages_extracted}/{total_pages} pages, ~{token_count} tokens, "
+        f"{pdf_size_kb:.1f} KB in {extraction_time:.2f}s{' (truncated)' if truncated else ''}"
+    )
+
+    if not text_content.strip():
+        return {
+            "title": "PDF Document (Empty)",
+            "full_content": "(PDF content appears empty or could not be extracted)",
+            "toc": ["Empty Document"],
+            "sections": {"Empty Document": "(PDF content appears empty or could not be extracted)"}
+        }
+    elif is_mostly_images:
+        return {
+            "title": "PDF Document (Primarily Images)",
+            "full_content": f"# PDF Content (Primarily Image-Based)\n\nThis PDF appears to be primarily image-based or scanned. Limited text extracted:\n\n{text_content}",
+            "toc": ["Image-Based PDF"],
+            "sections": {"Image-Based PDF": f"This PDF contains {image_count} images and appears to be scanned or primarily graphics-based. Limited text could be extracted."}
+        }
+
+    if truncated:
+        text_content += f"\n\n[PDF truncated: extracted {pages_extracted} of {total_pages} pages]"
+    return {
+        "title": "PDF Document",
+        "full_content": f"# PDF Content\n\n{text_content}",
+        "toc": ["PDF Content"],
+        "sections": {"PDF Content": text_content},
+        "pages_extracted": pages_extracted,
+        "total_pages": total_pages,
+    }
+
+
+def _error_result(e: Exception) -> dict:
+    logger.error(f"PyMuPDF failed to extract text from PDF: {e}", exc_info=True)
+    return {
+        "title": "Error during PDF extraction",
+        "full_content": f"Error during PDF content extraction: {str(e)}",
+        "toc": ["Error"],
+        "sections": {"Error": f"Error during PDF content extraction: {str(e)}"}
+    }
+
+
+async def aextract_content_from_pdf(
+    pdf_bytes: bytes,
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    max_tokens: Optional[int] = PDF_MAX_TOKENS,
+    on_page: Optional[Callable[[PdfPage], Any]] = None,
+) -> dict:
+    """Extract text from PDF bytes in the worker pool without blocking the event loop.
+
+    Args:
+        pdf_bytes: Raw PDF data.
+        max_pages: Stop after this many pages (None or 0 = no limit).
+        max_tokens: Stop once the extracted text reaches this many tokens (None or 0 = no limit).
+        on_page: Optional callback (sync or async) invoked with each PdfPage as it arrives.
+
+    Returns:
+        Dict with title, full_content, toc and sections, like extract_content_from_html.
+    """
+    start_time = time.time()
+    pdf_size_kb = len(pdf_bytes) / 1024
+    try:
+        # Counting pages only reads the page tree; done in a thread so the bytes are not pickled to a worker
+        total_pages = await asyncio.to_thread(_count_pages, pdf_bytes)
+        logger.info(f"Processing PDF: {total_pages} pages, {pdf_size_kb:.1f} KB")
+        pages: List[PdfPage] = []
+        tokens = 0
+        truncated = bool(max_pages) and total_pages > max_pages
+        page_stream = iter_pdf_pages(pdf_bytes, max_pages=max_pages, total_pages=total_pages)
+        try:
+            async for page in page_stream:
+                pages.append(page)
+                tokens += page.tokens
+                if on_page is not None:
+                    result = on_page(page)
+                    if asyncio.iscoroutine(result):
+                        await result
+                if max_tokens and tokens >= max_tokens:
+                    truncated = len(pages) < total_pages
+                    logger.info(f"PDF token cap reached ({tokens} >= {max_tokens}) after {len(pages)} pages")
+                    break
+        finally:
+            await page_stream.aclose()
+        return _build_pdf_result(pages, total_pages, pdf_size_kb, start_time, truncated)
+    except Exception as e:
+        return _error_result(e)
+
+
+def extract_content_from_pdf(
+    pdf_bytes: bytes,
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    max_tokens: Optional[int] = PDF_MAX_TOKENS,
+) -> dict:
+    """Synchronous, in-process variant of aextract_content_from_pdf for non-async callers."""
+    start_time = time.time()
+    try:
+        total_pages = _count_pages(pdf_bytes)
+        page_limit = min(total_pages, max_pages) if max_pages else total_pages
+        pages: List[PdfPage] = []
+        tokens = 0
+        for page_num, text, page_tokens, blocks, images in _extract_page_range(pdf_bytes, 0, page_limit):
+            pages.append(PdfPage(number=page_num, text=text, tokens=page_tokens, blocks=blocks, images=images))
+            tokens += page_tokens
+            if max_tokens and tokens >= max_tokens:
+                break
+        truncated = len(pages) < total_pages
+        return _build_pdf_result(pages, total_pages, len(pdf_bytes) / 1024, start_time, truncated)
+    except Exception as e:
+        return _error_result(e)
@@ -0,0 +1,183 @@
+"""
+Local retrieval: an incremental BM25 index over text passages, optionally blended with
+embeddings from a small CPU sentence-transformers model.
+
+Used to rank accumulated research content against the topic when packing the final-report
+prompt into a token budget, and by ContentManager to find the chunks relevant to a follow-up
+question. Documents can be added and removed one at a time; document frequencies and the
+average length are kept up to date, so scoring never needs a rebuild.
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Embeddings need the optional 'sentence-transformers' package; retrieval is BM25-only without it
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
+_TOKEN_RE = re.compile(r"\w+")
+# Very common English words that carry no signal for ranking
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or that the this to was "
+    "were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a text, without stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over documents that are added (and removed) incrementally."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            k1: Term frequency saturation.
+            b: Document length normalization (0 = none, 1 = full).
+        """
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: Dict[Hashable, Counter] = {}
+        self.doc_lengths: Dict[Hashable, int] = {}
+        self.doc_freqs: Counter = Counter()
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index a document (replacing any document with the same id)."""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        freqs = Counter(tokens)
+        self.term_freqs[doc_id] = freqs
+        self.doc_lengths[doc_id] = len(tokens)
+        self.doc_freqs.update(freqs.keys())
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: Hashable) -> None:
+        """Drop a document from the index (no-op if it is not indexed)."""
+        freqs = self.term_freqs.pop(doc_id, None)
+        if freqs is None:
+            return
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        self.doc_freqs.subtract(freqs.keys())
+        for term in freqs:
+            if self.doc_freqs[term] <= 0:
+                del self.doc_freqs[term]
+
+    def _idf(self, term: str) -> float:
+        df = self.doc_freqs.get(term, 0)
+        # BM25+ style floor keeps very common terms from scoring negative
+        return math.log(1 + (len(self.doc_lengths) - df + 0.5) / (df + 0.5))
+
+    def score(self, query: str, doc_ids: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, float]:
+        """BM25 score of every document (or of doc_ids) for a query."""
+        terms = set(tokenize(query))
+        avg_length = self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+        idfs = {term: self._idf(term) for term in terms if term in self.doc_freqs}
+        scores: Dict[Hashable, float] = {}
+        for doc_id in (self.doc_lengths if doc_ids is None else doc_ids):
+            freqs = self.term_freqs.get(doc_id)
+            if freqs is None:
+                continue
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length) if avg_length else self.k1
+            total = 0.0
+            for term, idf in idfs.items():
+                tf = freqs.get(term, 0)
+                if tf:
+                    total += idf * tf * (self.k1 + 1) / (tf + norm)
+            scores[doc_id] = total
+        return scores
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Hashable, float]]:
+        """The k best matching documents with a positive score, best first."""
+        scores = self.score(query)
+        ranked = sorted(((doc_id, score) for doc_id, score in scores.items() if score > 0), key=lambda item: item[1], reverse=True)
+        return ranked[:k]
+
+
+class EmbeddingIndex:
+    """Cosine similarity search over normalized embeddings, encoded as documents are added."""
+
+    def __init__(self, encoder: Any):
+        """
+        Args:
+            encoder: Object with a sentence-transformers style encode(texts, normalize_embeddings=True).
+        """
+        self.encoder = encoder
+        self.vectors: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self.vectors
+
+    def add_many(self, items: Sequence[Tuple[Hashable, str]]) -> None:
+        """Encode and index documents in one batch (replacing documents with the same ids)."""
+        if not items:
+            return
+        embeddings = self.encoder.encode([text for _, text in items], normalize_embeddings=True)
+        for (doc_id, _), vector in zip(items, embeddings):
+            self.vectors[doc_id] = np.asarray(vector, dtype=np.float32)
+
+    def remove(self, doc_id: Hashable) -> None:
+        """Drop a document from the index (no-op if it is not indexed)."""
+        self.vectors.pop(doc_id, None)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Hashable, float]]:
+        """The k documents most similar to the query, best first."""
+        if not self.vectors:
+            return []
+        doc_ids = list(self.vectors)
+        query_vector = np.asarray(self.encoder.encode([query], normalize_embeddings=True)[0], dtype=np.float32)
+        similarities = np.stack([self.vectors[doc_id] for doc_id in doc_ids]) @ query_vector
+        best = np.argsort(-similarities)[:k]
+        return [(doc_ids[i], float(similarities[i])) for i in best]
+
+
+@lru_cache(maxsize=None)
+def _load_encoder(model_name: str) -> Any:
+    """Load a sentence-transformers model once per process."""
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def get_embedding_index(model_name: Optional[str]) -> Optional[EmbeddingIndex]:
+    """Create an embedding index for the configured model, or None if disabled or unavailable."""
+    if not model_name:
+        return None
+    if not EMBEDDINGS_AVAILABLE:
+        logger.warning(f"RETRIEVAL_EMBEDDING_MODEL is set to {model_name} but sentence-transformers is not installed; using BM25 only")
+        return None
+    try:
+        return EmbeddingIndex(_load_encoder(model_name))
+    except Exception as e:
+        logger.warning(f"Could not load embedding model {model_name}, using BM25 only: {e}")
+        return None
+
+
+def fuse_rankings(rankings: Iterable[List[Tuple[Hashable, float]]], k: int = 10, rrf_k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Merge several best-first rankings by reciprocal rank fusion (scores on different scales are fine)."""
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
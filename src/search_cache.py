@@ -0,0 +1,152 @@
+"""
+Persistent search result cache shared by all browser tool instances.
+
+Every Google search costs a homepage navigation, typing, a settle delay and DOM scraping, and
+each one risks a CAPTCHA. Results are kept in a small SQLite database keyed by the normalized
+query (as produced by PlaywrightBrowserTool.clean_search_query, lowercased) and the result page,
+so a repeated or trivially re-spelled query is answered without opening the browser, in this
+session and in later ones.
+
+Entries expire after SEARCH_CACHE_TTL_HOURS and the cache holds at most SEARCH_CACHE_MAX_ENTRIES
+entries, evicting the least recently used first.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from config.settings import (
+    ENABLE_SEARCH_CACHE,
+    SEARCH_CACHE_DB_PATH,
+    SEARCH_CACHE_TTL_HOURS,
+    SEARCH_CACHE_MAX_ENTRIES,
+)
+from src.sqlite_store import ProcessStore, SqliteStore, resolve_ttl_seconds
+
+logger = logging.getLogger(__name__)
+
+
+def search_cache_key(normalized_query: str, page: int = 1, engine: str = "google") -> str:
+    """Build the cache key for an already normalized query and result page."""
+    return f"{engine}|{page}|{' '.join(normalized_query.lower().split())}"
+
+
+@dataclass
+class SearchCacheStats:
+    """Statistics for the search result cache."""
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+
+class SearchResultCache(SqliteStore):
+    """SQLite-backed cache of search results, shared across tool instances and sessions."""
+
+    TABLE = "search_cache"
+    KEY_COLUMN = "cache_key"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS search_cache (
+            cache_key TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            result_limit INTEGER,
+            results TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_cache_last_accessed ON search_cache (last_accessed);
+    """
+
+    def __init__(
+        self,
+        db_path: str = SEARCH_CACHE_DB_PATH,
+        ttl_hours: float = SEARCH_CACHE_TTL_HOURS,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+    ):
+        """
+        Args:
+            db_path: Path of the SQLite database file.
+            ttl_hours: How long results stay fresh (0 = never expire).
+            max_entries: Maximum number of cached queries; least recently used ones are evicted beyond it.
+        """
+        self.ttl_seconds = resolve_ttl_seconds(ttl_hours)
+        self.max_entries = max_entries
+        self.stats = SearchCacheStats()
+        super().__init__(db_path)
+        logger.info(f"Search result cache initialized at {db_path} (TTL {ttl_hours} h, max {max_entries} entries)")
+
+    def get(self, normalized_query: str, page: int = 1, min_results: Optional[int] = None) -> Optional[Any]:
+        """Return cached results for a query/page, or None if missing or expired.
+
+        Args:
+            normalized_query: The cleaned query.
+            page: Result page number.
+            min_results: Number of results the caller needs. An entry that was stored with a smaller
+                limit and filled it completely may be truncated, so it counts as a miss.
+        """
+        cache_key = search_cache_key(normalized_query, page)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT results, result_limit, created_at FROM search_cache WHERE cache_key = ?",
+                    (cache_key,),
+                ).fetchone()
+                if row is not None and self._expire_if_stale(cache_key, row[2], self.ttl_seconds):
+                    row = None
+                if row is not None:
+                    self._touch(cache_key)
+            if row is None:
+                self.stats.misses += 1
+                return None
+            results = json.loads(row[0])
+            if min_results and row[1] and row[1] < min_results and isinstance(results, list) and len(results) >= row[1]:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            logger.info(f"Search cache hit for '{normalized_query}' (page {page})")
+            return results
+        except Exception as e:
+            logger.warning(f"Search cache lookup failed for '{normalized_query}': {e}")
+            return None
+
+    def put(self, normalized_query: str, results: Any, page: int = 1, result_limit: Optional[int] = None) -> None:
+        """Store results (a list of result dicts or formatted text) for a query/page."""
+        if not results:
+            return
+        try:
+            now = time.time()
+            with self._lock:
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO search_cache (cache_key, query, page, result_limit, results, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (search_cache_key(normalized_query, page), normalized_query, page, result_limit, json.dumps(results), now, now),
+                )
+                self._conn.commit()
+                self._evict_lru(max_entries=self.max_entries)
+        except Exception as e:
+            logger.warning(f"Failed to cache search results for '{normalized_query}': {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters together with the number of cached queries."""
+        return {
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "expired": self.stats.expired,
+            "evicted": self.stats.evicted,
+            **self._size(),
+        }
+
+
+_search_cache: ProcessStore[SearchResultCache] = ProcessStore(
+    SearchResultCache, ENABLE_SEARCH_CACHE, f"search cache at {SEARCH_CACHE_DB_PATH}"
+)
+
+
+def get_search_cache() -> Optional[SearchResultCache]:
+    """Return the process-wide search cache, or None if ENABLE_SEARCH_CACHE is off or it cannot be opened."""
+    return _search_cache.get()
@@ -0,0 +1,160 @@
+"""
+Shared plumbing for the small SQLite-backed stores (content store, search cache, ...).
+
+Each store is one table keyed by a text key with created_at / last_accessed timestamps and an
+optional size_bytes column. This module holds everything that does not depend on the table
+layout: opening the database, TTL resolution and expiry, least-recently-used eviction by entry
+count or total size, and the lazily created process-wide instance.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Generic, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_ttl_seconds(ttl_hours: Union[float, Dict[str, float], None], kind: Optional[str] = None, default_hours: float = 0) -> Optional[float]:
+    """Resolve a TTL in seconds, or None for "never expires".
+
+    Args:
+        ttl_hours: Hours as a number, or a mapping of kind -> hours with a "default" entry.
+            Mapping keys match exactly first, then as a substring of kind (e.g. 'pubmedmcp' -> 'pubmed').
+        kind: The kind to resolve (source type, model name, ...) when ttl_hours is a mapping.
+        default_hours: Used when the mapping has no "default" entry.
+    """
+    if isinstance(ttl_hours, dict):
+        kind = (kind or "").lower()
+        hours = ttl_hours.get(kind)
+        if hours is None:
+            for key, value in ttl_hours.items():
+                if key != "default" and key.lower() in kind:
+                    hours = value
+                    break
+        if hours is None:
+            hours = ttl_hours.get("default", default_hours)
+    else:
+        hours = ttl_hours
+    # None or a non-positive value means "never expires"
+    if hours is None or hours <= 0:
+        return None
+    return hours * 3600
+
+
+class SqliteStore:
+    """Base class for a single-table SQLite store with TTL expiry and LRU eviction.
+
+    Subclasses set TABLE, KEY_COLUMN and SCHEMA (executed once on open) and keep their own
+    key and row logic. The table must have created_at and last_accessed columns; size-based
+    eviction also needs size_bytes. self.stats must provide expired and evicted counters.
+    """
+
+    TABLE: str = ""
+    KEY_COLUMN: str = ""
+    SCHEMA: str = ""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        db_dir = Path(db_path).parent
+        if str(db_dir) not in ("", "."):
+            db_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+
+    def _expire_if_stale(self, key: str, created_at: float, ttl_seconds: Optional[float]) -> bool:
+        """Delete an entry older than its TTL. Returns True if it expired. Caller holds the lock."""
+        if ttl_seconds is None or time.time() - created_at <= ttl_seconds:
+            return False
+        self._conn.execute(f"DELETE FROM {self.TABLE} WHERE {self.KEY_COLUMN} = ?", (key,))
+        self._conn.commit()
+        self.stats.expired += 1
+        return True
+
+    def _touch(self, key: str) -> None:
+        """Mark an entry as recently used. Caller holds the lock."""
+        self._conn.execute(f"UPDATE {self.TABLE} SET last_accessed = ? WHERE {self.KEY_COLUMN} = ?", (time.time(), key))
+        self._conn.commit()
+
+    def _evict_lru(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        """Evict least recently used entries beyond max_entries, and beyond max_bytes down to 90%
+        of it (so we do not evict on every insert). Caller holds the lock.
+
+        Returns:
+            Number of evicted entries.
+        """
+        if max_bytes is not None:
+            entries, total = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM {self.TABLE}").fetchone()
+        else:
+            entries, total = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0], 0
+        over_entries = max_entries is not None and entries > max_entries
+        over_bytes = max_bytes is not None and total > max_bytes
+        if not (over_entries or over_bytes):
+            return 0
+        target_entries = max_entries if max_entries is not None else entries
+        target_bytes = int(max_bytes * 0.9) if over_bytes else total
+        columns = f"{self.KEY_COLUMN}, size_bytes" if max_bytes is not None else f"{self.KEY_COLUMN}, 0"
+        to_delete = []
+        for key, size_bytes in self._conn.execute(f"SELECT {columns} FROM {self.TABLE} ORDER BY last_accessed ASC"):
+            if entries <= target_entries and total <= target_bytes:
+                break
+            to_delete.append((key,))
+            entries -= 1
+            total -= size_bytes or 0
+        if not to_delete:
+            return 0
+        self._conn.executemany(f"DELETE FROM {self.TABLE} WHERE {self.KEY_COLUMN} = ?", to_delete)
+        self._conn.commit()
+        self.stats.evicted += len(to_delete)
+        logger.info(f"{self.TABLE} over its cap. Evicted {len(to_delete)} least recently used entries.")
+        return len(to_delete)
+
+    def _size(self) -> Dict[str, int]:
+        """Current number of entries (and bytes, if the table tracks them)."""
+        with self._lock:
+            try:
+                entries, total = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM {self.TABLE}").fetchone()
+                return {"entries": entries, "size_bytes": total}
+            except sqlite3.OperationalError:
+                return {"entries": self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]}
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.TABLE}")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+StoreT = TypeVar("StoreT")
+
+
+class ProcessStore(Generic[StoreT]):
+    """Lazily created, process-wide store instance, or None if disabled or it cannot be opened."""
+
+    def __init__(self, factory: Callable[[], StoreT], enabled: bool, description: str):
+        self._factory = factory
+        self._enabled = enabled
+        self._description = description
+        self._instance: Optional[StoreT] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[StoreT]:
+        if not self._enabled:
+            return None
+        with self._lock:
+            if self._instance is None:
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    logger.error(f"Could not initialize {self._description}: {e}")
+                    return None
+            return self._instance
@@ -0,0 +1,218 @@
+"""
+Map/reduce summarization for documents larger than the summarizer's context window.
+
+LangChain's map_reduce chain maps every chunk with whatever concurrency its batch defaults give,
+so a local LlamaCpp model is hit by several requests at once while a cloud model like Gemini Flash
+is held back. SummarizationEngine runs the map phase itself: chunk summaries are fanned out under
+an asyncio.Semaphore sized per model (high for cloud models, 1 for a local model), and the same
+semaphore bounds the combine calls, so concurrent get_summary calls for different URLs share one
+limit per model.
+
+When the chunk summaries together do not fit the window, they are collapsed group by group
+(tree-reduce) with the combine prompt until they do, and then combined once more into the final
+summary. Each stage's latency is recorded in SummarizationStats.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import BasePromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from config.prompts import CONDENSE_PROMPT, COMBINE_PROMPT
+from src.browser import get_token_count_for_text
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the context window used for prompt input, leaving room for the output
+CONTEXT_FILL_RATIO = 0.8
+# Rough characters per token, used to split single documents that exceed the map budget
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class StageStats:
+    """Latency of one summarization stage (map, collapse or combine)."""
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "total_seconds": round(self.total_seconds, 3),
+            "avg_seconds": round(self.total_seconds / self.calls, 3) if self.calls else 0.0,
+            "max_seconds": round(self.max_seconds, 3),
+        }
+
+
+@dataclass
+class SummarizationStats:
+    """Per-stage latencies of map/reduce summarization runs.
+
+    Call stages time each LLM call; the *_wall stages time a whole phase of a run, so the gap
+    between e.g. map.total_seconds and map_wall.total_seconds is what the fan-out saved.
+    """
+    runs: int = 0
+    chunks: int = 0
+    collapse_levels: int = 0
+    map: StageStats = field(default_factory=StageStats)
+    collapse: StageStats = field(default_factory=StageStats)
+    combine: StageStats = field(default_factory=StageStats)
+    map_wall: StageStats = field(default_factory=StageStats)
+    collapse_wall: StageStats = field(default_factory=StageStats)
+    total: StageStats = field(default_factory=StageStats)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "chunks": self.chunks,
+            "collapse_levels": self.collapse_levels,
+            "map": self.map.to_dict(),
+            "map_wall": self.map_wall.to_dict(),
+            "collapse": self.collapse.to_dict(),
+            "collapse_wall": self.collapse_wall.to_dict(),
+            "combine": self.combine.to_dict(),
+            "total": self.total.to_dict(),
+        }
+
+
+class SummarizationEngine:
+    """Map/reduce summarizer for one model with bounded concurrency and tree-reduce combines."""
+
+    def __init__(
+        self,
+        llm: Runnable,
+        context_window: int,
+        max_concurrency: int = 1,
+        map_prompt: BasePromptTemplate = CONDENSE_PROMPT,
+        combine_prompt: BasePromptTemplate = COMBINE_PROMPT,
+        stats: Optional[SummarizationStats] = None,
+        token_counter: Callable[[str], int] = get_token_count_for_text,
+    ):
+        """
+        Args:
+            llm: Chat model (or any runnable taking a prompt value) used for all calls.
+            context_window: The model's context window in tokens.
+            max_concurrency: Maximum number of concurrent calls to the model (1 for local models).
+            map_prompt: Prompt with a {text} variable applied to each chunk.
+            combine_prompt: Prompt with a {text} variable applied to groups of chunk summaries.
+            stats: Stats object to record into (lets several engines share one).
+            token_counter: Function estimating the token count of a text.
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.count_tokens = token_counter
+        self.stats = stats if stats is not None else SummarizationStats()
+        self.map_chain = map_prompt | llm | StrOutputParser()
+        self.combine_chain = combine_prompt | llm | StrOutputParser()
+        # Input budget per call: the usable part of the window minus the prompt's own instructions
+        prompt_tokens = max(self.count_tokens(map_prompt.template), self.count_tokens(combine_prompt.template))
+        self.token_max = max(int(context_window * CONTEXT_FILL_RATIO) - prompt_tokens, 256)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """The concurrency limit for this model, recreated if used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call(self, chain: Runnable, text: str, stage: StageStats, config: Optional[RunnableConfig]) -> str:
+        async with self._get_semaphore():
+            started = time.perf_counter()
+            result = await chain.ainvoke({"text": text}, config=config)
+            stage.observe(time.perf_counter() - started)
+        return result.strip()
+
+    def _split_oversized(self, docs: List[Document]) -> List[str]:
+        """Chunk texts for the map phase, splitting any document that exceeds the per-call budget."""
+        splitter = None
+        texts: List[str] = []
+        for doc in docs:
+            if self.count_tokens(doc.page_content) <= self.token_max:
+                texts.append(doc.page_content)
+                continue
+            if splitter is None:
+                chunk_chars = self.token_max * CHARS_PER_TOKEN
+                splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_chars, chunk_overlap=chunk_chars // 20)
+            texts.extend(splitter.split_text(doc.page_content))
+        return texts
+
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        """Group consecutive summaries so each group fits the per-call budget (at least pairs)."""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for summary in summaries:
+            tokens = self.count_tokens(summary)
+            if current and current_tokens + tokens > self.token_max:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        if len(groups) == len(summaries):
+            # No two summaries fit together; merge pairwise so each level still halves the count
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        return groups
+
+    async def summarize(self, docs: List[Document], callbacks: Optional[List[Any]] = None) -> str:
+        """Summarize documents: parallel map, tree-reduce collapse while needed, final combine.
+
+        Args:
+            docs: The document chunks to summarize, in order.
+            callbacks: Optional callbacks for the LLM calls.
+
+        Returns:
+            The combined summary.
+        """
+        config: RunnableConfig = {"callbacks": callbacks} if callbacks else {}
+        run_started = time.perf_counter()
+        texts = self._split_oversized(docs)
+        self.stats.runs += 1
+        self.stats.chunks += len(texts)
+
+        started = time.perf_counter()
+        summaries = list(await asyncio.gather(
+            *(self._call(self.map_chain, text, self.stats.map, config) for text in texts)
+        ))
+        map_seconds = time.perf_counter() - started
+        self.stats.map_wall.observe(map_seconds)
+        logger.info(f"Map phase: {len(texts)} chunks in {map_seconds:.2f}s (concurrency {self.max_concurrency})")
+
+        levels = 0
+        while len(summaries) > 1 and sum(self.count_tokens(s) for s in summaries) > self.token_max:
+            levels += 1
+            groups = self._group(summaries)
+            started = time.perf_counter()
+
+            async def _collapse(group: List[str]) -> str:
+                if len(group) == 1:
+                    return group[0]
+                return await self._call(self.combine_chain, "\n\n".join(group), self.stats.collapse, config)
+
+            summaries = list(await asyncio.gather(*(_collapse(group) for group in groups)))
+            collapse_seconds = time.perf_counter() - started
+            self.stats.collapse_wall.observe(collapse_seconds)
+            logger.info(f"Collapse level {levels}: {len(groups)} groups in {collapse_seconds:.2f}s")
+        self.stats.collapse_levels += levels
+
+        final_summary = await self._call(self.combine_chain, "\n\n".join(summaries), self.stats.combine, config)
+        total_seconds = time.perf_counter() - run_started
+        self.stats.total.observe(total_seconds)
+        logger.info(f"Map/reduce summary of {len(texts)} chunks ({levels} collapse levels) in {total_seconds:.2f}s")
+        return final_summary
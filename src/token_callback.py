@@ -27,8 +27,11 @@ from config.settings import (
     USE_LOCAL_SUMMARIZER_MODEL,
     PRIMARY_MODEL_NAME,
     PRIMARY_MODEL_TYPE,
-    NEXT_STEP_MODEL
+    NEXT_STEP_MODEL,
+    PROMPT_CACHE_READ_COST_FACTOR,
+    PROMPT_CACHE_WRITE_COST_FACTOR,
 )
+from src.model_registry import get_model_capabilities, estimate_token_count
 
 logger = logging.getLogger(__name__)
 logger.info("Executing src/token_callback.py module level code...")
@@ -134,6 +137,8 @@ def _get_token_counts(llm_output: Any) -> Tuple[int, int]:
 
 def _calculate_cost(model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
     """Calculate the cost based on the model name and token counts."""
+    if get_model_capabilities(model_name).provider == "local":
+        return 0.0  # Local models run on this machine
     model_name_lower = model_name.lower()
     
     # Use startswith for more specific prefix matching
@@ -164,6 +169,60 @@ def _calculate_cost(model_name: str, prompt_tokens: int, completion_tokens: int)
            ((completion_tokens / 1000) * cost_per_1k_output)
     return cost
 
+def _get_cached_input_tokens(response: LLMResult) -> Tuple[int, int]:
+    """Extract provider prompt-cache usage from an LLM response.
+
+    Returns:
+        Tuple of (input tokens read from the provider's prompt cache, input tokens written to it).
+        Anthropic reports both; Gemini only reports cached (read) tokens.
+    """
+    def from_usage(usage: Any) -> Tuple[int, int]:
+        if not usage or not hasattr(usage, 'get'):
+            return 0, 0
+        details = usage.get('input_token_details') or {}
+        read = details.get('cache_read') or usage.get('cache_read_input_tokens') or usage.get('cached_content_token_count') or 0
+        written = details.get('cache_creation') or usage.get('cache_creation_input_tokens') or 0
+        return int(read), int(written)
+
+    for gen_list in response.generations or []:
+        for gen in gen_list or []:
+            message = getattr(gen, 'message', None)
+            cached = from_usage(getattr(message, 'usage_metadata', None))
+            if any(cached):
+                return cached
+            if gen.generation_info:
+                cached = from_usage(gen.generation_info.get('usage_metadata'))
+                if any(cached):
+                    return cached
+    if response.llm_output and isinstance(response.llm_output, dict):
+        for key in ('usage', 'usage_metadata', 'token_usage'):
+            cached = from_usage(response.llm_output.get(key))
+            if any(cached):
+                return cached
+    return 0, 0
+
+def _cached_input_discount(model_name: str, cached_tokens: int) -> float:
+    """Amount by which the full-price cost overstates cached input tokens (they are billed at a reduced rate)."""
+    if cached_tokens <= 0 or not get_model_capabilities(model_name).supports_prompt_caching:
+        return 0.0
+    model_name_lower = model_name.lower()
+    factors = PROMPT_CACHE_READ_COST_FACTOR or {}
+    factor = next((value for key, value in factors.items() if key in model_name_lower), 1.0)
+    return _calculate_cost(model_name, cached_tokens, 0) * (1.0 - factor)
+
+def _cache_write_premium(model_name: str, written_tokens: int) -> float:
+    """Amount by which the full-price cost understates input tokens written to the prompt cache (billed at a premium)."""
+    if written_tokens <= 0 or not get_model_capabilities(model_name).supports_prompt_caching:
+        return 0.0
+    model_name_lower = model_name.lower()
+    factors = PROMPT_CACHE_WRITE_COST_FACTOR or {}
+    factor = next((value for key, value in factors.items() if key in model_name_lower), 1.0)
+    return _calculate_cost(model_name, written_tokens, 0) * (factor - 1.0)
+
+def _prompt_cache_cost_adjustment(model_name: str, cached_tokens: int, written_tokens: int) -> float:
+    """Correction to the full-price input cost for tokens read from and written to the provider's prompt cache."""
+    return _cache_write_premium(model_name, written_tokens) - _cached_input_discount(model_name, cached_tokens)
+
 class TokenCostProcess:
     """Handles tracking and summarizing token usage and costs."""
     def __init__(self):
@@ -173,6 +232,8 @@ class TokenCostProcess:
         self.cache_hits: Dict[str, Dict[str, int]] = {}
         self.total_cache_input_tokens = 0
         self.total_cache_output_tokens = 0
+        # Provider-side prompt caching (part of the LLM calls' input tokens; reads billed at a reduced rate, writes at a premium)
+        self.prompt_cache: Dict[str, Dict[str, int]] = {}
 
     @property
     def model_usage(self):
@@ -184,6 +245,8 @@ class TokenCostProcess:
             prompt_tokens = usage.get('prompt', 0)
             completion_tokens = usage.get('completion', 0)
             model_cost = _calculate_cost(model_name, prompt_tokens, completion_tokens)
+            cache_usage = self.prompt_cache.get(model_name, {})
+            model_cost += _prompt_cache_cost_adjustment(model_name, cache_usage.get('cached_input', 0), cache_usage.get('cache_write', 0))
             result[model_key] = {
                 'input_tokens': prompt_tokens,
                 'output_tokens': completion_tokens,
@@ -191,7 +254,8 @@ class TokenCostProcess:
                 'total_cost': model_cost,
                 'cache_hits': 0, # Initialize cache hits for this model
                 'cache_input_tokens': 0,
-                'cache_output_tokens': 0
+                'cache_output_tokens': 0,
+                'cached_prompt_tokens': self.prompt_cache.get(model_name, {}).get('cached_input', 0),
             }
             logger.debug(f"TokenCostProcess.model_usage (LLM): Model={model_key}, Input={prompt_tokens}, Output={completion_tokens}, Cost=${model_cost:.4f}")
 
@@ -255,6 +319,14 @@ class TokenCostProcess:
         self.token_usage[model_key]['total'] += prompt_count + completion_count
         logger.debug(f"Updated token usage for {model_key}: +{prompt_count} prompt, +{completion_count} completion. New totals: {self.token_usage[model_key]['prompt']} prompt, {self.token_usage[model_key]['completion']} completion, {self.token_usage[model_key]['total']} total.")
 
+    def update_prompt_cache(self, model_name: str, cached_input_tokens: int, cache_write_tokens: int = 0):
+        """Record input tokens served from (or written to) the provider's prompt cache."""
+        model_key = str(model_name) if model_name is not None else "unknown"
+        usage = self.prompt_cache.setdefault(model_key, {'cached_input': 0, 'cache_write': 0})
+        usage['cached_input'] += cached_input_tokens
+        usage['cache_write'] += cache_write_tokens
+        logger.debug(f"Prompt cache usage for {model_key}: +{cached_input_tokens} cached input, +{cache_write_tokens} written.")
+
     def update_cache_hit(self, model_name: str, input_tokens: int, output_tokens: int):
         """Update statistics for a cache hit."""
         model_name = str(model_name) if model_name is not None else "unknown"
@@ -290,9 +362,12 @@ class TokenCostProcess:
         for model, usage in self.token_usage.items():
             prompt = usage.get('prompt', 0)
             completion = usage.get('completion', 0)
-            cost = _calculate_cost(model, prompt, completion)
+            cached = self.prompt_cache.get(model, {}).get('cached_input', 0)
+            written = self.prompt_cache.get(model, {}).get('cache_write', 0)
+            cost = _calculate_cost(model, prompt, completion) + _prompt_cache_cost_adjustment(model, cached, written)
+            cached_note = f" (Cached Prompt={cached:,})" if cached else ""
             summary_lines.append(
-                f"- {model}: Prompt={prompt:,}, Completion={completion:,}, Total={prompt + completion:,}, Cost=${cost:.4f}"
+                f"- {model}: Prompt={prompt:,}{cached_note}, Completion={completion:,}, Total={prompt + completion:,}, Cost=${cost:.4f}"
             )
             total_prompt += prompt
             total_completion += completion
@@ -318,6 +393,10 @@ class TokenCostProcess:
         summary_lines.append("--- Totals ---")
         summary_lines.append(f"- Total LLM Tokens: {total_tokens:,} (Prompt: {total_prompt:,}, Completion: {total_completion:,})")
         summary_lines.append(f"- Total LLM Cost: ${self.total_cost:.4f}")
+        if self.prompt_cache:
+            cached_total = sum(usage['cached_input'] for usage in self.prompt_cache.values())
+            written_total = sum(usage['cache_write'] for usage in self.prompt_cache.values())
+            summary_lines.append(f"- Provider Prompt Cache: {cached_total:,} input tokens read from cache, {written_total:,} written")
         summary_lines.append(f"- Total Cache Hits: {sum(d.get('hits', 0) for d in self.cache_hits.values()):,}")
         summary_lines.append(f"- Total Saved Tokens (Cache): {self.total_cache_input_tokens + self.total_cache_output_tokens:,} (Input: {self.total_cache_input_tokens:,}, Output: {self.total_cache_output_tokens:,})")
         summary_lines.append(f"- Estimated Saved Cost (Cache): ${total_saved_cost:.4f}")
@@ -371,6 +450,7 @@ class TokenUsageCallbackHandler(BaseCallbackHandler):
         # self.total_saved_tokens_output = 0
         # self.total_saved_cost = 0.0
         self.model_roles: Dict[UUID, str] = {} # Stores role (primary/summarizer) per run_id
+        self.prompt_chars: Dict[UUID, int] = {} # Prompt length per run_id, to estimate usage models do not report
 
     # ----- Convenience Properties -----
     @property
@@ -412,6 +492,7 @@ class TokenUsageCallbackHandler(BaseCallbackHandler):
         """Reset all tracked statistics."""
         self.token_cost_processor = TokenCostProcess()
         self.model_roles.clear()
+        self.prompt_chars.clear()
         self._model_usage = {
             "claude": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "total_cost": 0.0},
             "gemini_main": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "total_cost": 0.0},
@@ -438,6 +519,7 @@ class TokenUsageCallbackHandler(BaseCallbackHandler):
             # Add more role checks if needed
             
         self.model_roles[run_id] = role
+        self.prompt_chars[run_id] = sum(len(prompt) for prompt in prompts or [])
         logger.debug(f"LLM Start (run_id={run_id}, role={role}): Tags={tags}")
         
         # Original logic for debugging/logging
@@ -562,6 +644,21 @@ class TokenUsageCallbackHandler(BaseCallbackHandler):
             completion_tokens = 0
             source = "error_reset"
 
+        # Local models (LlamaCpp) report no usage; estimate it from the text with the model's tokenizer family
+        prompt_chars = self.prompt_chars.pop(run_id, 0)
+        if prompt_tokens == 0 and completion_tokens == 0 and prompt_chars:
+            completion_chars = sum(len(gen.text or "") for gen_list in response.generations or [] for gen in gen_list or [])
+            prompt_tokens = estimate_token_count(prompt_chars, model_key)
+            completion_tokens = estimate_token_count(completion_chars, model_key)
+            source = "estimated"
+            logger.debug(f"LLM End (run_id={run_id}): No usage reported, estimated P={prompt_tokens}, C={completion_tokens}")
+
+        # Input tokens read from the provider's prompt cache are part of prompt_tokens but billed at a reduced rate,
+        # tokens written to it (Anthropic) at a premium
+        cached_input_tokens, cache_write_tokens = _get_cached_input_tokens(response)
+        if (cached_input_tokens or cache_write_tokens) and self.token_cost_processor:
+            self.token_cost_processor.update_prompt_cache(model_key, cached_input_tokens, cache_write_tokens)
+
         # Calculate cost only if tokens were found
         if prompt_tokens > 0 or completion_tokens > 0:
             # Ensure token_cost_processor exists before calling methods
@@ -570,9 +667,10 @@ class TokenUsageCallbackHandler(BaseCallbackHandler):
                     model_name=model_key, # Use the determined model key
                     prompt_tokens=prompt_tokens,
                     completion_tokens=completion_tokens
-                )
+                ) + _prompt_cache_cost_adjustment(model_key, cached_input_tokens, cache_write_tokens)
                 self.token_cost_processor.update_cost(cost)
-                logger.info(f"LLM End ({source}): Model={model_key}, Prompt Tokens={prompt_tokens:,}, Completion Tokens={completion_tokens:,}, Cost=${cost:.6f}")
+                cached_note = f" (Cached Prompt Tokens={cached_input_tokens:,})" if cached_input_tokens else ""
+                logger.info(f"LLM End ({source}): Model={model_key}, Prompt Tokens={prompt_tokens:,}{cached_note}, Completion Tokens={completion_tokens:,}, Cost=${cost:.6f}")
             else:
                 logger.error(f"LLM End (run_id={run_id}): token_cost_processor not available to calculate cost for model '{model_key}'.")
 
@@ -596,7 +694,9 @@ class TokenUsageCallbackHandler(BaseCallbackHandler):
             self._model_usage[model_key]["input_tokens"] += prompt_tokens
             self._model_usage[model_key]["output_tokens"] += completion_tokens
             self._model_usage[model_key]["total_tokens"] += prompt_tokens + completion_tokens
-            self._model_usage[model_key]["total_cost"] += _calculate_cost(model_key, prompt_tokens, completion_tokens)
+            self._model_usage[model_key]["total_cost"] += (
+                _calculate_cost(model_key, prompt_tokens, completion_tokens) + _prompt_cache_cost_adjustment(model_key, cached_input_tokens, cache_write_tokens)
+            )
             self._prompt_tokens += prompt_tokens
             self._completion_tokens += completion_tokens
             self._total_tokens += prompt_tokens + completion_tokens
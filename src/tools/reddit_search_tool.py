@@ -8,6 +8,7 @@ import re
 import math
 import json
 from src.utils import strip_class_attributes, clean_reddit_html
+from src.extraction_pool import extraction_pool
 import urllib.parse
 
 logger = logging.getLogger(__name__)
@@ -162,8 +163,9 @@ class RedditSearchTool(PlaywrightBrowserTool):
             query = cleaned_query # Use the cleaned query
         # -----------------------
 
-        # Create a new page for this search operation
-        page = await self.browser.new_page()
+        # Lease a pooled page for this search operation
+        from src.browser_manager import browser_manager
+        page = await browser_manager.acquire_page(self.context)
         try:
             # Navigate to Reddit
             await page.goto(homepage_url, wait_until="domcontentloaded", timeout=30000)
@@ -282,11 +284,9 @@ class RedditSearchTool(PlaywrightBrowserTool):
                 logger.info(f"[RedditSearch] Found {len(post_containers)} potential post containers.")
             except PlaywrightError as pw_err:
                 logger.error(f"[RedditSearch] PlaywrightError finding initial post containers: {pw_err}. Aborting post extraction.")
-                # Don't close the page
                 return f"Error finding post containers: {pw_err}", page.url
             except Exception as e:
                  logger.error(f"[RedditSearch] Unexpected error finding initial post containers: {e}", exc_info=True)
-                 # Don't close the page
                  return f"Unexpected error finding post containers: {e}", page.url
             # ------------------------------------------------------
 
@@ -457,7 +457,6 @@ class RedditSearchTool(PlaywrightBrowserTool):
                 except PlaywrightError as pw_err:
                     if "Target page, context or browser has been closed" in str(pw_err):
                          logger.error(f"[RedditSearch] PlaywrightError (Browser Closed) processing container #{i+1}: {pw_err}. Aborting search.")
-                         # Don't close the page
                          return f"Playwright context closed during post processing: {pw_err}", page.url
                     else:
                          logger.warning(f"[RedditSearch] PlaywrightError processing container #{i+1}: {pw_err}. Skipping container.")
@@ -514,7 +513,6 @@ class RedditSearchTool(PlaywrightBrowserTool):
                 except Exception as html_err:
                      logger.error(f"[RedditSearch] Failed to get page HTML: {html_err}")
                 # ---------------------------
-                # Don't close the page
                 return f"Searched Reddit for '{query}'. Landed on: {url}. No posts with >=3 comments found.", url
 
             result_lines = [
@@ -530,12 +528,13 @@ class RedditSearchTool(PlaywrightBrowserTool):
                  display_text = (post['text'][:300] + '...') if len(post['text']) > 300 else post['text']
                  result_lines.append(f"{i}. [Link]({post['link']})\n   Text: {display_text}")
             
-            # Don't close the page
             return "\n\n".join(result_lines), url
         except Exception as e:
             logger.error(f"Error during Reddit search/extraction: {e}", exc_info=True)
-            # Don't close the page
             return f"Error during Reddit search: {str(e)}", None
+        finally:
+            # Return the page to the pool instead of leaving the tab open
+            await browser_manager.release_page(page)
 
     async def arun(self, tool_input: Dict[str, Any], callbacks=None) -> str | dict:
         query = tool_input.get("query")
@@ -585,11 +584,12 @@ class RedditSearchTool(PlaywrightBrowserTool):
         """
         await self._ensure_browser_running()
         
-        # Create a new page if one is not provided
+        # Lease a pooled page if one is not provided
+        from src.browser_manager import browser_manager
         page_created_here = False
         if page is None:
-            page = await self.browser.new_page()
-            page_created_here = True  # Mark that we created this page (for debugging)
+            page = await browser_manager.acquire_page(self.context)
+            page_created_here = True  # Only pages leased here are released here
         
         try:
             # If not already on the post_url, navigate
@@ -600,7 +600,6 @@ class RedditSearchTool(PlaywrightBrowserTool):
                     logger.info(f"[RedditExtract] Successfully navigated to: {post_url}")
                 except Exception as e:
                     logger.error(f"[RedditExtract] Navigation error: {e}")
-                    # Don't close the page even if we created it
                     return {"error": f"Failed to navigate to Reddit post: {e}", "url": post_url}
 
             # Extract the post content
@@ -614,7 +613,7 @@ class RedditSearchTool(PlaywrightBrowserTool):
                 logger.info(f"[RedditExtract] Extracted post HTML: {len(post_html)} characters")
                 
                 # Clean HTML to remove unnecessary attributes/scripts
-                cleaned_post_html = clean_reddit_html(post_html)
+                cleaned_post_html = await extraction_pool.run("reddit_clean", clean_reddit_html, post_html, fallback=post_html)
                 logger.debug(f"[RedditExtract] Cleaned post HTML: {len(cleaned_post_html)} characters")
             except Exception as e:
                 logger.warning(f"[RedditExtract] Error extracting post content: {e}")
@@ -664,7 +663,7 @@ class RedditSearchTool(PlaywrightBrowserTool):
                 logger.info(f"[RedditExtract] Extracted comments HTML: {len(comments_html)} characters")
                 
                 # Clean HTML to remove unnecessary attributes/scripts
-                cleaned_comments_html = clean_reddit_html(comments_html)
+                cleaned_comments_html = await extraction_pool.run("reddit_clean", clean_reddit_html, comments_html, fallback=comments_html)
                 logger.debug(f"[RedditExtract] Cleaned comments HTML: {len(cleaned_comments_html)} characters")
             except Exception as e:
                 logger.warning(f"[RedditExtract] Error extracting comments: {e}")
@@ -686,7 +685,9 @@ class RedditSearchTool(PlaywrightBrowserTool):
         except Exception as e:
             logger.error(f"[RedditExtract] Unexpected error during post extraction: {e}", exc_info=True)
             return {"error": f"Failed to extract Reddit post: {e}", "url": post_url}
-        # We're keeping all pages open now, so no finally block to close pages
+        finally:
+            if page_created_here:
+                await browser_manager.release_page(page)
 
 class RedditExtractPostInput(BaseModel):
     url: str = Field(..., description="The full URL of the Reddit post to extract.")
@@ -715,13 +716,14 @@ class RedditExtractPostTool(PlaywrightBrowserTool):
         if not post_url:
             return "Error: url is required."
         
+        from src.browser_manager import browser_manager
+        page = None
         try:
-            # Create a page for this extraction
+            # Lease a pooled page for this extraction
             await self._ensure_browser_running()
-            page = await self.browser.new_page()
+            page = await browser_manager.acquire_page(self.context)
             
             # Use the shared extraction method with our own page
-            # No try/finally to close page - we're keeping pages open now
             result = await self.extract_post_and_comments_from_link(post_url, page)
             
             if "error" in result:
@@ -733,6 +735,8 @@ class RedditExtractPostTool(PlaywrightBrowserTool):
         except Exception as e:
             logger.error(f"Error in RedditExtractPostTool.arun: {e}", exc_info=True)
             return f"Error during Reddit post extraction: {str(e)}"
+        finally:
+            await browser_manager.release_page(page)
             
     async def extract_post_and_comments_from_link(self, post_url: str, page: Optional[Page] = None) -> dict:
         """Reuse the same method from RedditSearchTool.
@@ -1,6 +1,11 @@
 import logging
+import time
+from typing import Dict, Optional
+
 import lxml.html
+import markdownify # For converting HTML to Markdown
 from bs4 import BeautifulSoup
+from readability import Document # Using readability-lxml
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +17,37 @@ def example_utility_function(text: str) -> str:
     logger.debug("Running example utility function.")
     return text.strip()
 
+def extract_content_from_html(html: str, timings: Optional[Dict[str, float]] = None) -> dict:
+    """Extracts the main content from HTML using readability and converts to Markdown.
+
+    Args:
+        html: Raw page HTML.
+        timings: Optional dict that receives the seconds spent in the readability and markdownify stages.
+    """
+    try:
+        start = time.perf_counter()
+        doc = Document(html)
+        title = doc.title()
+        content_html = doc.summary(html_partial=True)
+        readability_done = time.perf_counter()
+        # Convert to Markdown, maybe simplify structure slightly
+        content_md = markdownify.markdownify(content_html, heading_style="ATX")
+        if timings is not None:
+            timings["readability"] = readability_done - start
+            timings["markdownify"] = time.perf_counter() - readability_done
+
+        return {
+            "title": title,
+            "full_content": f"# {title}\n\n{content_md}",
+        }
+    except Exception as e:
+        logger.warning(f"Readability/Markdownify failed: {e}", exc_info=True)
+        # Fallback: return error as structured response
+        return {
+            "title": "Error during extraction",
+            "full_content": "Error during HTML content extraction.",
+        }
+
 def strip_class_attributes(html: str) -> str:
     """Remove all class attributes from an HTML fragment using lxml."""
     try:
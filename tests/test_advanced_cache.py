@@ -0,0 +1,423 @@
+# tests/test_advanced_cache.py
+
+import os
+import sqlite3
+import threading
+
+import pytest
+from langchain.schema import Generation
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+import src.advanced_cache as advanced_cache
+from src.advanced_cache import ContentNormalizer, NormalizingCache, _decompress
+from src.cache_monitor import initialize_cache_monitoring
+
+AGENT_PROMPT = """System: You are a research agent. current date: 2024-05-01
+Research History (Newest first): searched X, read Y
+Condensed Research Content (Summaries & Key Info):
+Long condensed text written at 2024-01-01 12:00:00 with many details.
+Task: decide the next step for the research plan
+Run 123e4567-e89b-12d3-a456-426614174000 started 2024-05-01T10:00:00.123Z
+current_date = '2024-05-01'
+Action: web_browser search
+Observation: found results Thought: read the first one
+Human: what next?
+AI: let me check the tools"""
+
+
+def test_normalizes_volatile_parts_in_one_scan():
+    normalized = ContentNormalizer().normalize_prompt(AGENT_PROMPT)
+    assert normalized == """System: You are a research agent. current date: [DATE]
+Research History: [HISTORY]
+Condensed Research Content: [CONTENT]
+
+Task: decide the next step for the research plan
+Run [UUID] started [TIMESTAMP]
+current_date: [DATE]
+Action: [ACTION]
+Observation: [OBSERVATION]Thought: read the first one
+Human: [HUMAN_MESSAGE]
+AI: [AI_RESPONSE]"""
+
+
+def test_condensed_block_and_dated_timestamps():
+    normalizer = ContentNormalizer()
+    prompt = "Before --- BEGIN CONDENSED CONTENT ---\nAI: inside\n--- END CONDENSED CONTENT --- after"
+    assert normalizer.normalize_prompt(prompt) == "Before [CONDENSED_CONTENT] after"
+    # A date that starts a full timestamp is replaced as a timestamp, not as a date
+    assert normalizer.normalize_prompt("current date: 2024-05-01 10:00:00 now") == "current date: [TIMESTAMP] now"
+    assert normalizer.normalize_prompt("agent_scratchpad: 'notes'") == "agent_scratchpad: '[SCRATCHPAD]otes'"
+
+
+def test_results_are_memoized_by_prompt():
+    normalizer = ContentNormalizer(memo_size=2)
+    first = normalizer.normalize_prompt(AGENT_PROMPT)
+    assert normalizer.normalize_prompt(AGENT_PROMPT) == first
+    assert normalizer.stats.calls == 1
+    assert normalizer.stats.memo_hits == 1
+    assert normalizer.stats.seconds > 0
+
+    normalizer.normalize_prompt("a " + AGENT_PROMPT)
+    normalizer.normalize_prompt("b " + AGENT_PROMPT)
+    # The memo is bounded, so the oldest prompt has to be scanned again
+    normalizer.normalize_prompt(AGENT_PROMPT)
+    assert normalizer.stats.calls == 4
+
+
+def test_cache_hits_normalized_prompt_and_reuses_normalization(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"))
+    cache.update(AGENT_PROMPT, "llm", [Generation(text="next step")])
+    changed = AGENT_PROMPT.replace("read Y", "read Z").replace("what next?", "and now?")
+    result = cache.lookup(changed, "llm")
+    assert result is not None and result[0].text == "next step"
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["normalize_scans"] == 2
+    # Looking up the original prompt again hits directly; updating it reuses the memoized normalization
+    cache.update(AGENT_PROMPT, "llm", [Generation(text="next step")])
+    assert cache.get_stats()["normalize_memo_hits"] == 1
+
+
+def test_generation_is_stored_once_under_both_keys(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"))
+    cache.update(AGENT_PROMPT, "llm", [Generation(text="first")])
+    cache.flush()
+    entries = cache._conn.execute("SELECT COUNT(*) FROM llm_cache_entries").fetchone()[0]
+    keys = cache._conn.execute("SELECT kind FROM llm_cache_keys ORDER BY kind").fetchall()
+    assert entries == 1
+    assert keys == [("normalized",), ("raw",)]
+
+    # Re-caching the same prompt replaces the entry instead of leaving an orphan behind
+    cache.update(AGENT_PROMPT, "llm", [Generation(text="second")])
+    cache.flush()
+    assert cache._conn.execute("SELECT COUNT(*) FROM llm_cache_entries").fetchone()[0] == 1
+    assert cache.lookup(AGENT_PROMPT, "llm")[0].text == "second"
+    # Keys are per model
+    assert cache.lookup(AGENT_PROMPT, "other-llm") is None
+
+    cache.clear()
+    assert cache.lookup(AGENT_PROMPT, "llm") is None
+
+
+def test_short_prompts_use_only_the_raw_key(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"))
+    cache.update("What is 2+2?", "llm", [Generation(text="4")])
+    cache.flush()
+    assert cache._conn.execute("SELECT COUNT(*) FROM llm_cache_keys").fetchone()[0] == 1
+    assert cache.lookup("What is 2+2?", "llm")[0].text == "4"
+    assert cache.get_stats()["normalizations"] == 0
+
+
+def test_entries_are_keyed_by_digest_and_compressed(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"))
+    answer = "A long and repetitive answer. " * 200
+    cache.update(AGENT_PROMPT, "llm", [Generation(text=answer)])
+    cache.flush()
+    key_lengths = {row[0] for row in cache._conn.execute("SELECT LENGTH(cache_key) FROM llm_cache_keys")}
+    assert key_lengths == {32}
+    payload, codec, prompt = cache._conn.execute("SELECT payload, codec, prompt FROM llm_cache_entries").fetchone()
+    assert codec in ("zstd", "zlib")
+    assert len(payload) < len(answer) / 5
+    assert prompt is None
+    assert cache.lookup(AGENT_PROMPT, "llm")[0].text == answer
+
+
+def test_prompt_text_is_stored_only_when_enabled(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), store_prompts=True)
+    cache.update(AGENT_PROMPT, "llm", [Generation(text="x")])
+    cache.flush()
+    prompt, codec = cache._conn.execute("SELECT prompt, codec FROM llm_cache_entries").fetchone()
+    assert _decompress(prompt, codec).decode() == AGENT_PROMPT
+
+
+def test_older_cache_layout_is_replaced(tmp_path):
+    db_path = tmp_path / "cache.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE full_llm_cache (prompt TEXT, llm TEXT, idx INTEGER, response TEXT)")
+    conn.execute("INSERT INTO full_llm_cache VALUES ('p', 'llm', 0, 'r')")
+    conn.commit()
+    conn.close()
+
+    cache = NormalizingCache(database_path=str(db_path))
+    tables = {row[0] for row in cache._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "full_llm_cache" not in tables
+    assert {"llm_cache_entries", "llm_cache_keys"} <= tables
+
+
+def test_entries_expire_per_model(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), ttl_hours={"flash": 1, "default": 0})
+    cache.update("news question", "gemini-2.5-flash", [Generation(text="today")])
+    cache.update("news question", "claude", [Generation(text="forever")])
+    cache.flush()
+    # Age both entries by two hours
+    cache._conn.execute("UPDATE llm_cache_entries SET expires_at = expires_at - 7200 WHERE expires_at IS NOT NULL")
+    cache._conn.commit()
+    assert cache.lookup("news question", "gemini-2.5-flash") is None
+    assert cache.lookup("news question", "claude")[0].text == "forever"
+
+    assert cache.run_maintenance()["expired"] == 1
+    assert cache.get_stats()["entries"] == 1
+    assert cache._conn.execute("SELECT COUNT(*) FROM llm_cache_keys").fetchone()[0] == 1
+
+
+def test_least_recently_hit_entries_are_evicted(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), max_entries=10)
+    for i in range(12):
+        cache.update(f"question {i}", "llm", [Generation(text=str(i))])
+    cache.flush()
+    # Order entries by insertion, then hit the oldest one so it survives eviction
+    cache._conn.execute("UPDATE llm_cache_entries SET last_hit = id")
+    cache._conn.commit()
+    assert cache.lookup("question 0", "llm") is not None
+
+    assert cache.run_maintenance()["evicted"] == 3
+    assert cache.lookup("question 0", "llm") is not None
+    assert cache.lookup("question 1", "llm") is None
+    assert cache.lookup("question 4", "llm") is not None
+    assert cache.get_stats()["entries"] == 9
+
+
+def test_size_cap_and_incremental_vacuum(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), max_mb=0.05, store_prompts=True)
+    assert cache._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    for i in range(40):
+        # Random text, so compression does not shrink it below the cap
+        cache.update(f"prompt {i} " + os.urandom(1000).hex(), "llm", [Generation(text=os.urandom(2000).hex())])
+    cache.flush()
+    assert cache.get_stats()["size_bytes"] > 0.05 * 1024 * 1024
+
+    result = cache.run_maintenance()
+    assert result["evicted"] > 0
+    assert result["vacuumed_pages"] > 0
+    assert cache.get_stats()["size_bytes"] <= 0.9 * 0.05 * 1024 * 1024
+    assert cache._conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_version_2_entries_survive_upgrade(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = NormalizingCache(database_path=db_path)
+    cache.update("What is 2+2?", "llm", [Generation(text="4")])
+    cache.close()
+    # Recreate the version 2 layout around the stored entry
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE v2 AS SELECT id, llm_string, payload, codec, prompt, created_at FROM llm_cache_entries;
+        DROP TABLE llm_cache_entries;
+        ALTER TABLE v2 RENAME TO llm_cache_entries;
+        PRAGMA user_version = 2;
+        """
+    )
+    conn.close()
+
+    cache = NormalizingCache(database_path=db_path)
+    assert cache.lookup("What is 2+2?", "llm")[0].text == "4"
+    size, last_hit, created, input_tokens = cache._conn.execute(
+        "SELECT size_bytes, last_hit, created_at, input_tokens FROM llm_cache_entries"
+    ).fetchone()
+    assert size > 0 and last_hit == created
+    assert input_tokens == 0
+
+
+def test_updates_are_batched_and_served_before_they_are_written(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), write_batch_size=3, flush_interval=60)
+    assert cache._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    cache.update("q1", "llm", [Generation(text="a1")])
+    cache.update("q2", "llm", [Generation(text="a2")])
+    assert cache._conn.execute("SELECT COUNT(*) FROM llm_cache_entries").fetchone()[0] == 0
+    assert cache.lookup("q1", "llm")[0].text == "a1"
+
+    cache.update("q3", "llm", [Generation(text="a3")])
+    stats = cache.get_stats()
+    assert stats["entries"] == 3
+    assert stats["pending_writes"] == 0
+    assert stats["flushes"] == 1
+    assert cache.lookup("q2", "llm")[0].text == "a2"
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_async_calls_run_on_the_cache_thread(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"))
+    threads = []
+    original_lookup = cache.lookup
+
+    def recording_lookup(prompt, llm_string):
+        threads.append(threading.current_thread().name)
+        return original_lookup(prompt, llm_string)
+
+    cache.lookup = recording_lookup
+    await cache.aupdate(AGENT_PROMPT, "llm", [Generation(text="async")])
+    result = await cache.alookup(AGENT_PROMPT, "llm")
+    assert result[0].text == "async"
+    assert threads and threads[0].startswith("llm-cache-io")
+    cache.close()
+    # close() writes what was still pending
+    conn = sqlite3.connect(tmp_path / "cache.db")
+    assert conn.execute("SELECT COUNT(*) FROM llm_cache_entries").fetchone()[0] == 1
+
+
+def test_memory_tier_serves_repeated_lookups(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), flush_interval=0)
+    cache.update(AGENT_PROMPT, "llm", [Generation(text="cached")])
+    first = cache.lookup(AGENT_PROMPT, "llm")
+    first[0].text = "changed by the caller"
+    assert cache.lookup(AGENT_PROMPT, "llm")[0].text == "cached"
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 2
+    assert stats["disk_hits"] == 0
+    assert stats["memory_entries"] == 2
+
+    # Hits on freshly written entries still count for LRU eviction
+    entry_id = cache._conn.execute("SELECT id FROM llm_cache_entries").fetchone()[0]
+    assert entry_id in cache._pending_hits
+
+    # Entries deleted from SQLite are dropped from memory as well
+    cache.memory.clear()
+    assert cache.lookup(AGENT_PROMPT, "llm") is not None
+    assert cache.get_stats()["disk_hits"] == 1
+    cache._conn.execute("UPDATE llm_cache_entries SET expires_at = 1")
+    cache._conn.commit()
+    cache.run_maintenance()
+    assert len(cache.memory) == 0
+    assert cache.lookup(AGENT_PROMPT, "llm") is None
+
+
+def test_memory_tier_is_bounded_by_size(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), memory_max_mb=0.01)
+    for i in range(20):
+        cache.update(f"question {i}", "llm", [Generation(text=os.urandom(500).hex())])
+    assert cache.memory.size_bytes <= 0.01 * 1024 * 1024
+    assert cache.get_stats()["memory_evicted"] > 0
+    assert cache.lookup("question 19", "llm") is not None
+    assert cache.lookup("question 0", "llm") is not None
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1 and stats["disk_hits"] == 1
+
+
+GEMINI_LLM_STRING = '{"kwargs": {"model": "models/gemini-2.0-flash", "temperature": 0}}---[]'
+
+
+def test_metrics_per_model_and_role_use_tokens_stored_at_write(tmp_path, monkeypatch):
+    cache = NormalizingCache(
+        database_path=str(tmp_path / "cache.db"), flush_interval=0, roles={"gemini-2.0-flash": "summarizer"}
+    )
+    message = AIMessage(content="answer", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+    cache.update("summarize this", GEMINI_LLM_STRING, [ChatGeneration(message=message)])
+
+    # Hits report the stored counts without tokenizing again
+    def fail(text):
+        raise AssertionError("hit re-tokenized the prompt")
+    monkeypatch.setattr(advanced_cache, "_count_tokens", fail)
+    assert cache.lookup("summarize this", GEMINI_LLM_STRING) is not None
+    cache.memory.clear()
+    assert cache.lookup("summarize this", GEMINI_LLM_STRING) is not None
+    assert cache.lookup("something else", GEMINI_LLM_STRING) is None
+
+    [metrics] = cache.get_metrics()
+    assert metrics["model"] == "gemini-2.0-flash" and metrics["role"] == "summarizer"
+    assert (metrics["hits"], metrics["memory_hits"], metrics["disk_hits"], metrics["misses"], metrics["writes"]) == (2, 1, 1, 1, 1)
+    assert (metrics["saved_input_tokens"], metrics["saved_output_tokens"]) == (240, 60)
+    assert metrics["lookup_latency"]["count"] == 3
+    assert sum(metrics["lookup_latency"]["buckets"].values()) == 3
+    assert cache.get_stats()["saved_input_tokens"] == 240
+
+
+def test_token_counts_are_estimated_without_usage_metadata(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), flush_interval=0)
+    cache.update("What is the capital of France?", "llm", [Generation(text="Paris is the capital of France.")])
+    input_tokens, output_tokens = cache._conn.execute("SELECT input_tokens, output_tokens FROM llm_cache_entries").fetchone()
+    assert input_tokens > 0 and output_tokens > 0
+    [metrics] = cache.get_metrics()
+    assert (metrics["model"], metrics["role"]) == ("unknown", "unknown")
+
+
+def test_listeners_receive_events_and_monitor_forwards_hits(tmp_path):
+    cache = NormalizingCache(database_path=str(tmp_path / "cache.db"), roles={})
+    events = []
+    cache.add_listener(events.append)
+    cache.add_listener(lambda event: 1 / 0)  # A failing listener does not break lookups
+
+    class Recorder:
+        def __init__(self):
+            self.hits = []
+
+        def record_cache_hit(self, model_name, input_tokens, output_tokens):
+            self.hits.append((model_name, input_tokens, output_tokens))
+
+    recorder = Recorder()
+    monitor = initialize_cache_monitoring(recorder, cache=cache)
+    cache.update("question", GEMINI_LLM_STRING, [Generation(text="answer")])
+    assert cache.lookup("question", GEMINI_LLM_STRING)[0].text == "answer"
+    assert cache.lookup("other question", GEMINI_LLM_STRING) is None
+
+    assert [event.kind for event in events] == ["write", "hit", "miss"]
+    assert events[1].tier == "memory"
+    assert recorder.hits == [("gemini-2.0-flash", events[0].input_tokens, events[0].output_tokens)]
+    monitor.close()
+    cache.lookup("question", GEMINI_LLM_STRING)
+    assert len(recorder.hits) == 1
+
+
+def test_bundle_export_filters_and_import_merges(tmp_path):
+    source = NormalizingCache(database_path=str(tmp_path / "source.db"), tag="oncology")
+    source.update("q1", GEMINI_LLM_STRING, [Generation(text="a1")])
+    source.update("q2", "claude-llm", [Generation(text="a2")])
+    source.tag = "cardiology"
+    source.update("q3", GEMINI_LLM_STRING, [Generation(text="a3")])
+    source.flush()
+    source._conn.execute("UPDATE llm_cache_entries SET created_at = 1000 WHERE llm_string = 'claude-llm'")
+    source._conn.commit()
+
+    bundle = str(tmp_path / "bundle.db")
+    assert source.export_bundle(bundle, model="gemini-2.0-flash", tag="oncology") == 1
+    assert source.export_bundle(bundle, until=2000) == 1
+    assert source.export_bundle(bundle) == 3
+    source.close()
+
+    target = NormalizingCache(database_path=str(tmp_path / "target.db"))
+    target.update("q1", GEMINI_LLM_STRING, [Generation(text="local answer")])
+    result = target.import_bundle(bundle)
+    assert result == {"imported": 2, "existing": 1, "expired": 0, "unsupported": 0}
+    assert target.lookup("q1", GEMINI_LLM_STRING)[0].text == "local answer"
+    assert target.lookup("q3", GEMINI_LLM_STRING)[0].text == "a3"
+    assert target.lookup("q2", "claude-llm")[0].text == "a2"
+    target.close()
+
+
+def test_import_skips_entries_expired_under_local_ttl(tmp_path):
+    source = NormalizingCache(database_path=str(tmp_path / "source.db"))
+    source.update("q1", "llm", [Generation(text="a1")])
+    bundle = str(tmp_path / "bundle.db")
+    source.export_bundle(bundle)
+    source.close()
+    target = NormalizingCache(database_path=str(tmp_path / "target.db"), ttl_hours={"default": 1})
+    target._conn.execute("ATTACH DATABASE ? AS bundle", (bundle,))
+    target._conn.execute("UPDATE bundle.entries SET created_at = 0")
+    target._conn.commit()
+    target._conn.execute("DETACH DATABASE bundle")
+    assert target.import_bundle(bundle)["expired"] == 1
+    assert target.lookup("q1", "llm") is None
+
+
+def test_warm_up_preloads_the_most_hit_entries(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = NormalizingCache(database_path=db_path)
+    for i in range(5):
+        cache.update(f"question {i}", "llm", [Generation(text=f"answer {i}")])
+    cache.flush()
+    cache.memory.clear()
+    for _ in range(3):
+        cache.lookup("question 3", "llm")
+    cache.lookup("question 1", "llm")
+    cache.close()
+
+    cache = NormalizingCache(database_path=db_path)
+    assert cache.warm_up(2) == 2
+    assert cache.lookup("question 3", "llm")[0].text == "answer 3"
+    assert cache.lookup("question 1", "llm")[0].text == "answer 1"
+    assert cache.get_stats()["memory_hits"] == 2
+    assert cache.lookup("question 0", "llm") is not None
+    assert cache.get_stats()["disk_hits"] == 1
+    cache.close()
@@ -0,0 +1,95 @@
+# tests/test_browser_manager.py
+
+import asyncio
+
+import pytest
+
+from src.browser_manager import BrowserManager
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+        self.url = "about:blank"
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.created = 0
+
+    async def new_page(self):
+        self.created += 1
+        return FakePage(self)
+
+
+@pytest.fixture
+def manager():
+    """Fresh BrowserManager with a small pool, restoring the singleton afterwards."""
+    original = BrowserManager._instance
+    BrowserManager._instance = None
+    mgr = BrowserManager()
+    mgr.max_pool_size = 2
+    mgr._page_slots = asyncio.Semaphore(2)
+    yield mgr
+    BrowserManager._instance = original
+
+
+@pytest.mark.asyncio
+async def test_released_page_is_reset_and_reused(manager):
+    context = FakeContext()
+    page = await manager.acquire_page(context)
+    page.url = "https://example.com"
+    await manager.release_page(page)
+    assert page.url == "about:blank"
+
+    again = await manager.acquire_page(context)
+    assert again is page
+    assert context.created == 1
+    await manager.release_page(again)
+
+    stats = manager.get_pool_stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_when_pool_is_exhausted(manager):
+    context = FakeContext()
+    first = await manager.acquire_page(context)
+    second = await manager.acquire_page(context)
+
+    waiter = asyncio.create_task(manager.acquire_page(context))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    await manager.release_page(first)
+    third = await asyncio.wait_for(waiter, timeout=1)
+    assert third is first
+    assert manager.get_pool_stats()["waits"] == 1
+    await manager.release_page(second)
+    await manager.release_page(third)
+
+
+@pytest.mark.asyncio
+async def test_closed_pages_are_discarded(manager):
+    context = FakeContext()
+    page = await manager.acquire_page(context)
+    page.closed = True
+    await manager.release_page(page)
+
+    fresh = await manager.acquire_page(context)
+    assert fresh is not page
+    assert context.created == 2
+    await manager.release_page(fresh)
@@ -0,0 +1,21 @@
+# tests/test_cache_bundle.py
+
+from langchain.schema import Generation
+
+from src.advanced_cache import NormalizingCache
+from src.cache_bundle import main
+
+
+def test_cli_round_trip(tmp_path, capsys):
+    source_db, target_db, bundle = (str(tmp_path / name) for name in ("source.db", "target.db", "bundle.db"))
+    cache = NormalizingCache(database_path=source_db)
+    cache.update("What is 2+2?", "llm", [Generation(text="4")])
+    cache.close()
+
+    assert main(["--db", source_db, "export", bundle, "--since", "2000-01-01"]) == 0
+    assert main(["--db", target_db, "import", bundle]) == 0
+    assert "Imported 1 entries" in capsys.readouterr().out
+
+    cache = NormalizingCache(database_path=target_db)
+    assert cache.lookup("What is 2+2?", "llm")[0].text == "4"
+    cache.close()
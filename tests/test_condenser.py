@@ -0,0 +1,66 @@
+# tests/test_condenser.py
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from langchain_core.messages import AIMessage
+
+from src.agent.condenser import IncrementalCondenser, RECENT_CONTENT_HEADER
+
+
+def make_recording_chain(prefix, calls):
+    """Chain that records each input text and returns a short AIMessage."""
+    def _run(inputs):
+        calls.append(inputs["text"])
+        return AIMessage(content=f"{prefix}({len(inputs['text'])})")
+    return RunnableLambda(_run)
+
+
+@pytest.mark.asyncio
+async def test_only_new_content_is_condensed():
+    condense_calls = []
+    condenser = IncrementalCondenser(make_recording_chain("C", condense_calls), max_tokens=10_000, min_delta_chars=10)
+
+    content = "\n\n--- Source A ---\n" + "a" * 300 + "\n\n--- Source B ---\n" + "b" * 300
+    result = await condenser.condense(content)
+    # Everything before the last section is condensed, the last section stays verbatim
+    assert len(condense_calls) == 1
+    assert "b" * 300 not in condense_calls[0]
+    assert result.endswith("b" * 300)
+    assert RECENT_CONTENT_HEADER in result
+
+    content += "\n\n--- Source C ---\n" + "c" * 300
+    await condenser.condense(content)
+    # The second call only sees the previously verbatim section, not source A again
+    assert len(condense_calls) == 2
+    assert "a" * 300 not in condense_calls[1]
+    assert "b" * 300 in condense_calls[1]
+    assert len(condenser.segments) == 2
+
+
+@pytest.mark.asyncio
+async def test_small_delta_is_kept_verbatim():
+    condense_calls = []
+    condenser = IncrementalCondenser(make_recording_chain("C", condense_calls), min_delta_chars=200)
+
+    content = "\n\nshort\n\nlatest"
+    result = await condenser.condense(content)
+    assert condense_calls == []
+    assert result == content
+
+
+@pytest.mark.asyncio
+async def test_tree_merge_when_over_budget():
+    condense_calls, merge_calls = [], []
+    condenser = IncrementalCondenser(
+        make_recording_chain("C", condense_calls),
+        merge_chain=make_recording_chain("M", merge_calls),
+        max_tokens=5,
+        min_delta_chars=1,
+    )
+    condenser.reset(initial_state="plan " * 20)
+
+    content = "\n\n" + "x" * 100 + "\n\n" + "y" * 100
+    await condenser.condense(content)
+    # Seeded plan + condensed delta exceed the budget and are merged into one segment
+    assert len(merge_calls) == 1
+    assert len(condenser.segments) == 1
@@ -0,0 +1,107 @@
+# tests/test_content_packing.py
+
+import asyncio
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src.agent.researcher_agent import MIN_FINAL_SUMMARY_CONTENT_BUDGET, ResearcherAgent
+from src.content_packing import pack_content, split_sections
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def section(title, body):
+    return f"\n\n--- Output from {title} ---\n{body}\n--- End Output ---\n"
+
+
+def filler(word, count):
+    return " ".join(f"{word}{i}" for i in range(count))
+
+
+def test_split_sections_keeps_end_markers_with_their_section():
+    content = "\n\n--- Initial Plan ---\nplan" + section("a", "alpha") + section("b", "beta")
+    sections = split_sections(content)
+    assert len(sections) == 3
+    assert sections[1].startswith("--- Output from a ---") and sections[1].endswith("--- End Output ---")
+
+
+def test_repeated_lines_and_near_duplicate_sections_are_dropped():
+    repeated = "This paragraph about solar panel efficiency is quoted twice across two different sources in the run."
+    article = filler("word", 300)
+    content = (
+        section("a", f"{repeated}\n\nfirst source text")
+        + section("b", f"second source text\n\n{repeated}")
+        + section("c", article)
+        + section("d", article + " syndicated copy footer")
+    )
+    packed = pack_content(content, "solar panels", budget_tokens=0, count_tokens=count_words)
+
+    assert packed.text.count(repeated) == 1
+    assert "second source text" in packed.text
+    assert packed.duplicate_lines == 1
+    assert packed.duplicate_sections == 1
+    assert packed.selected == 3
+
+
+def test_budget_keeps_most_relevant_sections_in_original_order():
+    content = (
+        section("gardening", filler("tomato", 100))
+        + section("solar one", "solar panel efficiency " * 30)
+        + section("cooking", filler("pasta", 100))
+        + section("solar two", "solar inverter panel cost " * 25)
+    )
+    packed = pack_content(content, "solar panel efficiency", budget_tokens=250, count_tokens=count_words)
+
+    assert packed.selected == 2
+    assert packed.output_tokens <= 250
+    assert "tomato0" not in packed.text and "pasta0" not in packed.text
+    assert packed.text.index("solar one") < packed.text.index("solar two")
+
+
+def test_content_within_budget_is_kept_whole():
+    content = section("a", "alpha text") + section("b", "beta text")
+    packed = pack_content(content, "anything", budget_tokens=10_000, count_tokens=count_words)
+    assert packed.selected == packed.sections == 2
+    assert "alpha text" in packed.text and "beta text" in packed.text
+
+
+def test_final_summary_prompt_gets_packed_content():
+    prompts = []
+
+    class FinalSummaryLLM:
+        model_name = "gemini-2.5-pro-preview-03-25"
+
+        async def ainvoke(self, messages, config=None):
+            prompts.append(messages[0].content)
+            return AIMessage(content="report")
+
+    agent = ResearcherAgent.__new__(ResearcherAgent)
+    agent.final_summary_llm = FinalSummaryLLM()
+    agent.callbacks = None
+    content = section("relevant", "solar panel efficiency " * 30) + section("noise", filler("pasta", 2000))
+
+    with patch('src.agent.researcher_agent.FINAL_SUMMARY_CONTENT_BUDGET', 500):
+        assert agent._final_summary_content_budget() == 500
+        summary = asyncio.run(agent._summarize_content("solar panel efficiency", content))
+
+    assert summary == "report"
+    assert "solar panel efficiency" in prompts[0]
+    assert "pasta0" not in prompts[0]
+
+
+def test_final_summary_budget_never_drops_to_no_limit():
+    """A window too small for the report still gets a small positive budget, not 0 (which means no limit)."""
+    class FinalSummaryLLM:
+        model_name = "gemini-2.5-pro-preview-03-25"
+
+    agent = ResearcherAgent.__new__(ResearcherAgent)
+    agent.final_summary_llm = FinalSummaryLLM()
+
+    with patch('src.agent.researcher_agent.FINAL_SUMMARY_MAX_TOKENS', 10_000_000):
+        with patch('src.agent.researcher_agent.FINAL_SUMMARY_CONTENT_BUDGET', 0):
+            assert agent._final_summary_content_budget() == MIN_FINAL_SUMMARY_CONTENT_BUDGET
+        with patch('src.agent.researcher_agent.FINAL_SUMMARY_CONTENT_BUDGET', 500):
+            assert agent._final_summary_content_budget() == 500
@@ -0,0 +1,90 @@
+# tests/test_content_store.py
+
+import time
+
+import pytest
+
+from src.content_store import PersistentContentStore, normalize_url
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistentContentStore(
+        db_path=str(tmp_path / "content_store.db"),
+        max_mb=1,
+        ttl_hours={"web": 1, "reddit": 0.5, "default": 2},
+    )
+    yield store
+    store.close()
+
+
+def test_normalize_url_strips_tracking_and_fragment():
+    assert normalize_url("HTTPS://Example.com/Page/?utm_source=x&b=2&a=1#section") == "https://example.com/Page?a=1&b=2"
+    assert normalize_url("mcp_pubmed_search_123") == "mcp_pubmed_search_123"
+
+
+def test_content_roundtrip_uses_normalized_url(store):
+    store.put_content("https://example.com/article/", "Body text", source_type="web", title="Article")
+    stored = store.get_content("https://example.com/article?utm_medium=email")
+    assert stored["full_content"] == "Body text"
+    assert stored["title"] == "Article"
+    assert store.get_content("https://example.com/other") is None
+    assert store.stats.content_hits == 1
+    assert store.stats.content_misses == 1
+
+
+def test_summary_is_tied_to_content_hash(store):
+    url = "https://example.com/a"
+    store.put_content(url, "version one", source_type="web")
+    store.put_summary(url, "version one", "summary one", source_type="web", model="m")
+    assert store.get_summary(url, "version one", model="m") == "summary one"
+    # Changed content must not return the old summary
+    assert store.get_summary(url, "version two", model="m") is None
+    # Re-storing the same content keeps the summary, new content drops it
+    store.put_content(url, "version one", source_type="web")
+    assert store.get_summary(url, "version one") == "summary one"
+    store.put_content(url, "version two", source_type="web")
+    assert store.get_summary(url, "version one") is None
+
+
+def test_refresh_keeps_created_at_unless_content_changed(store):
+    url = "https://example.com/a"
+    store.put_content(url, "version one", source_type="web")
+    store._conn.execute("UPDATE content_store SET created_at = 1000")
+    store._conn.commit()
+    store.put_content(url, "version one", source_type="web")
+    assert store._conn.execute("SELECT created_at FROM content_store").fetchone()[0] == 1000
+    store.put_content(url, "version two", source_type="web")
+    assert store._conn.execute("SELECT created_at FROM content_store").fetchone()[0] > 1000
+
+
+def test_size_is_counted_in_bytes(store):
+    url = "https://example.com/utf8"
+    store.put_content(url, "é" * 10, source_type="web")
+    store.put_summary(url, "é" * 10, "ü" * 5, source_type="web")
+    assert store._conn.execute("SELECT size_bytes FROM content_store").fetchone()[0] == 30
+
+
+def test_ttl_per_source_type(store):
+    store.put_content("https://reddit.com/r/x/comments/1", "post", source_type="reddit")
+    store.put_content("https://example.com/a", "page", source_type="web")
+    # Age both entries by 45 minutes: past the reddit TTL, within the web TTL
+    store._conn.execute("UPDATE content_store SET created_at = ?", (time.time() - 45 * 60,))
+    store._conn.commit()
+    assert store.get_content("https://reddit.com/r/x/comments/1") is None
+    assert store.get_content("https://example.com/a")["full_content"] == "page"
+    assert store.stats.expired == 1
+
+
+def test_lru_eviction_respects_size_cap(store):
+    chunk = "x" * (300 * 1024)
+    store.put_content("https://example.com/1", chunk)
+    store.put_content("https://example.com/2", chunk)
+    store.put_content("https://example.com/3", chunk)
+    # Touch the first entry so the second becomes least recently used
+    store._conn.execute("UPDATE content_store SET last_accessed = ? WHERE url_key = ?", (time.time() + 10, "https://example.com/1"))
+    store._conn.commit()
+    store.put_content("https://example.com/4", chunk)
+    assert store.get_content("https://example.com/2") is None
+    assert store.get_content("https://example.com/1") is not None
+    assert store.get_stats()["size_bytes"] <= 1024 * 1024
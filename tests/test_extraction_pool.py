@@ -0,0 +1,60 @@
+# tests/test_extraction_pool.py
+
+import time
+
+import pytest
+
+from src import extraction_pool as pool_module
+from src.extraction_pool import ExtractionPool
+from src.utils import clean_reddit_html, extract_content_from_html
+
+ARTICLE_HTML = (
+    "<html><head><title>Pool Test</title></head><body><article>"
+    + "<p>Readable paragraph with enough words to be kept by readability.</p>" * 20
+    + "</article></body></html>"
+)
+
+
+def slow_identity(value, delay):
+    time.sleep(delay)
+    return value
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Fresh ExtractionPool running jobs in threads, restoring the singleton afterwards."""
+    original = ExtractionPool._instance
+    ExtractionPool._instance = None
+    monkeypatch.setattr(pool_module, "EXTRACTION_WORKERS", 0)
+    instance = ExtractionPool()
+    yield instance
+    instance.shutdown()
+    ExtractionPool._instance = original
+
+
+@pytest.mark.asyncio
+async def test_extract_html_matches_sync_and_records_stages(pool):
+    result = await pool.extract_html(ARTICLE_HTML)
+    assert result == extract_content_from_html(ARTICLE_HTML)
+    stats = pool.get_stats()
+    assert stats["readability"]["calls"] == 1
+    assert stats["markdownify"]["calls"] == 1
+    assert stats["queue_wait"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_returns_fallback_on_timeout(pool, monkeypatch):
+    monkeypatch.setattr(pool_module, "EXTRACTION_TIMEOUT", 0.05)
+    result = await pool.run("slow", slow_identity, "done", 0.5, fallback="fallback")
+    assert result == "fallback"
+    assert pool.get_stats()["slow"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_in_worker_process(pool, monkeypatch):
+    monkeypatch.setattr(pool_module, "EXTRACTION_WORKERS", 1)
+    html = '<div class="x"><button>Vote</button><p id="c1" class="y">Comment</p></div>'
+    result = await pool.run("reddit_clean", clean_reddit_html, html, fallback=html)
+    assert result == clean_reddit_html(html)
+    assert "button" not in result
+    assert pool.get_stats()["reddit_clean"]["calls"] == 1
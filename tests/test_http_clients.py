@@ -0,0 +1,125 @@
+# tests/test_http_clients.py
+
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from src.http_clients import http_clients
+
+
+@pytest.mark.asyncio
+async def test_shared_clients_are_reused_and_recreated_after_close():
+    client = http_clients.get_httpx_client()
+    session = http_clients.get_aiohttp_session()
+    assert http_clients.get_httpx_client() is client
+    assert http_clients.get_aiohttp_session() is session
+
+    await http_clients.aclose()
+    assert client.is_closed
+    assert session.closed
+    new_client = http_clients.get_httpx_client()
+    assert new_client is not client
+    await http_clients.aclose()
+
+
+@pytest.mark.asyncio
+async def test_host_slot_limits_concurrency_per_host(monkeypatch):
+    monkeypatch.setattr("src.http_clients.HTTP_CLIENT_MAX_PER_HOST", 2)
+    active = {"example.com": 0, "other.com": 0}
+    peak = {"example.com": 0, "other.com": 0}
+
+    async def request(url, host):
+        async with http_clients.host_slot(url):
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.02)
+            active[host] -= 1
+
+    await asyncio.gather(
+        *(request(f"https://example.com/{i}", "example.com") for i in range(5)),
+        *(request(f"https://other.com/{i}", "other.com") for i in range(2)),
+    )
+    assert peak["example.com"] == 2
+    assert peak["other.com"] == 2
+    await http_clients.aclose()
+
+
+class _KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disconnected = None
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def finish(self):
+        super().finish()
+        self.disconnected.release()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_clients_left_on_a_closed_loop_are_shut_down_when_the_loop_changes():
+    """Pooled keep-alive connections from a finished event loop are disconnected, not leaked."""
+    _KeepAliveHandler.disconnected = threading.Semaphore(0)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    async def fetch_with_both_clients():
+        await http_clients.fetch(url)
+        async with http_clients.get_aiohttp_session().get(url) as response:
+            await response.read()
+        return http_clients._aiohttp_session
+
+    old_loop = asyncio.new_event_loop()
+    try:
+        old_session = old_loop.run_until_complete(fetch_with_both_clients())
+    finally:
+        old_loop.close()
+
+    async def switch_loop():
+        http_clients.get_httpx_client()
+        await http_clients.aclose()
+
+    asyncio.run(switch_loop())
+    try:
+        assert old_session.closed
+        # Both keep-alive connections were closed by the client side
+        assert _KeepAliveHandler.disconnected.acquire(timeout=5)
+        assert _KeepAliveHandler.disconnected.acquire(timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_clients_on_a_loop_that_still_runs_are_closed_on_it():
+    """Clients created on a loop running in another thread are closed by that loop."""
+    old_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=old_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def create_clients():
+        return http_clients.get_httpx_client(), http_clients.get_aiohttp_session()
+
+    old_client, old_session = asyncio.run_coroutine_threadsafe(create_clients(), old_loop).result(timeout=5)
+
+    async def switch_loop():
+        http_clients.get_httpx_client()
+        for _ in range(100):
+            if old_client.is_closed and old_session.closed:
+                break
+            await asyncio.sleep(0.01)
+        await http_clients.aclose()
+
+    asyncio.run(switch_loop())
+    old_loop.call_soon_threadsafe(old_loop.stop)
+    thread.join(timeout=5)
+    old_loop.close()
+    assert old_client.is_closed
+    assert old_session.closed
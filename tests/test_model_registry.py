@@ -0,0 +1,91 @@
+# tests/test_model_registry.py
+
+import uuid
+from unittest.mock import patch
+
+from langchain_core.outputs import Generation, LLMResult
+
+from src.content_manager import ContentManager
+from src.llm_clients.factory import _clamp_output_tokens
+from src.model_registry import (
+    DEFAULT_CAPABILITIES,
+    ModelRegistry,
+    get_llm_capabilities,
+    get_model_capabilities,
+    get_model_name,
+)
+from src.token_callback import TokenUsageCallbackHandler, _calculate_cost
+from tests.test_content_manager import MockChatModel
+
+
+def test_longest_matching_pattern_wins():
+    assert get_model_capabilities("gemini-2.0-flash-001").max_output_tokens == 8192
+    assert get_model_capabilities("gemini-2.0-flash-lite").supports_prompt_caching is False
+    assert get_model_capabilities("models/gemini-2.5-pro-preview-03-25").max_output_tokens == 65_536
+    assert get_model_capabilities("claude-3-7-sonnet-20250219").context_window == 200_000
+    local = get_model_capabilities("DeepSeek-R1-Distill-Llama-8B-Q4_K_M.gguf")
+    assert (local.provider, local.tokenizer, local.supports_tools) == ("local", "llama", False)
+
+
+def test_unknown_models_get_conservative_defaults():
+    assert get_model_capabilities("some-new-model") == DEFAULT_CAPABILITIES
+    assert get_model_capabilities(None) == DEFAULT_CAPABILITIES
+
+
+def test_config_entries_add_and_override_fields():
+    registry = ModelRegistry({
+        "Gemini-2.0-Flash": {"context_window": 500_000},
+        "my-finetune-8b": {"provider": "local", "context_window": 16384, "tokenizer": "llama", "colour": "red"},
+    })
+    flash = registry.get("gemini-2.0-flash")
+    assert flash.context_window == 500_000
+    assert flash.max_output_tokens == 8192  # Other fields keep the built-in values
+    custom = registry.get("my-finetune-8b.Q4_K_M.gguf")
+    assert (custom.provider, custom.context_window) == ("local", 16384)
+
+
+def test_llm_capabilities_look_through_the_retry_wrapper_and_n_ctx():
+    class Wrapper:  # Like RetryingLLM, which keeps the wrapped client in .llm
+        def __init__(self, llm):
+            self.llm = llm
+            self.model_name = "unknown"
+
+    wrapped = Wrapper(MockChatModel(model_name="gemini-2.0-flash"))
+    assert get_model_name(wrapped) == "gemini-2.0-flash"
+    assert get_llm_capabilities(wrapped).context_window == 1_048_576
+
+    class LoadedLocalModel(MockChatModel):
+        model_path: str = "/models/yarn-mistral-7b-64k.Q4_K_M.gguf"
+        n_ctx: int = 32768
+
+    local = LoadedLocalModel(model_name="")
+    assert get_model_name(local) == "yarn-mistral-7b-64k.Q4_K_M.gguf"
+    assert get_llm_capabilities(local).context_window == 32768
+
+
+def test_content_manager_uses_registry_context_window():
+    manager = ContentManager(primary_llm=MockChatModel(model_name="gemini-2.0-flash"), chunk_size=1000, chunk_overlap=100)
+    assert manager._get_model_context_window(manager.primary_llm) == 1_048_576
+    assert manager._get_model_context_window(MockChatModel(model_name="claude-3-5-haiku-latest")) == 200_000
+
+
+def test_factory_clamps_output_tokens_for_known_models():
+    assert _clamp_output_tokens("gemini-2.0-flash", 16384) == 8192
+    assert _clamp_output_tokens("claude-3-7-sonnet-20250219", 8092) == 8092
+    assert _clamp_output_tokens("unknown-model", 16384) == 16384
+
+
+def test_local_model_usage_is_estimated_and_free():
+    assert _calculate_cost("DeepSeek-R1-Distill-Llama-8B-Q4_K_M.gguf", 1000, 1000) == 0.0
+
+    with patch('src.token_callback.TRACK_TOKEN_USAGE', True), \
+         patch('src.token_callback.SUMMARIZER_MODEL', "DeepSeek-R1-Distill-Llama-8B-Q4_K_M.gguf"):
+        handler = TokenUsageCallbackHandler()
+        run_id = uuid.uuid4()
+        handler.on_llm_start({}, ["x" * 4000], run_id=run_id, tags=["summarizer"])
+        handler.on_llm_end(LLMResult(generations=[[Generation(text="y" * 400)]], llm_output=None), run_id=run_id)
+
+    assert handler.prompt_tokens == 1000
+    assert handler.completion_tokens == 100
+    assert handler.total_cost == 0.0
+    assert run_id not in handler.prompt_chars
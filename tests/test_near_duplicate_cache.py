@@ -0,0 +1,95 @@
+# tests/test_near_duplicate_cache.py
+
+import random
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.condenser import IncrementalCondenser
+from src.near_duplicate_cache import NearDuplicateSummaryCache, estimate_similarity, minhash_sketch
+
+
+def make_article(seed, words=600):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+ARTICLE = make_article(1)
+# Same article with a different byline and navigation lines, as served under another URL
+SYNDICATED = "Home | News | Sign in\nBy Staff Writer\n" + ARTICLE + "\nShare this article. Related stories."
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = NearDuplicateSummaryCache(db_path=str(tmp_path / "near_duplicate.db"), threshold=0.85, ttl_hours=1, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_similarity_estimate_tracks_overlap():
+    assert estimate_similarity(minhash_sketch(ARTICLE), minhash_sketch(ARTICLE)) == 1.0
+    assert estimate_similarity(minhash_sketch(ARTICLE), minhash_sketch(SYNDICATED)) > 0.9
+    assert estimate_similarity(minhash_sketch(ARTICLE), minhash_sketch(make_article(2))) < 0.1
+
+
+def test_near_duplicate_reuses_summary(cache):
+    cache.put(ARTICLE, "summary of the article", tag="model-a")
+    summary, similarity = cache.find(SYNDICATED, tag="model-a")
+    assert summary == "summary of the article"
+    assert similarity >= 0.85
+    stats = cache.get_stats()
+    assert stats["threshold"] == 0.85
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+
+def test_different_text_and_other_tags_miss(cache):
+    cache.put(ARTICLE, "summary of the article", tag="model-a")
+    assert cache.find(make_article(2), tag="model-a") is None
+    assert cache.find(SYNDICATED, tag="model-b") is None
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_short_texts_are_skipped(cache):
+    cache.put("too short to sketch", "summary", tag="model-a")
+    assert cache.find("too short to sketch", tag="model-a") is None
+    assert cache.get_stats()["entries"] == 0
+    assert cache.stats.skipped == 1
+
+
+def test_expired_summaries_are_not_reused(cache):
+    cache.put(ARTICLE, "summary", tag="model-a")
+    cache._conn.execute("UPDATE near_duplicate_summaries SET created_at = ?", (time.time() - 2 * 3600,))
+    cache._conn.commit()
+    assert cache.find(SYNDICATED, tag="model-a") is None
+    assert cache.stats.expired == 1
+
+
+def test_eviction_drops_anchors(cache):
+    for seed in range(3):
+        cache.put(make_article(seed), f"summary {seed}", tag="model-a")
+    assert cache.get_stats()["entries"] == 2
+    keys = {row[0] for row in cache._conn.execute("SELECT entry_key FROM near_duplicate_summaries")}
+    anchor_keys = {row[0] for row in cache._conn.execute("SELECT DISTINCT entry_key FROM near_duplicate_anchors")}
+    assert anchor_keys == keys
+
+
+@pytest.mark.asyncio
+async def test_condenser_reuses_condensation_of_near_duplicate_delta(cache):
+    calls = []
+
+    def _condense(inputs):
+        calls.append(inputs["text"])
+        return AIMessage(content=f"condensed {len(calls)}")
+
+    condenser = IncrementalCondenser(
+        RunnableLambda(_condense), max_tokens=100_000, min_delta_chars=10, summary_cache=cache, cache_tag="condense:test"
+    )
+    await condenser.condense("\n\n" + ARTICLE + "\n\nlatest")
+    condenser.reset()
+    result = await condenser.condense("\n\n" + SYNDICATED + "\n\nlatest")
+    assert len(calls) == 1
+    assert "condensed 1" in result
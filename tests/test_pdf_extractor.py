@@ -0,0 +1,97 @@
+# tests/test_pdf_extractor.py
+
+import pymupdf
+import pytest
+
+from src import pdf_extractor
+from src.pdf_extractor import (
+    PAGE_BREAK,
+    aextract_content_from_pdf,
+    extract_content_from_pdf,
+    iter_pdf_pages,
+)
+
+
+def make_pdf(page_count: int) -> bytes:
+    """Build an in-memory PDF whose pages contain a few lines of identifiable text."""
+    doc = pymupdf.open()
+    for i in range(page_count):
+        page = doc.new_page()
+        for line in range(5):
+            page.insert_text((72, 72 + line * 20), f"Page {i} line {line} with some filler text for extraction")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture(autouse=True)
+def in_thread(monkeypatch):
+    """Run page ranges in threads; the process pool itself is exercised separately."""
+    monkeypatch.setattr(pdf_extractor, "PDF_EXTRACTION_WORKERS", 0)
+    monkeypatch.setattr(pdf_extractor, "PDF_PAGES_PER_TASK", 2)
+
+
+@pytest.mark.asyncio
+async def test_pages_stream_in_order():
+    pages = [page async for page in iter_pdf_pages(make_pdf(7))]
+    assert [page.number for page in pages] == list(range(7))
+    assert pages[3].text.startswith("Page 3 line 0")
+    assert all(page.tokens > 0 for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_async_and_sync_extraction_agree():
+    pdf_bytes = make_pdf(5)
+    async_result = await aextract_content_from_pdf(pdf_bytes, max_pages=0, max_tokens=0)
+    sync_result = extract_content_from_pdf(pdf_bytes, max_pages=0, max_tokens=0)
+    assert async_result["full_content"] == sync_result["full_content"]
+    assert async_result["full_content"].count(PAGE_BREAK) == 4
+    assert async_result["pages_extracted"] == 5
+
+
+@pytest.mark.asyncio
+async def test_page_and_token_caps_stop_early():
+    pdf_bytes = make_pdf(10)
+    seen = []
+    result = await aextract_content_from_pdf(pdf_bytes, max_pages=3, max_tokens=0, on_page=seen.append)
+    assert result["pages_extracted"] == 3
+    assert [page.number for page in seen] == [0, 1, 2]
+    assert "extracted 3 of 10 pages" in result["full_content"]
+
+    result = await aextract_content_from_pdf(pdf_bytes, max_pages=0, max_tokens=1)
+    assert result["pages_extracted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_process_pool_extraction(monkeypatch):
+    monkeypatch.setattr(pdf_extractor, "PDF_EXTRACTION_WORKERS", 2)
+    try:
+        result = await aextract_content_from_pdf(make_pdf(6), max_pages=0, max_tokens=0)
+    finally:
+        pdf_extractor.shutdown_pdf_executor()
+    assert result["pages_extracted"] == 6
+    assert "Page 5 line 4" in result["full_content"]
+
+
+@pytest.mark.asyncio
+async def test_workers_get_a_temp_file_path(monkeypatch):
+    sources = []
+    original = pdf_extractor._extract_page_range
+
+    def recording_extract(source, start, end):
+        sources.append(source)
+        return original(source, start, end)
+
+    monkeypatch.setattr(pdf_extractor, "_extract_page_range", recording_extract)
+    monkeypatch.setattr(pdf_extractor, "get_pdf_executor", lambda: object())
+    monkeypatch.setattr(pdf_extractor, "_run_in_worker", lambda func, *args: pdf_extractor.asyncio.to_thread(func, *args))
+    pages = [page async for page in iter_pdf_pages(make_pdf(5))]
+
+    assert len(pages) == 5
+    assert sources and all(isinstance(source, str) for source in sources)
+    assert not any(pdf_extractor.os.path.exists(source) for source in sources)
+
+
+def test_invalid_pdf_returns_error():
+    result = extract_content_from_pdf(b"not a pdf")
+    assert result["title"] == "Error during PDF extraction"
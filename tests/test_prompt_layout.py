@@ -0,0 +1,65 @@
+# tests/test_prompt_layout.py
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from src.agent.prompt_layout import build_action_prompt, mark_cache_breakpoints, supports_cache_breakpoints
+
+ACTION_INPUT = {
+    "topic": "solar storage",
+    "current_date": "2025-05-01",
+    "summary_so_far": "SUMMARY-1",
+    "sources_visited": "https://a.example",
+    "last_action": "web_browser search",
+    "invalid_extraction_urls": [],
+    "tool_usage_tracker_md": "| web_browser | 1 | 3 | 7 |",
+}
+
+
+def history():
+    return [
+        AIMessage(content="", tool_calls=[{"name": "web_browser", "args": {"query": "q"}, "id": "call-1"}]),
+        ToolMessage(content="search results", tool_call_id="call-1"),
+    ]
+
+
+def test_cache_aware_layout_keeps_volatile_fields_out_of_the_prefix():
+    prompt = build_action_prompt("history", "cache_aware")
+    first = prompt.invoke({**ACTION_INPUT, "history": history()}).to_messages()
+    second = prompt.invoke({
+        **ACTION_INPUT,
+        "summary_so_far": "SUMMARY-2",
+        "last_action": "web_browser extract",
+        "history": history() + [AIMessage(content="reading the first result")],
+    }).to_messages()
+    # Everything before the final context message is an unchanged prefix of the next iteration
+    assert second[:len(first) - 1] == first[:-1]
+    assert "SUMMARY-1" not in first[0].content and "Tool Usage Tracker" in first[0].content
+    assert isinstance(first[-1], HumanMessage) and "SUMMARY-1" in first[-1].content
+
+
+def test_classic_layout_is_unchanged():
+    messages = build_action_prompt("history", "classic").invoke({**ACTION_INPUT, "history": []}).to_messages()
+    assert len(messages) == 2
+    assert "SUMMARY-1" in messages[1].content and "Constraint Checklist" in messages[1].content
+
+
+def test_breakpoints_mark_system_prompt_and_end_of_history():
+    prompt_value = build_action_prompt("history", "cache_aware").invoke({**ACTION_INPUT, "history": history()})
+    messages = mark_cache_breakpoints(prompt_value)
+    assert messages[0].content[-1]["cache_control"] == {"type": "ephemeral"}
+    assert messages[2].content[-1] == {"type": "text", "text": "search results", "cache_control": {"type": "ephemeral"}}
+    # The tool-call-only AI message and the volatile context stay as they were
+    assert messages[1].content == "" and isinstance(messages[-1].content, str)
+    assert isinstance(prompt_value.to_messages()[0].content, str)
+
+
+def test_breakpoints_only_for_anthropic_clients():
+    class ChatAnthropic:
+        pass
+
+    class RetryWrapper:
+        def __init__(self, llm):
+            self.llm = llm
+
+    assert supports_cache_breakpoints(RetryWrapper(ChatAnthropic()))
+    assert not supports_cache_breakpoints(RetryWrapper(SystemMessage(content="x")))
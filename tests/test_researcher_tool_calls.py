@@ -0,0 +1,138 @@
+# tests/test_researcher_tool_calls.py
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from langchain_core.messages import ToolMessage
+
+from src.agent.researcher_agent import McpError, ResearcherAgent
+
+
+def make_agent(cached=None):
+    agent = ResearcherAgent.__new__(ResearcherAgent)
+    agent.content_manager = MagicMock()
+    agent.content_manager.get_cached_content.side_effect = lambda key: (cached or {}).get(key)
+    return agent
+
+
+def test_mcp_content_id_depends_on_call_not_call_id():
+    first = ResearcherAgent._mcp_content_id("pubmed", {"action": "search", "query": "x", "limit": 5})
+    reordered = ResearcherAgent._mcp_content_id("pubmed", {"limit": 5, "query": "x", "action": "search"})
+    other = ResearcherAgent._mcp_content_id("pubmed", {"action": "search", "query": "y", "limit": 5})
+    assert first == reordered
+    assert first != other
+    assert first.startswith("mcp_pubmed_search_")
+
+
+def test_stored_outputs_skip_tool_execution():
+    mcp_args = {"action": "search", "query": "solar"}
+    post_url = "https://www.reddit.com/r/solar/comments/1"
+    agent = make_agent({
+        ResearcherAgent._mcp_content_id("pubmed", mcp_args): {"full_content": "stored abstracts"},
+        post_url: {"full_content": "<h1>Post:</h1>\nPost body\n\n<h1>Comments:</h1>\nA comment"},
+    })
+    tool = MagicMock()
+    tool.arun = AsyncMock(return_value="fresh output")
+    calls = [
+        {"name": "pubmed", "args": mcp_args, "id": "1", "tool": tool},
+        {"name": "reddit_extract_post", "args": {"post_url": post_url}, "id": "2", "tool": tool},
+        {"name": "pubmed", "args": {"action": "search", "query": "wind"}, "id": "3", "tool": tool},
+    ]
+
+    outputs = asyncio.run(agent._execute_tool_calls(calls, {"callbacks": None}))
+
+    assert outputs[0] == "stored abstracts"
+    assert json.loads(outputs[1]) == {"url": post_url, "post": "Post body", "post_comments": "A comment"}
+    assert outputs[2] == "fresh output"
+    tool.arun.assert_awaited_once()
+
+
+class SlowTool:
+    """Tool stub that sleeps for a given delay, tracking how many calls run at once."""
+
+    def __init__(self, delays, failing=(), error=RuntimeError):
+        self.delays = delays
+        self.failing = set(failing)
+        self.error = error
+        self.running = 0
+        self.max_running = 0
+        self.finished = []
+
+    async def arun(self, tool_input, callbacks=None):
+        name = tool_input["name"]
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays[name])
+            if name in self.failing:
+                raise self.error(f"{name} failed")
+            return f"output {name}"
+        finally:
+            self.running -= 1
+            self.finished.append(name)
+
+
+def schedule(tool, names):
+    return [{"name": "pubmed", "args": {"name": name}, "id": f"call-{name}", "tool": tool} for name in names]
+
+
+def test_concurrency_is_bounded():
+    tool = SlowTool({name: 0.02 for name in "abcdef"})
+    with patch('src.agent.researcher_agent.MAX_CONCURRENT_TOOL_CALLS', 2):
+        outputs = asyncio.run(make_agent()._execute_tool_calls(schedule(tool, "abcdef"), {"callbacks": None}))
+    assert outputs == [f"output {name}" for name in "abcdef"]
+    assert tool.max_running == 2
+
+
+def test_results_and_tool_messages_keep_call_order_when_calls_finish_out_of_order():
+    tool = SlowTool({"a": 0.06, "b": 0.0, "c": 0.03})
+    calls = schedule(tool, "abc")
+    with patch('src.agent.researcher_agent.MAX_CONCURRENT_TOOL_CALLS', 3):
+        outputs = asyncio.run(make_agent()._execute_tool_calls(calls, {"callbacks": None}))
+    assert tool.finished == ["b", "c", "a"]
+    assert outputs == ["output a", "output b", "output c"]
+
+    # Messages produced in completion order (and an early validation error) are restored to request order
+    messages = [ToolMessage(content=f"result {name}", tool_call_id=f"call-{name}") for name in tool.finished]
+    messages.insert(0, ToolMessage(content="not found", tool_call_id="call-unknown"))
+    ordered = ResearcherAgent._order_tool_messages(messages, [{"id": call["id"]} for call in calls])
+    assert [msg.tool_call_id for msg in ordered] == ["call-a", "call-b", "call-c", "call-unknown"]
+
+
+def test_failing_call_does_not_cancel_siblings():
+    tool = SlowTool({"a": 0.03, "b": 0.0, "c": 0.03}, failing={"b"})
+    with patch('src.agent.researcher_agent.MAX_CONCURRENT_TOOL_CALLS', 3):
+        outputs = asyncio.run(make_agent()._execute_tool_calls(schedule(tool, "abc"), {"callbacks": None}))
+    assert outputs[0] == "output a"
+    assert isinstance(outputs[1], RuntimeError) and str(outputs[1]) == "b failed"
+    assert outputs[2] == "output c"
+    assert sorted(tool.finished) == ["a", "b", "c"]
+
+
+def test_concurrent_mcp_argument_error_gets_a_correction_suggestion():
+    ErrorData = pytest.importorskip("mcp.types").ErrorData
+
+    def invalid_arguments(message):
+        return McpError(ErrorData(code=-32602, message=message))
+
+    tool = SlowTool({"a": 0.03, "b": 0.0}, failing={"b"}, error=invalid_arguments)
+    agent = make_agent()
+    agent._try_direct_correction = MagicMock(return_value=None)
+    agent._get_tool_correction_suggestion = AsyncMock(return_value={"name": "b", "limit": 5})
+    with patch('src.agent.researcher_agent.MAX_CONCURRENT_TOOL_CALLS', 2):
+        outputs = asyncio.run(agent._execute_tool_calls(schedule(tool, "ab"), {"callbacks": None}))
+
+    assert outputs[0] == "output a"
+    assert isinstance(outputs[1], McpError)
+    # The result loop re-raises the returned exception into its McpError handler
+    try:
+        raise outputs[1]
+    except McpError as mcp_exc:
+        summary, is_failure = asyncio.run(agent._summarize_mcp_error("pubmed", {"name": "b"}, mcp_exc, {}))
+    assert is_failure
+    assert summary.startswith("MCP Tool Error: pubmed failed")
+    assert '[Correction Suggestion]' in summary and '"limit": 5' in summary
+    agent._get_tool_correction_suggestion.assert_awaited_once()
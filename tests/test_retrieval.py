@@ -0,0 +1,67 @@
+# tests/test_retrieval.py
+
+from src.retrieval import BM25Index, EmbeddingIndex, fuse_rankings, tokenize
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Solar-Panel is on the roof") == ["solar", "panel", "roof"]
+
+
+def test_search_ranks_matching_documents():
+    index = BM25Index()
+    index.add("a", "solar panel efficiency improves with cooling")
+    index.add("b", "pasta recipes with tomato sauce")
+    index.add("c", "solar power is cheap; solar panel prices keep falling")
+
+    results = index.search("solar panel", k=5)
+    assert sorted(doc_id for doc_id, _ in results) == ["a", "c"]
+    assert index.search("solar panel", k=1)[0][1] >= results[-1][1]
+    assert index.search("unrelated words") == []
+
+
+def test_incremental_add_and_remove_match_a_fresh_index():
+    texts = {1: "solar panel", 2: "wind turbine", 3: "solar inverter"}
+    incremental = BM25Index()
+    for doc_id, text in texts.items():
+        incremental.add(doc_id, text)
+    incremental.add(4, "tidal power")
+    incremental.remove(4)
+    incremental.add(2, "wind turbine blades")  # Re-adding replaces the document
+
+    fresh = BM25Index()
+    for doc_id, text in {**texts, 2: "wind turbine blades"}.items():
+        fresh.add(doc_id, text)
+
+    assert len(incremental) == 3
+    assert incremental.score("solar turbine") == fresh.score("solar turbine")
+    assert "tidal" not in incremental.doc_freqs
+
+
+class KeywordEncoder:
+    """Stands in for a sentence-transformers model: one normalized dimension per keyword."""
+    keywords = ["solar", "wind", "pasta"]
+
+    def encode(self, texts, normalize_embeddings=True):
+        vectors = []
+        for text in texts:
+            counts = [text.count(word) + 0.01 for word in self.keywords]
+            norm = sum(c * c for c in counts) ** 0.5
+            vectors.append([c / norm for c in counts])
+        return vectors
+
+
+def test_embedding_index_ranks_by_cosine_similarity():
+    index = EmbeddingIndex(KeywordEncoder())
+    index.add_many([("a", "solar solar"), ("b", "wind"), ("c", "pasta and solar")])
+    index.remove("b")
+
+    assert [doc_id for doc_id, _ in index.search("solar", k=2)] == ["a", "c"]
+    assert len(index) == 2
+
+
+def test_fuse_rankings_prefers_documents_ranked_well_by_both():
+    lexical = [("a", 9.0), ("b", 5.0), ("c", 1.0)]
+    semantic = [("d", 0.9), ("b", 0.8), ("c", 0.1)]
+    fused = fuse_rankings([lexical, semantic], k=3)
+    assert [doc_id for doc_id, _ in fused][0] == "b"
+    assert len(fused) == 3
@@ -0,0 +1,61 @@
+# tests/test_search_cache.py
+
+import time
+
+import pytest
+
+from src.search_cache import SearchResultCache
+
+RESULTS = [{"title": f"Result {i}", "link": f"https://example.com/{i}", "snippet": "..."} for i in range(5)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SearchResultCache(db_path=str(tmp_path / "search_cache.db"), ttl_hours=1, max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_roundtrip_normalizes_case_and_whitespace(cache):
+    cache.put("Python  Asyncio tutorial", RESULTS, result_limit=10)
+    assert cache.get("python asyncio   TUTORIAL") == RESULTS
+    assert cache.get("python asyncio tutorial", page=2) is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+def test_pages_are_cached_separately(cache):
+    cache.put("query", RESULTS, page=1)
+    cache.put("query", "Search results for 'query' (Page 2): ...", page=2)
+    assert cache.get("query", page=2).startswith("Search results")
+    assert cache.get("query", page=1) == RESULTS
+
+
+def test_truncated_entry_misses_for_larger_request(cache):
+    cache.put("query", RESULTS, result_limit=5)
+    assert cache.get("query", min_results=5) == RESULTS
+    assert cache.get("query", min_results=20) is None
+    # A shorter list than its limit is complete, so larger requests can use it
+    cache.put("other", RESULTS[:2], result_limit=5)
+    assert cache.get("other", min_results=20) == RESULTS[:2]
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.put("query", RESULTS)
+    cache._conn.execute("UPDATE search_cache SET created_at = ?", (time.time() - 2 * 3600,))
+    cache._conn.commit()
+    assert cache.get("query") is None
+    assert cache.stats.expired == 1
+
+
+def test_lru_eviction_respects_max_entries(cache):
+    for i in range(3):
+        cache.put(f"query {i}", RESULTS)
+    # Touch the first query so the second becomes least recently used
+    cache._conn.execute("UPDATE search_cache SET last_accessed = ? WHERE query = ?", (time.time() + 10, "query 0"))
+    cache._conn.commit()
+    cache.put("query 3", RESULTS)
+    assert cache.get("query 1") is None
+    assert cache.get("query 0") == RESULTS
+    assert cache.get_stats()["entries"] == 3
+    assert cache.stats.evicted == 1
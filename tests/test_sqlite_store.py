@@ -0,0 +1,71 @@
+# tests/test_sqlite_store.py
+
+from dataclasses import dataclass
+
+from src.sqlite_store import ProcessStore, SqliteStore, resolve_ttl_seconds
+
+
+@dataclass
+class Stats:
+    expired: int = 0
+    evicted: int = 0
+
+
+class KeyValueStore(SqliteStore):
+    TABLE = "kv"
+    KEY_COLUMN = "k"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS kv (
+            k TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL,
+            size_bytes INTEGER NOT NULL DEFAULT 0
+        );
+    """
+
+    def __init__(self, db_path):
+        self.stats = Stats()
+        super().__init__(db_path)
+
+    def put(self, key, created_at, last_accessed, size):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?)", (key, created_at, last_accessed, size))
+            self._conn.commit()
+
+
+def test_resolve_ttl_seconds():
+    ttls = {"pubmed": 2, "default": 1}
+    assert resolve_ttl_seconds(ttls, "pubmed") == 7200
+    assert resolve_ttl_seconds(ttls, "pubmedmcp") == 7200
+    assert resolve_ttl_seconds(ttls, "web") == 3600
+    assert resolve_ttl_seconds({"web": 1}, "reddit", default_hours=0) is None
+    assert resolve_ttl_seconds(24) == 24 * 3600
+    assert resolve_ttl_seconds(0) is None
+
+
+def test_lru_eviction_by_entries_and_bytes(tmp_path):
+    store = KeyValueStore(str(tmp_path / "kv.db"))
+    for i in range(5):
+        store.put(f"k{i}", 0, i, 100)
+    with store._lock:
+        assert store._evict_lru(max_entries=3) == 2
+        # 300 bytes over a 250 byte cap are evicted down to 90% of the cap
+        assert store._evict_lru(max_bytes=250) == 1
+    assert store._size() == {"entries": 2, "size_bytes": 200}
+    assert [row[0] for row in store._conn.execute("SELECT k FROM kv ORDER BY k")] == ["k3", "k4"]
+    assert store.stats.evicted == 3
+
+
+def test_expiry_and_process_store(tmp_path):
+    store = KeyValueStore(str(tmp_path / "kv.db"))
+    store.put("old", 0, 0, 1)
+    with store._lock:
+        assert store._expire_if_stale("old", 0, 60)
+        assert not store._expire_if_stale("none", 0, None)
+    assert store.stats.expired == 1
+
+    created = []
+    shared = ProcessStore(lambda: created.append(1) or store, True, "test store")
+    assert shared.get() is store and shared.get() is store
+    assert created == [1]
+    assert ProcessStore(lambda: store, False, "disabled").get() is None
@@ -0,0 +1,108 @@
+# tests/test_summarization_engine.py
+
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from src.summarization_engine import SummarizationEngine
+
+MAP_PROMPT = PromptTemplate.from_template("MAP {text}")
+COMBINE_PROMPT = PromptTemplate.from_template("COMBINE {text}")
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def make_fake_llm(calls, delay=0.0, tracker=None):
+    """Fake model: records each prompt and returns a short summary word per call."""
+    async def _run(prompt_value):
+        text = prompt_value.to_string()
+        if tracker is not None:
+            tracker["active"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+        await asyncio.sleep(delay)
+        if tracker is not None:
+            tracker["active"] -= 1
+        calls.append(text)
+        stage, _, body = text.partition(" ")
+        return f"{stage.lower()}-summary-of-{len(body.split())}-words"
+    return RunnableLambda(_run)
+
+
+def make_engine(llm, context_window=1000, max_concurrency=4):
+    return SummarizationEngine(
+        llm, context_window, max_concurrency=max_concurrency,
+        map_prompt=MAP_PROMPT, combine_prompt=COMBINE_PROMPT, token_counter=count_words,
+    )
+
+
+def make_docs(count, words=50):
+    return [Document(page_content=" ".join([f"doc{i}"] * words)) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_map_phase_respects_concurrency_limit():
+    calls, tracker = [], {"active": 0, "peak": 0}
+    engine = make_engine(make_fake_llm(calls, delay=0.01, tracker=tracker), max_concurrency=3)
+
+    summary = await engine.summarize(make_docs(10))
+
+    map_calls = [c for c in calls if c.startswith("MAP")]
+    assert len(map_calls) == 10
+    assert tracker["peak"] == 3
+    assert summary.startswith("combine-summary")
+    stats = engine.stats.to_dict()
+    assert stats["runs"] == 1 and stats["chunks"] == 10
+    assert stats["map"]["calls"] == 10 and stats["combine"]["calls"] == 1
+    # Fanning out makes the map phase faster than the sum of its calls
+    assert stats["map_wall"]["total_seconds"] < stats["map"]["total_seconds"]
+
+
+@pytest.mark.asyncio
+async def test_local_model_runs_one_call_at_a_time():
+    calls, tracker = [], {"active": 0, "peak": 0}
+    engine = make_engine(make_fake_llm(calls, delay=0.005, tracker=tracker), max_concurrency=1)
+
+    await asyncio.gather(engine.summarize(make_docs(3)), engine.summarize(make_docs(3)))
+
+    # The limit is shared by concurrent summaries of the same model
+    assert tracker["peak"] == 1
+    assert engine.stats.runs == 2
+
+
+@pytest.mark.asyncio
+async def test_tree_reduce_when_summaries_exceed_window():
+    calls = []
+
+    async def _verbose(prompt_value):
+        text = prompt_value.to_string()
+        calls.append(text)
+        # Map summaries are long enough that they cannot all be combined in one call
+        return " ".join(["point"] * 200) if text.startswith("MAP") else "combined"
+
+    engine = make_engine(RunnableLambda(_verbose), context_window=1000)  # 798 words per call
+    summary = await engine.summarize(make_docs(8))
+
+    assert summary == "combined"
+    collapse_and_combine = [c for c in calls if c.startswith("COMBINE")]
+    # 8 summaries of 200 words: collapsed in groups of 3, 3 and 2, then combined once more
+    assert len(collapse_and_combine) == 4
+    assert all(count_words(c) - 1 <= engine.token_max for c in collapse_and_combine)
+    assert engine.stats.collapse_levels == 1
+    assert engine.stats.collapse.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_oversized_document_is_split_for_the_map_phase():
+    calls = []
+    engine = make_engine(make_fake_llm(calls), context_window=1000)
+
+    await engine.summarize([Document(page_content=" ".join(["word"] * 5000))])
+
+    map_calls = [c for c in calls if c.startswith("MAP")]
+    assert len(map_calls) > 1
+    assert all(count_words(c) - 1 <= engine.token_max for c in map_calls)
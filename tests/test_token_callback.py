@@ -521,4 +521,33 @@ class TestTokenCallback:
         
         # Verify the warning was logged
         assert "No token usage data found in LLM response" in caplog.text
-        assert "No token counts found in response" in caplog.text 
\ No newline at end of file
+        assert "No token counts found in response" in caplog.text 
+
+def test_prompt_cache_tokens_are_recorded_and_discounted():
+    from langchain_core.outputs import ChatGeneration
+    from src.token_callback import TokenCostProcess, _cache_write_premium, _cached_input_discount, _get_cached_input_tokens
+
+    message = AIMessage(
+        content="ok",
+        usage_metadata={
+            "input_tokens": 10000, "output_tokens": 100, "total_tokens": 10100,
+            "input_token_details": {"cache_read": 8000, "cache_creation": 500},
+        },
+    )
+    response = LLMResult(generations=[[ChatGeneration(message=message)]], llm_output={})
+    assert _get_cached_input_tokens(response) == (8000, 500)
+    gemini = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+                       llm_output={"usage_metadata": {"cached_content_token_count": 4096}})
+    assert _get_cached_input_tokens(gemini) == (4096, 0)
+
+    with patch('src.token_callback.PROMPT_CACHE_READ_COST_FACTOR', {"claude": 0.1}):
+        discount = _cached_input_discount("claude-3-7-sonnet-20250219", 8000)
+        assert discount == pytest.approx(8 * 0.008 * 0.9)
+    with patch('src.token_callback.PROMPT_CACHE_WRITE_COST_FACTOR', {"claude": 1.25}):
+        assert _cache_write_premium("claude-3-7-sonnet-20250219", 500) == pytest.approx(0.5 * 0.008 * 0.25)
+        assert _cache_write_premium("gemini-2.5-pro-preview-03-25", 500) == 0.0
+
+    processor = TokenCostProcess()
+    processor.update_prompt_cache("claude-3-7-sonnet-20250219", 8000, 500)
+    processor.update_prompt_cache("claude-3-7-sonnet-20250219", 2000)
+    assert processor.prompt_cache["claude-3-7-sonnet-20250219"] == {"cached_input": 10000, "cache_write": 500}